@@ -6,6 +6,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Iterator, Union, Optional  # ★ Optional 추가
 
+from agents.agent_base import CancelToken, Deadline, RunCancelled, llm_with_budget, stream_llm_text
+
 Chat = List[Dict[str, str]]
 
 @dataclass
@@ -68,7 +70,7 @@ class A2AClient:
         return items
 
     # ---------- LLM으로 에이전트 선택 (user_input만 사용) ----------
-    def _ask_gpt_for_agent(self, user_input: str) -> tuple[Dict[str, Any], str]:
+    def _ask_gpt_for_agent(self, user_input: str, deadline: Optional[Deadline] = None) -> tuple[Dict[str, Any], str]:
         brief_cards = [
             {
                 "name": it["card"].name,
@@ -93,11 +95,19 @@ class A2AClient:
   "reason": "이 Agent를 선택한 이유"
 }}
 """
-        res = self.llm.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
+        # 라우팅도 남은 시간 예산 안에서만 (초과 시 폴백 에이전트로)
+        if deadline is not None and deadline.expired:
+            return {"route": "DIRECT", "reason": "deadline"}, prompt
+        try:
+            res = llm_with_budget(self.llm, deadline).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+            )
+        except Exception:
+            if deadline is None or not deadline.expired:
+                raise
+            return {"route": "DIRECT", "reason": "deadline"}, prompt
         raw = res.choices[0].message.content.strip()
         try:
             decision = json.loads(raw)
@@ -119,15 +129,24 @@ class A2AClient:
 
     # ---------- 선택 + 실행 ----------
     # 반환: {"agent_name": str|None, "result": Iterator[str] | Dict[str, Any], "debug": {...}}
-    def run(self, messages_or_text: Union[str, Chat], debug: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def run(self, messages_or_text: Union[str, Chat], debug: Optional[Dict[str, Any]] = None,
+            cancel: Optional[CancelToken] = None, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         app.py에서 debug=dict()를 넘기면, 에이전트가 내부 디버그를 채워서 되돌려줍니다.
+        cancel 토큰은 에이전트(runner.cancel_token)까지 전달되어, 취소 시 LLM/MCP 스트림을 즉시 닫습니다.
+        취소되면 RunCancelled를 올립니다 (폴백으로 넘어가지 않음).
+        deadline(요청 전체 시간 예산)도 에이전트(runner.deadline)까지 전달되어, 각 단계가 남은 시간을
+        타임아웃으로 쓰고 부족하면 단계를 줄입니다 (요약 생략 → 도구 결과 그대로, LLM 생략 → 안내 문구).
         """
         if debug is None:
             debug = {}
+        cancel = cancel or CancelToken()
+        deadline = deadline or Deadline()
 
         _, user_input = self._normalize_input(messages_or_text)
-        decision, prompt = self._ask_gpt_for_agent(user_input)
+        cancel.raise_if_cancelled()
+        decision, prompt = self._ask_gpt_for_agent(user_input, deadline)
+        cancel.raise_if_cancelled()
 
         debug.update({
             "prompt": prompt,           # A2A → LLM 라우팅 프롬프트
@@ -136,6 +155,11 @@ class A2AClient:
                 "requested_agent_input": user_input,  # A2A → Agent 전달 입력
             }
         })
+        if deadline.bounded:
+            debug["execution"]["budget"] = {
+                "budget_sec": deadline.budget_sec,
+                "remaining_after_routing_sec": round(deadline.remaining(), 2),
+            }
 
         def attach_init_and_preview(runner):
             # 시작점(초기 프롬프트) 명시
@@ -163,18 +187,27 @@ class A2AClient:
             if target is not None:
                 runner = self._load_agent_runner(target["path"] / "agent.py")
                 if runner is not None and hasattr(runner, "execute"):
+                    runner.cancel_token = cancel
+                    runner.deadline = deadline
                     attach_init_and_preview(runner)  # 실행 전에 디버그 확정
                     try:
                         # ★ debug를 그대로 넘겨서 에이전트가 tool 선택/검증/plan/프롬프트를 채우게 함
                         return {"agent_name": target_name, "result": runner.execute(user_input, debug=debug), "debug": debug}
+                    except RunCancelled:
+                        raise
                     except Exception:
                         pass
 
-        # 폴백
+        # 폴백 (실행마다 새 인스턴스: 취소 토큰/실행 로그가 세션끼리 섞이지 않게)
         if self._fallback and hasattr(self._fallback, "execute"):
-            attach_init_and_preview(self._fallback)
+            fallback = type(self._fallback)(self.llm)
+            fallback.cancel_token = cancel
+            fallback.deadline = deadline
+            attach_init_and_preview(fallback)
             try:
-                return {"agent_name": self._fallback_name, "result": self._fallback.execute(user_input, debug=debug), "debug": debug}
+                return {"agent_name": self._fallback_name, "result": fallback.execute(user_input, debug=debug), "debug": debug}
+            except RunCancelled:
+                raise
             except Exception:
                 return {"agent_name": self._fallback_name, "result": {"error": "Fallback agent failed"}, "debug": debug}
 
@@ -208,7 +241,8 @@ class A2AClient:
         return None
 
     # TEMP code for susin agent
-    def _direct_stream(self, user_input: str, debug: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    def _direct_stream(self, user_input: str, debug: Optional[Dict[str, Any]] = None,
+                       cancel: Optional[CancelToken] = None, deadline: Optional[Deadline] = None) -> Iterator[str]:
 
         user_prompt = (
             "실패 이유를 토대로 사용자에게 양해를 구해줘.\n"
@@ -220,7 +254,4 @@ class A2AClient:
         messages = [
             {"role": "user", "content": user_prompt},
         ]
-        resp = self.llm.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
-        for ch in resp:
-            if getattr(ch.choices[0].delta, "content", None):
-                yield ch.choices[0].delta.content
\ No newline at end of file
+        yield from stream_llm_text(self.llm, messages, cancel, deadline)
\ No newline at end of file
@@ -1,16 +1,198 @@
 import json
+import queue
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Iterator
+from typing import Any, Callable, Dict, List, Optional, Iterator, Tuple
 
 import requests
 from openai import OpenAI
 
+from agents.server_health import CircuitOpenError, ServerHealth, hedge_delay_sec, pick_replicas
+
 try:
     from jsonschema import Draft7Validator  # optional
 except Exception:
     Draft7Validator = None
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class RunCancelled(Exception):
+    """실행이 취소됨 (사용자 중지/연결 종료)"""
+
+
+class CancelToken:
+    """
+    협력적 취소 토큰 (A2AClient.run → 에이전트 → LLM/MCP 호출까지 같은 토큰을 공유)
+      - 각 단계는 시작 전에 raise_if_cancelled()로 확인
+      - 열려 있는 스트림/응답은 register(close)로 등록 → cancel() 즉시 닫혀서 블로킹 읽기도 풀림
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._closers: Dict[int, Callable[[], Any]] = {}
+        self._seq = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            closers, self._closers = list(self._closers.values()), {}
+        for close in closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelled()
+
+    def register(self, close: Callable[[], Any]) -> Callable[[], None]:
+        """cancel() 시 호출할 close 등록. 반환값으로 등록 해제 (이미 취소됐으면 바로 close)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._seq += 1
+                key = self._seq
+                self._closers[key] = close
+                return lambda: self._closers.pop(key, None)
+        close()
+        return lambda: None
+
+
+class Deadline:
+    """
+    요청 전체 시간 예산 (A2AClient.run → 라우팅 → 도구 선택/호출 → 요약이 같은 Deadline을 공유)
+      - 각 단계는 남은 시간(remaining)을 LLM/HTTP 타임아웃으로 씀
+      - arm(abort)은 마감 시각에 abort를 호출 → 스트림을 읽는 중이어도 마감에 맞춰 끊김
+    budget_sec=None 이면 제한 없음
+    """
+
+    def __init__(self, budget_sec: Optional[float] = None):
+        self.budget_sec = budget_sec
+        self.expires_at = None if budget_sec is None else time.monotonic() + budget_sec
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self) -> Optional[float]:
+        """LLM/HTTP 호출용 타임아웃 (제한 없으면 None)"""
+        return None if self.expires_at is None else max(0.01, self.remaining())
+
+    def arm(self, abort: Callable[[], Any]) -> Optional[threading.Timer]:
+        if self.expires_at is None:
+            return None
+        timer = threading.Timer(self.remaining(), abort)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+# 시간 예산이 바닥났을 때 LLM 호출 대신 내보내는 안내
+DEADLINE_MESSAGE = "요청 처리 시간이 초과되어 답변을 완성하지 못했습니다. 잠시 뒤 다시 시도해주세요.\n"
+DEADLINE_CUT_NOTE = "\n\n…(응답 시간 제한으로 여기까지만 표시합니다)\n"
+
+# 회로가 열린(응답 없는) MCP 서버의 도구가 선택됐을 때의 안내
+CIRCUIT_OPEN_MESSAGE = "지금은 해당 서비스가 일시적으로 응답하지 않아 요청을 처리하지 못했습니다. 잠시 뒤 다시 시도해주세요.\n"
+
+
+def llm_with_budget(llm: OpenAI, deadline: Optional[Deadline]) -> OpenAI:
+    """남은 예산을 요청 타임아웃으로 (재시도는 예산을 넘기므로 끔)"""
+    if deadline is None or not deadline.bounded:
+        return llm
+    return llm.with_options(timeout=deadline.timeout(), max_retries=0)
+
+
+def _shutdown(sock) -> None:
+    # close만으로는 다른 스레드의 블로킹 recv가 안 깨어나므로 shutdown으로 읽기를 끝냄
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def abort_response(res: requests.Response) -> None:
+    """requests 응답을 다른 스레드에서 즉시 끊음 (본문 읽기 중이어도 바로 풀림)"""
+    sock = getattr(getattr(res.raw, "connection", None), "sock", None)
+    if sock is None:
+        # 서버가 Connection: close로 응답하면 http.client가 소켓을 연결에서 떼어 응답(fp)에만 남겨 둠
+        fp = getattr(getattr(res.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    _shutdown(sock)
+    res.close()
+
+
+def abort_llm_stream(stream) -> None:
+    """OpenAI 스트림을 다른 스레드에서 즉시 끊음 (첫 토큰 대기 중이어도 바로 풀림)"""
+    network_stream = getattr(getattr(stream, "response", None), "extensions", {}).get("network_stream")
+    if network_stream is not None:
+        _shutdown(network_stream.get_extra_info("socket"))
+    stream.close()
+
+
+def stream_llm_text(llm: OpenAI, messages: List[Dict[str, str]], cancel: Optional[CancelToken] = None,
+                    deadline: Optional[Deadline] = None, model: str = "gpt-4o",
+                    min_budget_sec: float = 1.0) -> Iterator[str]:
+    """
+    LLM 스트리밍 → 텍스트 조각. 소비자가 중간에 멈추거나(close) 취소되면 스트림(HTTP 연결)을 바로 닫음.
+    취소로 닫혀서 생긴 읽기 오류는 조용히 종료로 처리.
+    시간 예산: 남은 시간이 min_budget_sec 미만이면 호출하지 않고 안내만, 도중에 마감되면 끊고 표시.
+    """
+    cancel = cancel or CancelToken()
+    deadline = deadline or Deadline()
+    if cancel.cancelled:
+        return
+    if deadline.remaining() < min_budget_sec:
+        yield DEADLINE_MESSAGE
+        return
+    try:
+        resp = llm_with_budget(llm, deadline).chat.completions.create(model=model, messages=messages, stream=True)
+    except Exception:
+        if deadline.expired:
+            yield DEADLINE_MESSAGE
+            return
+        raise
+    unregister = cancel.register(lambda: abort_llm_stream(resp))
+    timer = deadline.arm(lambda: abort_llm_stream(resp))
+    try:
+        for ch in resp:
+            if cancel.cancelled:
+                return
+            if ch.choices and getattr(ch.choices[0].delta, "content", None):
+                yield ch.choices[0].delta.content
+    except Exception:
+        if cancel.cancelled:
+            return
+        if deadline.expired:
+            yield DEADLINE_CUT_NOTE
+            return
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+        unregister()
+        resp.close()
+
 
 class MCPAgentBase:
     """
@@ -19,13 +201,31 @@ class MCPAgentBase:
       - LLM으로 MCP 도구 선택 질의 (ask_gpt_for_tool)
       - 선택된 도구 호출 (call_mcp)
       - arguments JSON Schema 검증 (validate_args)
+      - 서버별 상태 추적/서킷 브레이커 (server_health): 회로가 열린 서버는 도구 선택에서 빼고, 호출은 바로 실패
+      - 서버당 레플리카 여러 개면 부하 분산, 멱등 도구는 느린 호출을 다른 레플리카로 헤징
+        (manifest에 "replica_safe": false인 서버는 레플리카를 쓰지 않고 첫 URL로만 호출)
+      - 서로 독립적인 도구 호출 여러 개(calls)를 한 번에 선택 → 동시에 실행해서 결과를 합침 (call_plan)
     """
 
     init_system: str = ""
+    # NDJSON 응답을 소비할 때 최대로 모을 레코드 수 (초과 시 조기 종료)
+    mcp_max_rows: int = 500
+    # 남은 시간 예산이 이보다 적으면 LLM 요약 대신 도구 결과를 그대로 보여줌
+    min_summary_budget_sec: float = 5.0
+    # 예산 부족으로 원본 데이터를 보여줄 때 표에 넣을 최대 행 수
+    raw_preview_rows: int = 30
+    # 한 번의 도구 선택에서 고를 수 있는 최대 호출 수 (1이면 단일 호출 형식만 안내)
+    max_plan_calls: int = 4
+    # 여러 호출을 동시에 실행할 스레드 수 상한
+    plan_max_workers: int = 4
 
     def __init__(self, llm_client: OpenAI, agent_dir: Optional[Path] = None):
         self.llm: OpenAI = llm_client
         self.agent_dir: Path = agent_dir or Path(__file__).parent
+        # 실행 취소 토큰 (A2AClient.run이 실행마다 넣어줌, 기본값은 취소되지 않는 토큰)
+        self.cancel_token: CancelToken = CancelToken()
+        # 요청 시간 예산 (A2AClient.run이 실행마다 넣어줌, 기본값은 제한 없음)
+        self.deadline: Deadline = Deadline()
         # 🔹 run 별 누적 로그 버퍼
         self.run_log: List[Dict[str, Any]] = []
 
@@ -45,7 +245,7 @@ class MCPAgentBase:
 
         project_root = Path(__file__).resolve().parents[1]
         self.tools_root: Path = project_root / "tools"
-        self.server_map: Dict[str, str] = self._read_json(self.tools_root / "mcp_servers.json") or {}
+        self.server_map: Dict[str, List[str]] = self._load_server_map()
         self.registry: Dict[str, Dict[str, Dict[str, Any]]] = self._load_registry()
 
     # ---------------- Run-log helpers ----------------
@@ -63,6 +263,55 @@ class MCPAgentBase:
                 rec[k] = v[:4000] + " …(truncated)"
         self.run_log.append(rec)
 
+    # ---------------- LLM helpers ----------------
+    def _llm_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """취소 토큰을 따르는 LLM 스트리밍 (생성기 close() 시 업스트림 스트림도 닫힘)"""
+        yield from stream_llm_text(self.llm, messages, self.cancel_token, self.deadline)
+
+    def summarize_or_raw(self, summary: Iterator[str], data, debug: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        시간 예산이 충분하면 LLM 요약(summary)을, 부족하면 요약을 건너뛰고 도구 결과를 그대로 렌더링.
+        summary는 아직 시작하지 않은 생성기라 건너뛰어도 LLM 호출은 일어나지 않음.
+        """
+        remaining = self.deadline.remaining()
+        if remaining >= self.min_summary_budget_sec:
+            yield from summary
+            return
+        summary.close()
+        self._log(debug, "deadline.degrade", stage="summarize", remaining_sec=round(remaining, 2))
+        if debug is not None:
+            debug.setdefault("execution", {}).setdefault("plan", {})["degraded"] = "raw_tool_data"
+        yield "⏱ 응답 시간 제한으로 요약 없이 조회 결과를 그대로 보여드립니다.\n\n"
+        yield self.render_raw_data(data)
+
+    def render_raw_data(self, data) -> str:
+        """도구 결과 → 마크다운 (레코드 목록이면 표, 아니면 JSON, 여러 호출 결과면 호출별로)"""
+        if isinstance(data, dict) and isinstance(data.get("results"), list):
+            parts = []
+            for r in data["results"]:
+                head = f"**{r.get('mcp')}.{r.get('tool')}**\n\n"
+                body = f"(실패: {r['error']})\n" if "error" in r else self.render_raw_data(r.get("result"))
+                parts.append(head + body)
+            return "\n".join(parts)
+        records = data.get("records") if isinstance(data, dict) else data
+        if isinstance(records, list) and records and all(isinstance(r, dict) for r in records):
+            rows = records[: self.raw_preview_rows]
+            cols = list(dict.fromkeys(k for r in rows for k in r))
+
+            def cell(v):
+                return str(v).replace("|", "\\|").replace("\n", " ")
+
+            lines = ["| " + " | ".join(cols) + " |", "|" + "---|" * len(cols)]
+            lines += ["| " + " | ".join(cell(r.get(c, "")) for c in cols) + " |" for r in rows]
+            if len(records) > len(rows):
+                lines.append(f"\n(총 {len(records)}건 중 {len(rows)}건 표시)")
+            return "\n".join(lines) + "\n"
+        try:
+            text = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, indent=2)
+        except Exception:
+            text = str(data)
+        return f"```json\n{text[:4000]}\n```\n"
+
     # ---------------- IO helpers ----------------
     def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
         if not path.exists():
@@ -72,6 +321,15 @@ class MCPAgentBase:
         except Exception:
             return None
 
+    def _load_server_map(self) -> Dict[str, List[str]]:
+        """mcp_servers.json: {서버: "URL"} 또는 {서버: ["레플리카 URL", ...]} → {서버: [URL, ...]}"""
+        raw = self._read_json(self.tools_root / "mcp_servers.json") or {}
+        out: Dict[str, List[str]] = {}
+        for server, urls in raw.items():
+            urls = [urls] if isinstance(urls, str) else list(urls or [])
+            out[server] = [u.rstrip("/") for u in urls if isinstance(u, str) and u]
+        return out
+
     def _load_registry(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
         reg: Dict[str, Dict[str, Dict[str, Any]]] = {}
         if not self.tools_root.exists():
@@ -99,12 +357,29 @@ class MCPAgentBase:
                     "parameters": t.get("parameters", {}) or {},
                     "path": t.get("path", f"/tool/{name}"),
                     "method": (t.get("method") or "POST").upper(),
+                    # 멱등(조회) 도구만 실패 시 다른 레플리카로 재시도/헤징
+                    "idempotent": bool(t.get("idempotent", (t.get("method") or "POST").upper() == "GET")),
+                    # 레플리카마다 상태가 따로인 서버(manifest "replica_safe": false)는 첫 URL로만 호출
+                    "replica_safe": bool(manifest.get("replica_safe", True)),
                 }
         return reg
 
-    def list_tools_for_prompt(self) -> List[Dict[str, Any]]:
+    def pick_replicas(self, mcp: str) -> List[ServerHealth]:
+        urls = self.server_map.get(mcp, [])
+        # replica_safe가 아닌 서버: 레플리카끼리 결과가 다를 수 있으므로 분산/헤징/다른 레플리카로 재시도 없이 첫 URL만
+        if not all(t.get("replica_safe", True) for t in self.registry.get(mcp, {}).values()):
+            urls = urls[:1]
+        return pick_replicas(mcp, urls)
+
+    def unavailable_servers(self) -> List[str]:
+        """모든 레플리카의 회로가 열려 있어 지금은 호출하지 않는 서버 (open 시간이 지났으면 여기서 probe 시작)"""
+        return [s for s in self.registry if self.server_map.get(s) and not self.pick_replicas(s)]
+
+    def list_tools_for_prompt(self, exclude: Optional[set] = None) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
         for server, tools in self.registry.items():
+            if exclude and server in exclude:
+                continue
             for name, spec in tools.items():
                 out.append({
                     "mcp": server,
@@ -120,7 +395,28 @@ class MCPAgentBase:
             or (self.card.get("description") if isinstance(self.card, dict) else "")
             or "도구를 적절히 선택해 문제를 해결하는 전문가"
         )
-        tool_metadata = self.list_tools_for_prompt()
+        unavailable = self.unavailable_servers()
+        tool_metadata = self.list_tools_for_prompt(exclude=set(unavailable))
+        multi_call_format = ""
+        if self.max_plan_calls > 1:
+            multi_call_format = f"""
+   서로 독립적인 Tool 호출이 여러 개 필요하면(예: 카테고리 두 개, 배너 두 개 조회) 1)을 아래처럼 calls 목록으로 (최대 {self.max_plan_calls}개, 동시에 실행됨)
+   한 호출의 결과가 다른 호출의 인자로 필요하면 calls로 묶지 말고 첫 호출만 1) 형식으로 내세요.
+{{
+  "route": "TOOL",
+  "calls": [
+    {{"mcp": "<mcp 이름>", "tool_name": "<tool 이름>", "arguments": {{ <파라미터 키:값> }}}},
+    {{"mcp": "<mcp 이름>", "tool_name": "<tool 이름>", "arguments": {{ <파라미터 키:값> }}}}
+  ],
+  "reason": "왜 이 도구들을 선택했는지 간단한 근거"
+}}
+"""
+        unavailable_note = ""
+        if unavailable:
+            unavailable_note = (
+                f"\n현재 응답하지 않아 목록에서 제외된 MCP 서버: {', '.join(unavailable)}\n"
+                "요청에 이 서버의 도구가 필요하면 2) TOOL_INCOMPLETE 형식으로 답하고, reason에 해당 서비스가 일시적으로 응답하지 않는다고 적으세요.\n"
+            )
 
         prompt = f"""
 역할: {role_text}
@@ -129,7 +425,7 @@ class MCPAgentBase:
 
 아래는 사용 가능한 MCP 툴 목록입니다:
 {json.dumps(tool_metadata, indent=2, ensure_ascii=False)}
-
+{unavailable_note}
 당신의 임무는 사용자의 요청에 적절한 MCP Tool이 있는지 판단하고, 있다면 어떤 Tool이고 어떤 파라미터를 넘겨야 하는지를 결정하는 것입니다.
 선정/비선정의 이유(reason)를 1~2문장으로 함께 제공하세요.
 
@@ -147,7 +443,7 @@ class MCPAgentBase:
   "route": "TOOL",
   "reason": "왜 이 도구를 선택했는지 간단한 근거"
 }}
-
+{multi_call_format}
 2) 호출 불가 - Tool은 맞지만 필수 파라미터 부족
 {{
   "route": "TOOL_INCOMPLETE",
@@ -161,16 +457,29 @@ class MCPAgentBase:
 }}
 
 """.strip()
-        self.log("tool.prompt", role_text=role_text, user_input=user_input, tool_count=len(tool_metadata))
+        self.log("tool.prompt", role_text=role_text, user_input=user_input, tool_count=len(tool_metadata),
+                 unavailable_servers=unavailable)
         return prompt
 
     def ask_gpt_for_tool(self, user_input: str, *, prompt_override: Optional[str] = None) -> Dict[str, Any]:
+        self.cancel_token.raise_if_cancelled()
         prompt = prompt_override or self.build_tool_selection_prompt(user_input)
-        res = self.llm.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
+        # 시간 예산이 바닥났으면 도구 선택을 건너뜀 → 에이전트는 Direct 경로(예산 부족 안내)로
+        if self.deadline.expired:
+            self.log("tool.decision.deadline", stage="before_call")
+            return {"route": "DIRECT", "error": "deadline", "reason": "응답 시간 예산 초과"}
+        try:
+            res = llm_with_budget(self.llm, self.deadline).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+            )
+        except Exception:
+            if not self.deadline.expired:
+                raise
+            self.log("tool.decision.deadline", stage="timeout")
+            return {"route": "DIRECT", "error": "deadline", "reason": "응답 시간 예산 초과"}
+        self.cancel_token.raise_if_cancelled()   # 선택 중에 취소됐으면 결과를 쓰지 않음
         raw = (res.choices[0].message.content or "").strip()
         self.log("tool.decision.raw", raw=raw)
         try:
@@ -181,39 +490,278 @@ class MCPAgentBase:
         if "server" in data and "mcp" not in data:
             data["mcp"] = data.pop("server")
         if data.get("route") == "TOOL":
-            if not data.get("mcp") or not data.get("tool_name"):
+            calls = self._normalize_calls(data)
+            if not calls:
                 return {"route": "DIRECT", "error": "missing_keys", "raw": data}
-            data.setdefault("arguments", {})
+            if len(calls) > self.max_plan_calls:
+                self.log("tool.decision.calls_truncated", requested=len(calls), kept=self.max_plan_calls)
+                calls = calls[: self.max_plan_calls]
+            data["calls"] = calls
+            # 단일 호출 형식(mcp/tool_name/arguments)도 항상 채움 → 첫 호출 (단일 호출만 쓰는 에이전트용)
+            for k in ("mcp", "tool_name", "arguments"):
+                data.setdefault(k, calls[0][k])
         self.log("tool.decision.parsed", decision=data)
         return data
 
-    def call_mcp(self, mcp: str, tool_name: str, args: Dict[str, Any], *, stream: bool = True):
+    def _normalize_calls(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """결정 JSON → [{"mcp", "tool_name", "arguments"}] (키가 빠진 호출, 완전히 같은 호출은 제외)"""
+        raw = data.get("calls") if isinstance(data.get("calls"), list) else [data]
+        calls: List[Dict[str, Any]] = []
+        seen = set()
+        for c in raw:
+            if not isinstance(c, dict):
+                continue
+            mcp = c.get("mcp") or c.get("server")
+            if not mcp or not c.get("tool_name"):
+                self.log("tool.decision.call_dropped", call=c)
+                continue
+            call = {"mcp": mcp, "tool_name": c["tool_name"], "arguments": c.get("arguments") or {}}
+            key = json.dumps(call, sort_keys=True, ensure_ascii=False, default=str)
+            if key not in seen:
+                seen.add(key)
+                calls.append(call)
+        return calls
+
+    # ---------------- 도구 호출 계획 (여러 호출 동시 실행) ----------------
+    def plan_calls(self, decision: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ask_gpt_for_tool 결정 → 호출 목록"""
+        return decision.get("calls") or [{
+            "mcp": decision["mcp"], "tool_name": decision["tool_name"], "arguments": decision.get("arguments", {}),
+        }]
+
+    def validate_plan(self, calls: List[Dict[str, Any]], debug: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """호출마다 인자 검증 (결과는 call["validation"], 호출별로 따로 기록)"""
+        for i, c in enumerate(calls):
+            v = self.validate_args(c["mcp"], c["tool_name"], c["arguments"])
+            c["validation"] = v
+            self._log(debug, "tool.validation", call=i, mcp=c["mcp"], tool=c["tool_name"],
+                      ok=v["ok"], errors=v["errors"], warnings=v["warnings"])
+        if debug is not None:
+            ex = debug.setdefault("execution", {})
+            ex["validation"] = calls[0]["validation"] if len(calls) == 1 else [
+                {"mcp": c["mcp"], "tool": c["tool_name"], **c["validation"]} for c in calls
+            ]
+        return calls
+
+    def plan_target(self, calls: List[Dict[str, Any]]) -> Tuple[str, str, Any]:
+        """요약/로그에 쓸 (mcp, tool, args) 표기: 검증 통과한 호출 기준, 여러 개면 (중복 없이) 쉼표로 이음"""
+        valid = [c for c in calls if c.get("validation", {}).get("ok", True)]
+        if len(valid) == 1:
+            return valid[0]["mcp"], valid[0]["tool_name"], valid[0]["arguments"]
+        return (",".join(dict.fromkeys(c["mcp"] for c in valid)),
+                ",".join(dict.fromkeys(c["tool_name"] for c in valid)),
+                [c["arguments"] for c in valid])
+
+    def call_plan(self, calls: List[Dict[str, Any]], debug: Optional[Dict[str, Any]] = None):
+        """
+        검증을 통과한 호출들을 plan_max_workers개 스레드에서 동시에 실행 (벽시계 시간 = 가장 느린 호출).
+          - 1개면 그 결과를 그대로 반환 (기존 단일 호출과 같은 모양)
+          - 여러 개면 {"results": [{"mcp", "tool", "arguments", "result" | "error", "elapsed_ms"}]}
+            일부만 실패하면 실패한 호출은 error로 남기고 나머지로 진행, 전부 실패하면 첫 오류를 올림
+          - 검증을 통과한 호출이 하나도 없으면 ValueError
+        호출마다 mcp.call.start / mcp.call.ok / mcp.call.error를 따로 기록.
+        """
+        valid = [(i, c) for i, c in enumerate(calls) if c.get("validation", {}).get("ok", True)]
+        if not valid:
+            reasons = [e for c in calls for e in c.get("validation", {}).get("errors") or []]
+            raise ValueError(f"no valid MCP calls to run ({len(calls)} planned)"
+                             + (": " + "; ".join(reasons) if reasons else ""))
+        errors: List[BaseException] = []
+
+        def one(i: int, c: Dict[str, Any]) -> Dict[str, Any]:
+            out = {"mcp": c["mcp"], "tool": c["tool_name"], "arguments": c["arguments"]}
+            t0 = time.monotonic()
+            self._log(debug, "mcp.call.start", call=i, mcp=c["mcp"], tool=c["tool_name"], args=c["arguments"])
+            try:
+                out["result"] = self.call_mcp(c["mcp"], c["tool_name"], c["arguments"], stream=False)
+            except RunCancelled:
+                raise
+            except Exception as e:
+                errors.append(e)
+                out["error"] = f"{type(e).__name__}: {e}"
+                self._log(debug, "mcp.call.error", call=i, mcp=c["mcp"], tool=c["tool_name"], error=str(e))
+            else:
+                self._log(debug, "mcp.call.ok", call=i, mcp=c["mcp"], tool=c["tool_name"])
+            out["elapsed_ms"] = int((time.monotonic() - t0) * 1000)
+            return out
+
+        t0 = time.monotonic()
+        if len(valid) == 1:
+            results = [one(*valid[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(valid), self.plan_max_workers),
+                                    thread_name_prefix="mcp-plan") as pool:
+                futures = [pool.submit(one, i, c) for i, c in valid]
+                results = [f.result() for f in futures]
+        wall_ms = int((time.monotonic() - t0) * 1000)
+
+        if debug is not None:
+            debug.setdefault("execution", {})["calls"] = {
+                "wall_ms": wall_ms,
+                "calls": [{k: v for k, v in r.items() if k != "result"} for r in results],
+            }
+        self.log("mcp.plan.done", calls=len(results), failed=len(errors), wall_ms=wall_ms)
+        if len(errors) == len(results):
+            raise errors[0]
+        if len(calls) == 1:
+            return results[0]["result"]
+
+        skipped = [{"mcp": c["mcp"], "tool": c["tool_name"], "arguments": c["arguments"],
+                    "error": "validation_failed: " + "; ".join(c["validation"]["errors"])}
+                   for c in calls if not c.get("validation", {}).get("ok", True)]
+        return {"results": results + skipped}
+
+    def call_mcp(self, mcp: str, tool_name: str, args: Dict[str, Any], *, stream: bool = True,
+                 max_rows: Optional[int] = None):
         if mcp not in self.registry or tool_name not in self.registry[mcp]:
             raise RuntimeError(f"Unregistered tool: {mcp}.{tool_name}")
-        if mcp not in self.server_map:
+        if not self.server_map.get(mcp):
             raise RuntimeError(f"Unknown server host: {mcp}")
 
         spec = self.registry[mcp][tool_name]
-        base = self.server_map[mcp].rstrip("/")
-        url = f"{base}{spec['path']}"
+        self.cancel_token.raise_if_cancelled()
+        if self.deadline.expired:
+            raise TimeoutError(f"deadline exceeded before calling {mcp}.{tool_name}")
+        # 회로가 열린 레플리카는 빼고 부하 분산 순서로 정렬 → 전부 열려 있으면 연결을 기다리지 않고 바로 실패
+        replicas = self.pick_replicas(mcp)
+        if not replicas:
+            self.log("mcp.call.circuit_open", mcp=mcp, tool=tool_name)
+            raise CircuitOpenError(f"MCP server '{mcp}' is temporarily unavailable (circuit open)")
+
+        # 비스트리밍 멱등 호출 + 레플리카 2개 이상: 실패하면 다른 레플리카로, 느리면 헤징
+        if not stream and spec["idempotent"] and len(replicas) > 1:
+            return self._call_hedged(mcp, tool_name, replicas, args, max_rows=max_rows)
+        return self._call_replica(mcp, tool_name, replicas[0], args, stream=stream, max_rows=max_rows,
+                                  cancel=self.cancel_token)
+
+    def _call_hedged(self, mcp: str, tool_name: str, replicas: List[ServerHealth], args: Dict[str, Any], *,
+                     max_rows: Optional[int] = None):
+        """
+        첫 레플리카로 호출하고, 최근 지연 분위수(hedge_delay_sec)를 넘기도록 응답이 없으면 다음 레플리카로 1회 더 보냄.
+        먼저 성공한 응답을 쓰고 나머지 시도는 바로 끊음. 시도가 실패하면 기다리지 않고 다음 레플리카로 넘어감.
+        """
+        delay = hedge_delay_sec(replicas)
+        backups = list(replicas[1:2])
+        results: "queue.Queue" = queue.Queue()
+        attempts: List[CancelToken] = []
+
+        def launch(health: ServerHealth, hedged: bool):
+            # 시도마다 취소 토큰을 따로 둠 (진 시도만 끊기), 실행 취소는 모든 시도로 전달
+            token = CancelToken()
+            unregister = self.cancel_token.register(token.cancel)
+            attempts.append(token)
+            if hedged:
+                self.log("mcp.call.hedge", mcp=mcp, tool=tool_name, replica=health.base_url,
+                         after_ms=int((time.monotonic() - t0) * 1000))
+
+            def work():
+                try:
+                    results.put((True, self._call_replica(mcp, tool_name, health, args, stream=False,
+                                                          max_rows=max_rows, cancel=token)))
+                except BaseException as e:
+                    results.put((False, e))
+                finally:
+                    unregister()
+            threading.Thread(target=work, name=f"mcp-{mcp}-{len(attempts)}", daemon=True).start()
+
+        t0 = time.monotonic()
+        launch(replicas[0], hedged=False)
+        pending, error = 1, None
+        while pending:
+            wait = None
+            if backups and delay is not None:
+                wait = max(0.0, delay - (time.monotonic() - t0))
+            try:
+                ok, value = results.get(timeout=wait)
+            except queue.Empty:
+                pending += 1
+                launch(backups.pop(0), hedged=True)
+                continue
+            pending -= 1
+            if ok:
+                for token in attempts:
+                    token.cancel()
+                return value
+            error = value
+            self.cancel_token.raise_if_cancelled()
+            client_error = isinstance(value, requests.HTTPError) and value.response is not None \
+                and value.response.status_code < 500   # 요청 자체가 잘못됨 → 다른 레플리카도 같음
+            if backups and not pending and not client_error and not self.deadline.expired:
+                self.log("mcp.call.failover", mcp=mcp, tool=tool_name, error=f"{type(value).__name__}: {value}")
+                pending += 1
+                launch(backups.pop(0), hedged=False)
+        raise error
+
+    def _call_replica(self, mcp: str, tool_name: str, health: ServerHealth, args: Dict[str, Any], *,
+                      stream: bool, max_rows: Optional[int], cancel: CancelToken):
+        spec = self.registry[mcp][tool_name]
+        url = f"{health.base_url}{spec['path']}"
         method = (spec["method"] or "POST").upper()
+        if not stream:
+            args = self._with_page_limit(mcp, tool_name, args, max_rows or self.mcp_max_rows)
 
         t0 = time.time()
         self.log("mcp.call.start", mcp=mcp, tool=tool_name, url=url, method=method, args=args, stream=stream)
 
-        if method == "GET":
-            res = requests.get(url, params=args or {}, stream=stream, timeout=None)
-        else:
-            res = requests.post(url, json=args or {}, stream=stream, timeout=None)
+        def record(ok: bool, error: Optional[BaseException] = None):
+            # 취소나 이번 요청의 시간 예산 소진으로 끊긴 호출은 서버 상태와 무관하므로 기록하지 않음
+            # (스트리밍 본문 읽기와 같은 기준, 4xx는 서버가 응답했으므로 성공으로 봄)
+            if not cancel.cancelled and not (error is not None and self.deadline.expired):
+                health.record(ok, (time.time() - t0) * 1000, None if error is None else f"{type(error).__name__}: {error}")
+
+        def server_fault(e: BaseException) -> bool:
+            return not isinstance(e, requests.HTTPError) or e.response is None or e.response.status_code >= 500
+
+        # 비스트리밍 호출은 NDJSON을 우선 요청 → 서버가 지원하면 줄 단위로 읽어 메모리 상한 유지
+        # (요청 자체는 항상 stream=True: 본문을 한 번에 내려받지 않기 위함)
+        headers = {} if stream else {"Accept": f"{NDJSON_MEDIA_TYPE}, application/json;q=0.9"}
+        health.begin()
+        try:
+            if method == "GET":
+                res = requests.get(url, params=args or {}, headers=headers, stream=True, timeout=self.deadline.timeout())
+            else:
+                res = requests.post(url, json=args or {}, headers=headers, stream=True, timeout=self.deadline.timeout())
+        except Exception as e:
+            health.end()
+            record(False, e)
+            raise
+        # 취소되거나 시간 예산이 끝나면 응답을 닫아 본문 읽기(블로킹)도 바로 풀리게 함
+        unregister = cancel.register(lambda: abort_response(res))
+        timer = self.deadline.arm(lambda: abort_response(res))
+        released = threading.Event()
+
+        def release():
+            if released.is_set():
+                return
+            released.set()
+            if timer is not None:
+                timer.cancel()
+            unregister()
+            res.close()
+            health.end()
 
         self.log("mcp.call.response.head",
                  status=res.status_code,
                  headers=dict(res.headers),
                  elapsed_ms=int((time.time() - t0) * 1000))
-        res.raise_for_status()
 
         if not stream:
-            data = res.json()
+            try:
+                res.raise_for_status()
+                if NDJSON_MEDIA_TYPE in res.headers.get("Content-Type", ""):
+                    data = self._read_ndjson(res, t0, max_rows=max_rows or self.mcp_max_rows)
+                    record(True)
+                    return data
+                data = res.json()
+            except Exception as e:
+                record(not server_fault(e), e)
+                cancel.raise_if_cancelled()   # 취소로 닫혀서 난 오류면 취소로 알림
+                if self.deadline.expired:
+                    raise TimeoutError(f"deadline exceeded while reading {mcp}.{tool_name}")
+                raise
+            finally:
+                release()
+            record(True)
             try:
                 preview = json.dumps(data, ensure_ascii=False)[:1000]
             except Exception:
@@ -221,17 +769,82 @@ class MCPAgentBase:
             self.log("mcp.call.response.body", size=len(preview), preview=preview)
             return data
 
+        try:
+            res.raise_for_status()
+        except Exception as e:
+            record(not server_fault(e), e)
+            release()
+            raise
+        record(True)   # 스트리밍은 응답 헤더까지의 지연을 서버 상태로 기록
+
         def gen() -> Iterator[str]:
             bytes_total = 0
-            for chunk in res.iter_content(chunk_size=None):
-                if chunk:
-                    bytes_total += len(chunk)
-                    yield chunk.decode(errors="ignore")
+            try:
+                for chunk in res.iter_content(chunk_size=None):
+                    if chunk:
+                        bytes_total += len(chunk)
+                        yield chunk.decode(errors="ignore")
+            except Exception:
+                if not cancel.cancelled and not self.deadline.expired:
+                    raise
+            finally:
+                # 끝까지 읽었든, 소비자가 중간에 close() 했든 연결 반납
+                release()
             self.log("mcp.call.stream.end",
                      bytes_total=bytes_total,
                      elapsed_ms=int((time.time() - t0) * 1000))
         return gen()
 
+    def _with_page_limit(self, mcp: str, tool_name: str, args: Dict[str, Any], max_rows: int) -> Dict[str, Any]:
+        """
+        커서 페이지네이션(limit + cursor)을 받는 도구인데 limit을 안 줬으면 limit=max_rows로 요청.
+        → 서버가 페이지를 끊고 진짜 next_cursor를 돌려주므로 다음 페이지를 이어서 조회할 수 있음
+          (_read_ndjson의 max_rows 절단은 서버가 limit을 무시할 때의 안전장치로만 남김)
+        limit만 있고 cursor가 없는 도구(예: 고객별 limit)는 의미가 달라서 건드리지 않음.
+        """
+        props = (self.get_tool_schema(mcp, tool_name) or {}).get("properties") or {}
+        if "limit" not in props or "cursor" not in props or (args or {}).get("limit") is not None:
+            return args
+        return {**(args or {}), "limit": max_rows}
+
+    def _read_ndjson(self, res: requests.Response, t0: float, *, max_rows: int) -> Dict[str, Any]:
+        """
+        NDJSON 응답을 줄 단위로 소비해 JSON 응답과 같은 모양의 dict로 반환.
+          - {"_meta": {...}} → 최상위 필드, {"_end": {...}} → count/next_cursor/message
+          - 나머지 줄은 records
+          - max_rows를 채우면 즉시 연결을 닫고 truncated=True 표시 (안전장치: 보통은 limit으로 서버가 페이지를 끊음)
+            이때 _end는 읽지 않으므로 next_cursor/서버 message는 없음 (_meta 필드는 그대로)
+        """
+        out: Dict[str, Any] = {}
+        records: List[Any] = []
+        truncated = False
+        try:
+            for line in res.iter_lines():
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if isinstance(obj, dict) and "_meta" in obj:
+                    out.update(obj["_meta"] or {})
+                elif isinstance(obj, dict) and "_end" in obj:
+                    out.update(obj["_end"] or {})
+                elif len(records) >= max_rows:
+                    truncated = True
+                    break
+                else:
+                    records.append(obj)
+        finally:
+            res.close()
+
+        out["records"] = records
+        if truncated:
+            out["truncated"] = True
+            out["message"] = f"결과가 많아 앞의 {max_rows}건만 가져왔습니다. (이어서 조회할 next_cursor 없음)"
+        self.log("mcp.call.response.ndjson",
+                 rows=len(records),
+                 truncated=truncated,
+                 elapsed_ms=int((time.time() - t0) * 1000))
+        return out
+
     def execute(self, user_input: str, debug: Optional[Dict[str, Any]] = None):
         raise NotImplementedError
 
@@ -309,6 +922,10 @@ class MCPAgentBase:
             pass
 
     def _incomplete_stream(self, user_input: str, reason: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        # 회로가 열린 서버: LLM 사과문을 만들며 기다리게 하지 않고 고정 안내로 바로 응답
+        if isinstance(reason, CircuitOpenError):
+            yield CIRCUIT_OPEN_MESSAGE
+            return
 
         user_prompt = (
             "실패 이유를 토대로 사용자에게 양해를 구해줘.\n"
@@ -320,7 +937,4 @@ class MCPAgentBase:
         messages = [
             {"role": "user", "content": user_prompt},
         ]
-        resp = self.llm.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
-        for ch in resp:
-            if getattr(ch.choices[0].delta, "content", None):
-                yield ch.choices[0].delta.content
\ No newline at end of file
+        yield from self._llm_stream(messages)
\ No newline at end of file
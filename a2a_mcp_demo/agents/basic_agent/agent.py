@@ -46,15 +46,8 @@ class Agent(MCPAgentBase):
         # LLM 호출(스트리밍)
         try:
             self._log(debug, "llm.call.start", model="gpt-4o", stream=True)
-            resp = self.llm.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                stream=True,
-            )
-            for chunk in resp:
-                if getattr(chunk.choices[0].delta, "content", None):
-                    yield chunk.choices[0].delta.content
-            self._log(debug, "llm.call.end", status="ok")
+            yield from self._llm_stream(messages)
+            self._log(debug, "llm.call.end", status="cancelled" if self.cancel_token.cancelled else "ok")
         except Exception as ex:
             self._log(debug, "llm.call.error", error=str(ex))
             yield "[응답 생성 중 오류가 발생했습니다. 잠시 뒤 다시 시도해주세요.]\n"
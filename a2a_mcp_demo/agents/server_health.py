@@ -0,0 +1,220 @@
+# server_health.py
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+# MCP 서버(레플리카)별 상태 추적 + 서킷 브레이커 + 로드 밸런싱
+#   - 에이전트는 실행마다 새로 만들어지므로 상태는 프로세스 전역(모듈)에 둠 → 모든 세션/에이전트가 공유
+#   - 상태는 레플리카(base URL) 단위: 레플리카 하나가 죽어도 나머지로 계속 호출, 전부 열려야 서버를 제외
+#   - 최근 BREAKER_WINDOW_SEC 동안의 호출 결과/지연으로 에러율, p50/p95 지연 집계
+#   - 연속 실패 BREAKER_FAILURES회, 또는 (BREAKER_MIN_CALLS회 이상 중) 에러율 BREAKER_ERROR_RATE 이상이면 open
+#     → open 동안은 연결을 시도하지 않고 바로 실패(CircuitOpenError), 도구 선택 프롬프트에서도 제외
+#   - open 시간이 지나면 half-open: 백그라운드에서 GET /tools 로 1회 probe (사용자 요청은 기다리지 않음)
+#     → 성공하면 closed, 실패하면 다시 open (연속으로 열릴수록 open 시간 2배씩, 최대 8배)
+BREAKER_FAILURES = int(os.getenv("MCP_BREAKER_FAILURES", 3))
+BREAKER_ERROR_RATE = float(os.getenv("MCP_BREAKER_ERROR_RATE", 0.5))
+BREAKER_MIN_CALLS = int(os.getenv("MCP_BREAKER_MIN_CALLS", 5))
+BREAKER_WINDOW_SEC = float(os.getenv("MCP_BREAKER_WINDOW_SEC", 60))
+BREAKER_OPEN_SEC = float(os.getenv("MCP_BREAKER_OPEN_SEC", 30))
+BREAKER_PROBE_TIMEOUT_SEC = float(os.getenv("MCP_BREAKER_PROBE_TIMEOUT_SEC", 2))
+
+# 레플리카 선택: least_outstanding(진행 중 요청 수 → 지연 EWMA 순) | latency(지연·진행 중 요청 수 기반 가중 랜덤)
+LB_POLICY = os.getenv("MCP_LB_POLICY", "least_outstanding")
+LATENCY_EWMA_ALPHA = 0.3
+# 헤징: 멱등 호출이 최근 지연의 HEDGE_PERCENTILE 분위수를 넘기면 다른 레플리카로 1회 더 보냄 (0이면 끔)
+#   표본이 HEDGE_MIN_SAMPLES개 미만이면 헤징하지 않음 (실패 시 다른 레플리카로 넘기는 것만)
+HEDGE_PERCENTILE = float(os.getenv("MCP_HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.getenv("MCP_HEDGE_MIN_SAMPLES", 20))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """회로가 열린(비정상) MCP 서버 호출 → 연결을 시도하지 않고 바로 실패"""
+
+
+class ServerHealth:
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.probe_url = f"{self.base_url}/tools"
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.outstanding = 0                  # 진행 중인 요청 수
+        self.latency_ewma_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[float, bool, float]] = deque()   # (시각, 성공 여부, 지연 ms)
+        self._opened_at = 0.0
+        self._open_streak = 0
+
+    # ---- 호출 결과 기록 ----
+    def begin(self) -> None:
+        with self._lock:
+            self.outstanding += 1
+
+    def end(self) -> None:
+        with self._lock:
+            self.outstanding -= 1
+
+    def record(self, ok: bool, latency_ms: float, error: Optional[str] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._calls.append((now, ok, latency_ms))
+            self._prune(now)
+            if ok:
+                self.consecutive_failures = 0
+                prev = self.latency_ewma_ms
+                self.latency_ewma_ms = latency_ms if prev is None else prev + LATENCY_EWMA_ALPHA * (latency_ms - prev)
+                return
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == CLOSED and self._should_trip():
+                self._open(now)
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > BREAKER_WINDOW_SEC:
+            self._calls.popleft()
+
+    def _should_trip(self) -> bool:
+        if self.consecutive_failures >= BREAKER_FAILURES:
+            return True
+        if len(self._calls) < BREAKER_MIN_CALLS:
+            return False
+        errors = sum(1 for _, ok, _ in self._calls if not ok)
+        return errors / len(self._calls) >= BREAKER_ERROR_RATE
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._open_streak += 1
+
+    def _open_sec(self) -> float:
+        return BREAKER_OPEN_SEC * min(8, 2 ** (self._open_streak - 1))
+
+    # ---- 호출 가능 여부 ----
+    def available(self) -> bool:
+        """
+        호출해도 되는지 (closed일 때만 True).
+        open 시간이 지났으면 여기서 half-open으로 바꾸고 백그라운드 probe를 시작 (probe가 끝날 때까지는 False).
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN or time.monotonic() - self._opened_at < self._open_sec():
+                return False
+            self.state = HALF_OPEN
+        threading.Thread(target=self._probe, name=f"mcp-probe-{self.name}", daemon=True).start()
+        return False
+
+    def _probe(self) -> None:
+        error = None
+        try:
+            res = requests.get(self.probe_url, timeout=BREAKER_PROBE_TIMEOUT_SEC)
+            res.close()
+            if res.status_code >= 500:
+                error = f"probe HTTP {res.status_code}"
+        except Exception as e:
+            error = f"probe {type(e).__name__}: {e}"
+        with self._lock:
+            if error is None:
+                # 회복: 예전 실패 기록으로 바로 다시 열리지 않게 창도 비움
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self._open_streak = 0
+                self._calls.clear()
+            else:
+                self.last_error = error
+                self._open(time.monotonic())
+
+    def ok_latencies(self) -> List[float]:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            return [lat for _, ok, lat in self._calls if ok]
+
+    # ---- 디버그용 ----
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            calls = list(self._calls)
+            snap: Dict[str, Any] = {
+                "state": self.state,
+                "outstanding": self.outstanding,
+                "calls": len(calls),
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+            }
+            if self.state == OPEN:
+                snap["retry_in_sec"] = round(max(0.0, self._open_sec() - (now - self._opened_at)), 1)
+        if calls:
+            latencies = [lat for _, ok, lat in calls if ok]
+            snap["error_rate"] = round(sum(1 for _, ok, _ in calls if not ok) / len(calls), 3)
+            if latencies:
+                snap["latency_ewma_ms"] = round(self.latency_ewma_ms or 0.0, 1)
+                snap["p50_ms"] = round(float(np.percentile(latencies, 50)), 1)
+                snap["p95_ms"] = round(float(np.percentile(latencies, 95)), 1)
+        return snap
+
+
+_servers: Dict[Tuple[str, str], ServerHealth] = {}
+_servers_lock = threading.Lock()
+
+
+def server_health(name: str, base_url: str) -> ServerHealth:
+    """레플리카별 공유 ServerHealth (없으면 생성, probe는 GET {base_url}/tools)"""
+    key = (name, base_url.rstrip("/"))
+    with _servers_lock:
+        health = _servers.get(key)
+        if health is None:
+            health = _servers[key] = ServerHealth(name, base_url)
+        return health
+
+
+def pick_replicas(name: str, base_urls: List[str]) -> List[ServerHealth]:
+    """호출 가능한(회로 closed) 레플리카를 LB_POLICY 순서로 정렬 (첫 번째가 주 호출, 나머지는 헤징/실패 대비)"""
+    healths = [h for h in (server_health(name, u) for u in base_urls) if h.available()]
+    if len(healths) < 2:
+        return healths
+    known = [h.latency_ewma_ms for h in healths if h.latency_ewma_ms is not None]
+    # 아직 지연 기록이 없는 레플리카는 가장 빠른 것과 같다고 보고 트래픽을 받게 함
+    default_ms = min(known) if known else 1.0
+
+    def latency(h: ServerHealth) -> float:
+        return max(1.0, h.latency_ewma_ms if h.latency_ewma_ms is not None else default_ms)
+
+    if LB_POLICY == "latency":
+        weights = [1.0 / (latency(h) * (h.outstanding + 1)) for h in healths]
+        first = random.choices(range(len(healths)), weights=weights)[0]
+        rest = sorted((h for i, h in enumerate(healths) if i != first), key=lambda h: latency(h) * (h.outstanding + 1))
+        return [healths[first]] + rest
+    # 동률이면 무작위 → 유휴 상태에서도 첫 레플리카로만 몰리지 않게
+    random.shuffle(healths)
+    return sorted(healths, key=lambda h: (h.outstanding, latency(h)))
+
+
+def hedge_delay_sec(healths: List[ServerHealth]) -> Optional[float]:
+    """최근 성공 지연의 HEDGE_PERCENTILE 분위수 (헤징 끔/표본 부족이면 None)"""
+    if HEDGE_PERCENTILE <= 0:
+        return None
+    latencies = [lat for h in healths for lat in h.ok_latencies()]
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return None
+    return float(np.percentile(latencies, HEDGE_PERCENTILE)) / 1000
+
+
+def health_snapshot() -> Dict[str, Dict[str, Any]]:
+    """{서버 이름: {레플리카 URL: 상태}}"""
+    with _servers_lock:
+        servers = dict(_servers)
+    out: Dict[str, Dict[str, Any]] = {}
+    for (name, base_url), h in sorted(servers.items()):
+        out.setdefault(name, {})[base_url] = h.snapshot()
+    return out
@@ -14,6 +14,8 @@ class Agent(MCPAgentBase):
     init_system = (
         "너는 사용자 질의를 바탕으로 수신 거래(입금, 이체)를 도와주는 Agent야."
     )
+    # 이체는 확인 모달에서 한 건씩 실행하므로 여러 호출(calls) 계획은 받지 않음
+    max_plan_calls = 1
 
     def __init__(self, llm_client: OpenAI):
         super().__init__(llm_client, agent_dir=Path(__file__).parent)
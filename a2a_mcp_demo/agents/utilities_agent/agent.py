@@ -50,10 +50,7 @@ class Agent(MCPAgentBase):
             {"role": "system", "content": self.init_system},
             {"role": "user", "content": user_prompt},
         ]
-        resp = self.llm.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
-        for ch in resp:
-            if getattr(ch.choices[0].delta, "content", None):
-                yield ch.choices[0].delta.content
+        yield from self._llm_stream(messages)
         self._log(debug, "direct.end")
 
     # ---- 도구 성공: 범용 결과 요약 ----
@@ -85,10 +82,7 @@ class Agent(MCPAgentBase):
             {"role": "system", "content": sys},
             {"role": "user", "content": usr},
         ]
-        resp = self.llm.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
-        for ch in resp:
-            if getattr(ch.choices[0].delta, "content", None):
-                yield ch.choices[0].delta.content
+        yield from self._llm_stream(messages)
         self._log(debug, "summarize.end")
 
     # ---- 실행 엔트리포인트 ----
@@ -111,25 +105,20 @@ class Agent(MCPAgentBase):
             debug["execution"]["decision"] = decision
 
             if decision.get("route") == "TOOL":
-                mcp = decision["mcp"]
-                tool = decision["tool_name"]
-                args = decision.get("arguments", {})
+                # 호출이 여러 개면(calls) 호출별로 검증하고, 통과한 호출들을 동시에 실행해 결과를 합침
+                calls = self.validate_plan(self.plan_calls(decision), debug=debug)
 
-                v = self.validate_args(mcp, tool, args)
-                debug["execution"]["validation"] = v
-                self._log(debug, "tool.validation", ok=v["ok"], errors=v["errors"], warnings=v["warnings"])
-
-                if v["ok"]:
+                if any(c["validation"]["ok"] for c in calls):
                     try:
-                        self._log(debug, "mcp.call.start", mcp=mcp, tool=tool, args=args)
-                        data = self.call_mcp(mcp, tool, args, stream=False)
-                        self._log(debug, "mcp.call.ok")  # 상세 데이터는 summarize 단계에서 preview만 기록
+                        data = self.call_plan(calls, debug=debug)  # 상세 데이터는 summarize 단계에서 preview만 기록
+                        mcp, tool, args = self.plan_target(calls)
 
                         debug["execution"]["plan"] = {"mode": "mcp", "mcp": mcp, "tool": tool}
                         self._log(debug, "plan", mode="mcp", mcp=mcp, tool=tool)
 
-                        yield from self._summarize_tool_execution(
-                            user_input, data, debug=debug, mcp=mcp, tool=tool, args=args
+                        yield from self.summarize_or_raw(
+                            self._summarize_tool_execution(user_input, data, debug=debug, mcp=mcp, tool=tool, args=args),
+                            data, debug=debug,
                         )
                         self._log(debug, "run.end", status="ok")
                         debug["log"] = debug.get("events", [])
@@ -144,8 +133,9 @@ class Agent(MCPAgentBase):
                     debug["execution"]["plan"] = {"mode": "direct", "reason": "validation_failed"}
                     self._log(debug, "plan", mode="direct", reason="validation_failed")
                     yield "[인자 검증 실패 → Direct로 전환]\n"
-                    for e in v["errors"]:
-                        yield f"- {e}\n"
+                    for c in calls:
+                        for e in c["validation"]["errors"]:
+                            yield f"- {e}\n"
             
             elif decision.get("route") == "TOOL_INCOMPLETE":
 
@@ -1,15 +1,19 @@
 # app.py
 import json
+import os
 from pathlib import Path
 import streamlit as st
 from openai import OpenAI
-from types import GeneratorType
 
 from a2a_client import A2AClient
 
 from components.banner import render_banner
+from components.chat_history import render_history, reset_history, spill_history
+from components.debug_panels import render_debug_panels
+from components.pipeline_worker import STAGE_LABELS, PipelineJob
 from components.susin_modal import open_susin_modal
 from components.signals import consume_signal
+from components.stream_render import render_stream
 
 st.set_page_config(page_title="A2A → Agent → MCP Demo", layout="wide")
 st.title("🤖 A2A → Agent → MCP 데모")
@@ -23,17 +27,28 @@ OPENAI_API_KEY = ""
 if not OPENAI_API_KEY:
     st.warning("OPENAI_API_KEY가 설정되지 않았습니다. app.py를 확인해주세요.")
 
+# 요청 1건의 전체 시간 예산(초): 라우팅/도구 선택/도구 호출/요약이 남은 시간 안에서만 실행 (0이면 제한 없음)
+REQUEST_BUDGET_SEC = float(os.getenv("A2A_REQUEST_BUDGET_SEC", 30)) or None
+
 # -------------------------------------
-# 세션 초기화
+# 프로세스 공유 리소스 (모든 브라우저 세션이 1개를 같이 씀)
+#   - OpenAI 클라이언트: 스레드 안전, 커넥션 풀 공유
+#   - A2AClient: 카드/폴백 에이전트 로딩은 1회, 실행별 상태는 run()의 debug dict에만 쌓임
+# 세션별 상태(session_state)는 대화 히스토리/배너/디버그 표시용 값만 보관
 # -------------------------------------
-if "llm" not in st.session_state:
-    st.session_state.llm = OpenAI(api_key=OPENAI_API_KEY)
+@st.cache_resource
+def get_llm() -> OpenAI:
+    return OpenAI(api_key=OPENAI_API_KEY)
 
-if "client" not in st.session_state:
-    st.session_state.client = A2AClient(agents_root="agents", llm_client=st.session_state.llm)
+@st.cache_resource
+def get_a2a_client() -> A2AClient:
+    return A2AClient(agents_root="agents", llm_client=get_llm())
 
-client: A2AClient = st.session_state.client
+client: A2AClient = get_a2a_client()
 
+# -------------------------------------
+# 세션 초기화
+# -------------------------------------
 if "messages" not in st.session_state:
     st.session_state.messages = [
         {"role": "assistant", "content": "안녕하세요! 무엇을 도와드릴까요?"}
@@ -111,6 +126,9 @@ with st.sidebar:
 # 대화 초기화 버튼
 if st.button("🗑 대화 초기화", key="reset_chat", type="primary"):
     st.session_state.messages = []
+    reset_history()
+    if "active_job" in st.session_state:
+        st.session_state.pop("active_job").cancel()   # 진행 중이던 응답 생성도 중지
     st.session_state.pop("debug_to_render", None)
     st.session_state.pop("last_debug", None)
     st.session_state.pop("last_agent_name", None)
@@ -120,7 +138,7 @@ if st.button("🗑 대화 초기화", key="reset_chat", type="primary"):
     st.rerun()
 
 # 히스토리 렌더링 (배너 타입 메시지면, chat_message 안에서 render_banner 호출)
-for m in st.session_state.messages:
+def render_message(m):
     with st.chat_message(m["role"]):
         if m.get("type") == "banner":
             # ✅ 이미 열린 chat_message 컨텍스트 안에서 배너 UI만 그린다
@@ -129,77 +147,86 @@ for m in st.session_state.messages:
         else:
             st.markdown(m.get("content", ""))
 
+# 긴 대화: 오래된 메시지는 로컬 저장소로 넘기고, 최근 메시지만 그림 ("이전 대화 더 보기"로 확장)
+spill_history()
+render_history(render_message)
+
 # -------------------------------------
-# 입력 & 실행
+# 입력 & 실행 (백그라운드 작업 + 진행 단계 표시 + 중지)
 # -------------------------------------
-user_input = st.chat_input("무엇을 도와드릴까요?")
-if user_input:
-    # 사용자 메시지 추가
-    st.session_state.messages.append({"role": "user", "content": user_input})
-    with st.chat_message("user"):
-        st.markdown(user_input)
+def render_job(job: PipelineJob):
+    """작업 진행을 그리고, 끝나면 결과를 히스토리/디버그에 반영 (다른 위젯으로 rerun 되면 처음부터 다시 붙어서 그림)"""
+    with st.chat_message("assistant"):
+        status = st.status(STAGE_LABELS[job.stage()], state="running")
+        cancel_slot = st.empty()
+        if not job.finished:
+            cancel_slot.button("⏹ 중지", key=f"cancel_{job.id}", on_click=job.cancel)
+        ph = st.empty()
+
+        def on_stage(stage):
+            status.update(label=STAGE_LABELS[stage])
+
+        full = render_stream(ph, job.follow(on_stage=on_stage))   # 50ms 간격으로 모아서 갱신
+        cancel_slot.empty()
+
+        if job.state == "error":
+            status.update(label=f"{STAGE_LABELS['error']}: {job.error}", state="error")
+            full = full or "[요청을 처리하는 중 오류가 발생했습니다. 잠시 뒤 다시 시도해주세요.]"
+        else:
+            status.update(label=STAGE_LABELS[job.state], state="complete")
+            if job.state == "cancelled":
+                full += "\n\n_(사용자가 응답을 중지했습니다)_"
+            elif not job.parts and job.result is not None and job.agent_name != "SusinAgent":
+                result = job.result
+                if isinstance(result, str):
+                    full = result
+                elif isinstance(result, (dict, list, tuple)):
+                    full = json.dumps(result, ensure_ascii=False, indent=2)
+                else:
+                    full = str(result)
+        ph.markdown(full)
 
-    # 실행 (A2A 라우팅 + Agent 실행)
-    resp = client.run(user_input, debug={})  # {"agent_name","result","debug"}
-    agent_name = resp.get("agent_name")
-    result = resp.get("result")
-    debug = resp.get("debug", {})
+    # 여기까지 오면 작업 종료 → 한 번만 반영되도록 먼저 제거
+    st.session_state.pop("active_job", None)
+    agent_name = job.agent_name
 
     # 🧭 라우팅 캡션
-    st.caption(f"🧭 라우팅된 Agent: **{agent_name}**")
+    if agent_name:
+        st.caption(f"🧭 라우팅된 Agent: **{agent_name}**")
 
     # ✅ 모달 rerun 전에 세션 저장 (SusinAgent 클릭 직후에도 보여주기 위함)
     st.session_state["last_agent_name"] = agent_name
-    st.session_state["debug_to_render"] = debug        # 1회 렌더용
-    st.session_state["last_debug"] = debug             # 모달 클릭 직후 보이게 하는 백업
+    st.session_state["debug_to_render"] = job.debug    # 1회 렌더용
+    st.session_state["last_debug"] = job.debug         # 모달 클릭 직후 보이게 하는 백업
+    st.session_state.pop("run_log_page", None)         # 새 실행 로그는 1페이지부터
+
+    # SusinAgent면: 모달만 열고, 결과를 채팅 히스토리에 남기지 않음
+    if agent_name == "SusinAgent":
+        if job.state == "done" and isinstance(job.result, dict) and "tool_name" in job.result:
+            open_susin_modal(job.result)  # 내부에서 emit_signal → st.rerun()
+    else:
+        st.session_state.messages.append({"role": "assistant", "content": full})
 
-    # SusinAgent면: 모달만 열고, 이 자리에서는 결과를 채팅에 출력하지 않음
-    handled_by_modal = (agent_name == "SusinAgent")
-    
-    if handled_by_modal:
-        if isinstance(result, dict) and "tool_name" in result:
-            open_susin_modal(result)  # 내부에서 emit_signal → st.rerun()
 
-        else:
-            reason = result['reason']
-            result = client._direct_stream(user_input, reason)
+# 이전 rerun에서 진행 중이던 작업(중지 버튼/다른 위젯 조작으로 끊긴 경우)에 다시 붙음
+if "active_job" in st.session_state:
+    render_job(st.session_state.active_job)
 
-            ph = st.empty()
-            full = ""
-            for tok in result:
-                full += tok
-                ph.markdown(full)
-
-    else:
-        # 일반 Agent: 기존처럼 결과 렌더
-        with st.chat_message("assistant"):
-            ph = st.empty()
-            full = ""
-
-            # 스트리밍 여부 판단
-            is_stream = isinstance(result, GeneratorType) or (
-                hasattr(result, "__iter__") and not isinstance(result, (str, bytes, dict, list, tuple))
-            )
-
-            if is_stream:
-                for tok in result:
-                    full += tok
-                    ph.markdown(full)
-            else:
-                if isinstance(result, str):
-                    full = result
-                elif isinstance(result, (dict, list, tuple)):
-                    full = json.dumps(result, ensure_ascii=False, indent=2)
-                else:
-                    full = str(result)
-                ph.markdown(full)
+user_input = st.chat_input("무엇을 도와드릴까요?")
+if user_input:
+    # 사용자 메시지 추가
+    st.session_state.messages.append({"role": "user", "content": user_input})
+    with st.chat_message("user"):
+        st.markdown(user_input)
 
-        st.session_state.messages.append({"role": "assistant", "content": full})
+    # 실행 (A2A 라우팅 + Agent 실행)은 백그라운드 스레드에서, 화면은 진행 단계부터 바로 표시
+    st.session_state.active_job = PipelineJob(client, user_input, budget_sec=REQUEST_BUDGET_SEC).start()
+    render_job(st.session_state.active_job)
 
 # -------------------------------------
 # 🛠️ 디버그 + 🧾 로그 (채팅 '아래'에서 렌더)
 # -------------------------------------
-# 모달 신호 직후엔 pop을 보류해서(또는 last_debug로) 한 번 더 보여줌
+# 모달 신호 직후나 디버그 패널 조작(토글/페이지) 직후엔 pop을 보류해서(또는 last_debug로) 한 번 더 보여줌
 _suspend = st.session_state.pop("_suspend_debug_pop", False)
 
 if _suspend:
@@ -210,51 +237,5 @@ else:
     _debug = st.session_state.pop("debug_to_render", None)
 
 if _debug:
-    
-    ex = _debug.get("execution", {})
-
-    with st.expander("🛠️ Agent 실행 디버그 (툴 선택/Direct)", expanded=False):
-        
-        if "prompt" in _debug:  # A2A → LLM 라우팅 프롬프트
-            st.markdown("**라우팅 프롬프트 (A2A → LLM)**")
-            st.code(_debug["prompt"], language="markdown")
-
-        if "decision" in _debug:
-            st.markdown("**라우팅 결과 (LLM JSON)**")
-            st.code(json.dumps(_debug["decision"], ensure_ascii=False, indent=2), language="json")
-
-        if "tool_selection_prompt" in ex:
-            st.markdown("**Tool 선택 프롬프트**")
-            st.code(ex["tool_selection_prompt"], language="markdown")
-
-        if "decision" in ex: # agent
-            dec = ex["decision"]
-            st.markdown("**Tool 선택 결과 (LLM JSON)**")
-            st.code(json.dumps(dec, ensure_ascii=False, indent=2), language="json")
-
-        if "validation" in ex:
-            st.markdown("**인자 검증 결과 (JSON Schema)**")
-            st.code(json.dumps(ex["validation"], ensure_ascii=False, indent=2), language="json")
-
-        if "direct" in ex and "prompt" in ex["direct"]:
-            st.markdown("**Direct 프롬프트 (미리보기)**")
-            st.code(ex["direct"]["prompt"], language="markdown")
-            
-        plan = ex.get("plan")
-        if plan:
-            st.markdown("**실행 전략(plan)**")
-            st.code(json.dumps(plan, ensure_ascii=False, indent=2), language="json")
-
-
-    with st.expander("🧾 실행 로그 (모든 이벤트)", expanded=False):
-        run_log = _debug.get("log", [])
-        if run_log:
-            st.code(json.dumps(run_log, ensure_ascii=False, indent=2), language="json")
-            st.download_button(
-                label="로그 JSON 다운로드",
-                data=json.dumps(run_log, ensure_ascii=False, indent=2),
-                file_name="agent_run_log.json",
-                mime="application/json",
-            )
-        else:
-            st.info("현재 실행에서 수집된 로그가 없습니다.")
\ No newline at end of file
+    # 토글을 켠 패널만 직렬화/렌더링 (접혀 있으면 비용 없음)
+    render_debug_panels(_debug)
@@ -0,0 +1,122 @@
+# bench_replicas.py
+# MCP 레플리카 부하 분산/헤징 벤치마크: call_mcp 지연 p50/p99 비교
+#   - single      : 레플리카 1개 (기존 mcp_servers.json 구성)
+#   - balanced    : 레플리카 N개, least_outstanding 분산 (헤징 없음)
+#   - hedged      : 레플리카 N개 + 멱등 호출 헤징 (최근 지연 p95를 넘기면 다른 레플리카로 1회 더)
+#   - dead replica: 레플리카 하나가 꺼져 있을 때 (실패 시 다른 레플리카로, 3회 실패 후 회로 open)
+# 실제 transaction 서버 대신 같은 프로세스의 가짜 레플리카(HTTP)를 띄우며, LLM 호출은 하지 않음
+#
+# 실행 예:
+#   python bench_replicas.py --calls 400 --replicas 3 --concurrency 4 --stall-rate 0.03 --stall-ms 400
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from openai import OpenAI
+
+import agents.server_health as server_health
+from agents.transaction_agent.agent import Agent
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=400)
+    ap.add_argument("--replicas", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=4, help="동시에 call_mcp를 부르는 스레드 수")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="레플리카의 기본 응답 지연")
+    ap.add_argument("--stall-rate", type=float, default=0.03, help="응답이 stall-ms만큼 늦어지는 비율 (꼬리 지연)")
+    ap.add_argument("--stall-ms", type=float, default=400.0)
+    return ap.parse_args()
+
+
+def start_replica(args, served: Counter):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            served[self.server.server_port] += 1
+            delay = args.latency_ms * random.uniform(0.8, 1.2)
+            if random.random() < args.stall_rate:
+                delay += args.stall_ms
+            time.sleep(delay / 1000)
+            body = json.dumps({"records": [{"amount": i} for i in range(20)]}).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass   # 헤징에서 진 시도는 클라이언트가 먼저 끊음
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{srv.server_port}"
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def run(label: str, agent: Agent, urls, n: int, concurrency: int, hedge_percentile: float, served: Counter):
+    server_health._servers.clear()      # 모드마다 상태(지연 기록/회로) 초기화
+    server_health.HEDGE_PERCENTILE = hedge_percentile
+    agent.server_map["transaction"] = urls
+    agent.reset_run_log()
+
+    def call(_):
+        t0 = time.perf_counter()
+        try:
+            agent.call_mcp("transaction", "transactions", {"name": "홍길동"}, stream=False)
+            ok = True
+        except Exception:
+            ok = False
+        return (time.perf_counter() - t0) * 1000, ok
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(server_health.HEDGE_MIN_SAMPLES)))   # 헤징 지연 계산용 표본
+        served.clear()
+        agent.reset_run_log()
+        results = list(pool.map(call, range(n)))
+
+    lat = np.asarray([ms for ms, _ in results])
+    ok = sum(1 for _, good in results if good)
+    hedges = sum(1 for r in agent.run_log if r["event"] == "mcp.call.hedge")
+    failovers = sum(1 for r in agent.run_log if r["event"] == "mcp.call.failover")
+    spread = "/".join(str(served[int(u.rsplit(":", 1)[1])]) for u in urls)
+    print(f"{label:<26}: p50 {np.percentile(lat, 50):7.1f} ms  p99 {np.percentile(lat, 99):7.1f} ms  "
+          f"max {lat.max():7.1f} ms  ok {ok}/{n}  hedges {hedges}  failovers {failovers}  per-replica {spread}")
+
+
+def main():
+    args = parse_args()
+    served: Counter = Counter()
+    urls = [start_replica(args, served) for _ in range(args.replicas)]
+    agent = Agent(OpenAI(api_key="bench"))   # LLM은 쓰지 않음
+
+    print(f"calls={args.calls} replicas={args.replicas} concurrency={args.concurrency} "
+          f"latency={args.latency_ms}ms stall={args.stall_rate:.0%}x{args.stall_ms}ms")
+    run("single (before)", agent, urls[:1], args.calls, args.concurrency, 0, served)
+    run("balanced", agent, urls, args.calls, args.concurrency, 0, served)
+    run("balanced + hedged (p95)", agent, urls, args.calls, args.concurrency, 95, served)
+    run("hedged + 1 dead replica", agent, urls + [closed_port_url()], args.calls, args.concurrency, 95, served)
+    states = {url: h["state"] for url, h in server_health.health_snapshot()["transaction"].items()}
+    print("circuit states:", states)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench_session.py
+# Streamlit 세션 시작 비용 측정: 세션마다 OpenAI + A2AClient 생성(기존) vs 프로세스 공유(st.cache_resource)
+#   - 세션 시작 지연 p50/p99 (app.py 상단의 초기화 구간만)
+#   - 동시 세션 N개를 유지할 때 세션당 메모리 (tracemalloc), 세션당 HTTP 커넥션 풀 수
+# streamlit 없이 같은 초기화 코드를 흉내내며, 실제 API 호출은 하지 않음
+#
+# 실행 예:
+#   python bench_session.py --sessions 50
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+from openai import OpenAI
+
+from a2a_client import A2AClient
+
+API_KEY = "bench"   # 클라이언트 생성만 하므로 실제 키 불필요
+
+
+def new_session_state() -> dict:
+    # 세션별로 남는 상태 (app.py의 session_state 초기화와 같은 모양)
+    return {
+        "messages": [{"role": "assistant", "content": "안녕하세요! 무엇을 도와드릴까요?"}],
+        "banner_ctx": {},
+        "banner_seq": 0,
+    }
+
+
+def start_per_session(_shared) -> dict:
+    state = new_session_state()
+    state["llm"] = OpenAI(api_key=API_KEY)
+    state["client"] = A2AClient(agents_root="agents", llm_client=state["llm"])
+    return state
+
+
+def start_shared(shared) -> dict:
+    state = new_session_state()
+    state["client"] = shared   # cache_resource가 돌려주는 같은 객체를 참조만 함
+    return state
+
+
+def measure(label: str, start, n: int, shared=None):
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    sessions, lat = [], []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        sessions.append(start(shared))
+        lat.append((time.perf_counter() - t0) * 1000)
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pools = len({id(s["client"].llm._client) for s in sessions})
+    print(f"{label:<24}: start p50 {np.percentile(lat, 50):8.2f} ms  p99 {np.percentile(lat, 99):8.2f} ms  "
+          f"memory/session {(held - base) / n / 1024:8.1f} KiB  connection pools {pools}")
+    return sessions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=50, help="동시에 유지할 세션 수")
+    args = ap.parse_args()
+
+    # 프로세스 공유: 첫 세션이 1회 생성 비용을 냄
+    t0 = time.perf_counter()
+    shared = A2AClient(agents_root="agents", llm_client=OpenAI(api_key=API_KEY))
+    print(f"sessions={args.sessions}  shared resources built once in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    per_session = measure("per-session (before)", start_per_session, args.sessions)
+    del per_session
+    measure("shared (cache_resource)", start_shared, args.sessions, shared)
+
+
+if __name__ == "__main__":
+    main()
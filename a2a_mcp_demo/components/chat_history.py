@@ -0,0 +1,112 @@
+# chat_history.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import streamlit as st
+
+# 매 rerun마다 전체 히스토리를 다시 그리면 대화가 길수록 느려짐
+#   - 최근 HISTORY_WINDOW개만 그리고, "이전 대화 더 보기"로 HISTORY_PAGE개씩 늘림
+#   - 세션 메모리에는 최근 HISTORY_MAX_IN_MEMORY개만 두고, 넘친 오래된 메시지는 로컬 SQLite로 이동
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", 30))
+HISTORY_PAGE = int(os.getenv("CHAT_HISTORY_PAGE", 30))
+HISTORY_MAX_IN_MEMORY = int(os.getenv("CHAT_HISTORY_MAX_IN_MEMORY", 100))
+HISTORY_STORE_PATH = os.getenv(
+    "CHAT_HISTORY_STORE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_history.db")
+)
+
+
+class HistoryStore:
+    """세션별로 넘친(오래된) 메시지를 보관. 세션 안에서 seq는 0부터 시간순."""
+
+    def __init__(self, path: str = HISTORY_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spilled ("
+            " session_id TEXT NOT NULL, seq INTEGER NOT NULL, message TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (session_id, seq))"
+        )
+
+    def append(self, session_id: str, start_seq: int, messages: List[Dict]) -> None:
+        now = time.time()
+        rows = [(session_id, start_seq + i, json.dumps(m, ensure_ascii=False), now) for i, m in enumerate(messages)]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO spilled VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def load(self, session_id: str, start_seq: int, end_seq: int) -> List[Dict]:
+        """seq가 [start_seq, end_seq) 인 메시지 (시간순)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT message FROM spilled WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start_seq, end_seq),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM spilled WHERE session_id = ?", (session_id,))
+
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    return HistoryStore()
+
+
+def _state() -> Dict:
+    ss = st.session_state
+    if "history_session_id" not in ss:
+        ss.history_session_id = uuid.uuid4().hex
+        ss.history_spilled = 0          # 저장소로 옮긴 메시지 수 (= 메모리 첫 메시지의 seq)
+        ss.history_window = HISTORY_WINDOW
+    return ss
+
+
+def spill_history() -> None:
+    """session_state.messages가 상한을 넘으면 오래된 쪽을 저장소로 옮김 (렌더링 전에 1회 호출)"""
+    ss = _state()
+    overflow = len(ss.messages) - HISTORY_MAX_IN_MEMORY
+    if overflow <= 0:
+        return
+    get_history_store().append(ss.history_session_id, ss.history_spilled, ss.messages[:overflow])
+    del ss.messages[:overflow]
+    ss.history_spilled += overflow
+
+
+def reset_history() -> None:
+    """대화 초기화: 저장소에 옮긴 메시지까지 삭제"""
+    ss = _state()
+    get_history_store().clear(ss.history_session_id)
+    ss.history_spilled = 0
+    ss.history_window = HISTORY_WINDOW
+
+
+def render_history(render_message: Callable[[Dict], None]) -> None:
+    """최근 history_window개만 그림. 더 이전 메시지가 있으면 '이전 대화 더 보기' 버튼 표시."""
+    ss = _state()
+    in_memory = ss.messages
+    total = ss.history_spilled + len(in_memory)
+    window = min(ss.history_window, total)
+    hidden = total - window
+
+    if hidden > 0 and st.button(f"⬆ 이전 대화 더 보기 ({hidden}개)", key="history_load_earlier"):
+        ss.history_window += HISTORY_PAGE
+        st.rerun()
+
+    start = total - window   # 전체 seq 기준 시작 위치
+    if start < ss.history_spilled:
+        # 창이 메모리 범위를 넘어가면 앞부분은 저장소에서 읽음
+        for m in get_history_store().load(ss.history_session_id, start, ss.history_spilled):
+            render_message(m)
+        start = ss.history_spilled
+    for m in in_memory[start - ss.history_spilled:]:
+        render_message(m)
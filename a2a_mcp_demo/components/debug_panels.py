@@ -0,0 +1,100 @@
+# debug_panels.py
+import json
+import math
+
+import streamlit as st
+
+from agents.server_health import health_snapshot
+
+# 접힌 expander 안의 코드도 매 rerun마다 실행되므로, 큰 툴 결과가 담긴 디버그/로그를
+# json.dumps(indent=2) 하는 게 rerun에서 가장 느린 구간이었음
+# → 토글을 켰을 때만 직렬화/렌더링, 실행 로그는 페이지 단위로만 직렬화
+LOG_PAGE_SIZE = 20
+
+
+def _keep_debug():
+    # 토글/페이지 이동으로 생긴 rerun에서도 같은 디버그를 계속 보여줌 (app.py의 1회 표시 pop 보류)
+    st.session_state["_suspend_debug_pop"] = True
+
+
+def _json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=str)
+
+
+def _render_debug(debug: dict):
+    ex = debug.get("execution", {})
+
+    if "prompt" in debug:  # A2A → LLM 라우팅 프롬프트
+        st.markdown("**라우팅 프롬프트 (A2A → LLM)**")
+        st.code(debug["prompt"], language="markdown")
+
+    if "decision" in debug:
+        st.markdown("**라우팅 결과 (LLM JSON)**")
+        st.code(_json(debug["decision"]), language="json")
+
+    if "tool_selection_prompt" in ex:
+        st.markdown("**Tool 선택 프롬프트**")
+        st.code(ex["tool_selection_prompt"], language="markdown")
+
+    if "decision" in ex:  # agent
+        st.markdown("**Tool 선택 결과 (LLM JSON)**")
+        st.code(_json(ex["decision"]), language="json")
+
+    if "validation" in ex:
+        st.markdown("**인자 검증 결과 (JSON Schema)**")
+        st.code(_json(ex["validation"]), language="json")
+
+    if "calls" in ex:  # 도구 호출별 결과/소요 시간 (여러 개면 동시 실행)
+        st.markdown("**Tool 호출 (호출별 결과/소요 시간)**")
+        st.code(_json(ex["calls"]), language="json")
+
+    if "direct" in ex and "prompt" in ex["direct"]:
+        st.markdown("**Direct 프롬프트 (미리보기)**")
+        st.code(ex["direct"]["prompt"], language="markdown")
+
+    plan = ex.get("plan")
+    if plan:
+        st.markdown("**실행 전략(plan)**")
+        st.code(_json(plan), language="json")
+
+    health = health_snapshot()   # 프로세스 공유 상태 (현재 시점)
+    if health:
+        st.markdown("**MCP 서버 상태 (서킷 브레이커)**")
+        st.code(_json(health), language="json")
+
+
+def _render_run_log(run_log: list):
+    if not run_log:
+        st.info("현재 실행에서 수집된 로그가 없습니다.")
+        return
+
+    pages = max(1, math.ceil(len(run_log) / LOG_PAGE_SIZE))
+    page = st.number_input(
+        f"페이지 (총 {len(run_log)}개 이벤트, {pages}페이지)",
+        min_value=1, max_value=pages, value=1, step=1,
+        key="run_log_page", on_change=_keep_debug,
+    )
+    start = (int(page) - 1) * LOG_PAGE_SIZE
+    st.code(_json(run_log[start:start + LOG_PAGE_SIZE]), language="json")
+
+    # 전체 로그 직렬화는 다운로드를 요청했을 때만
+    if st.button("로그 JSON 준비", key="run_log_prepare", on_click=_keep_debug):
+        st.download_button(
+            label="로그 JSON 다운로드",
+            data=_json(run_log),
+            file_name="agent_run_log.json",
+            mime="application/json",
+            on_click=_keep_debug,
+        )
+
+
+def render_debug_panels(debug: dict):
+    """🛠️ 디버그 / 🧾 실행 로그: 토글을 켠 패널만 직렬화해서 그림"""
+    if st.toggle("🛠️ Agent 실행 디버그 (툴 선택/Direct)", key="show_debug_panel", on_change=_keep_debug):
+        with st.container(border=True):
+            _render_debug(debug)
+
+    run_log = debug.get("log", [])
+    if st.toggle(f"🧾 실행 로그 (모든 이벤트 {len(run_log)}개)", key="show_run_log", on_change=_keep_debug):
+        with st.container(border=True):
+            _render_run_log(run_log)
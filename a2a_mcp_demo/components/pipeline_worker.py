@@ -0,0 +1,146 @@
+# pipeline_worker.py
+import threading
+import uuid
+from types import GeneratorType
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from agents.agent_base import CancelToken, Deadline, RunCancelled
+
+# 라우팅 → 도구 선택/호출 → 요약까지를 Streamlit 스크립트 스레드가 아닌 백그라운드 스레드에서 실행
+#   - UI는 job.follow()로 진행 단계와 토큰을 받아 그림 (첫 토큰 전에도 단계 표시)
+#   - job.cancel() → 취소 토큰이 열린 LLM/HTTP 스트림을 바로 닫고, 생성기도 close() 해서 정리
+#   - job은 session_state에 두므로, 다른 위젯 조작으로 rerun 되어도 이어서 그릴 수 있음
+
+STAGE_LABELS = {
+    "routing": "🧭 에이전트 라우팅 중…",
+    "tool": "🧰 도구 선택 중…",
+    "calling": "📡 도구 호출 중…",
+    "summarizing": "✍️ 결과 요약 중…",
+    "answering": "💬 답변 작성 중…",
+    "done": "✅ 완료",
+    "cancelled": "⏹ 중지됨",
+    "error": "❌ 오류",
+}
+
+# 에이전트가 debug["events"]에 남기는 이벤트 → 진행 단계
+_EVENT_STAGE = {
+    "run.start": "tool",
+    "tool.prompt.ready": "tool",
+    "tool.decision": "tool",
+    "tool.validation": "tool",
+    "mcp.call.start": "calling",
+    "mcp.call.ok": "calling",
+    "summarize.start": "summarizing",
+    "direct.start": "answering",
+    "llm.call.start": "answering",
+}
+
+
+def is_stream(result: Any) -> bool:
+    return isinstance(result, GeneratorType) or (
+        hasattr(result, "__iter__") and not isinstance(result, (str, bytes, dict, list, tuple))
+    )
+
+
+class PipelineJob:
+    def __init__(self, client, user_input: str, budget_sec: Optional[float] = None):
+        self.id = uuid.uuid4().hex[:8]
+        self.client = client
+        self.user_input = user_input
+        self.deadline = Deadline(budget_sec)  # 입력 시점부터 요청 전체 시간 예산 (None이면 제한 없음)
+        self.debug: Dict[str, Any] = {}     # client.run()과 에이전트가 그대로 채움
+        self.agent_name: Optional[str] = None
+        self.result: Any = None             # 스트림이 아닌 결과 (dict 등)
+        self.parts: List[str] = []          # 지금까지 받은 토큰
+        self.state = "running"              # running | done | cancelled | error
+        self.error: Optional[BaseException] = None
+        self._cancel = CancelToken()       # client.run → 에이전트 → LLM/MCP 호출까지 전달
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{self.id}", daemon=True)
+
+    def start(self) -> "PipelineJob":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.cancel()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def finished(self) -> bool:
+        return self.state != "running"
+
+    def _finish(self, state: str) -> None:
+        with self._cond:
+            self.state = state
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        try:
+            resp = self.client.run(self.user_input, debug=self.debug, cancel=self._cancel, deadline=self.deadline)
+            self.agent_name = resp.get("agent_name")
+            result = resp.get("result")
+
+            # SusinAgent: 도구 결정(dict)은 모달에서 처리, 실패 사유면 양해 안내 스트림
+            if self.agent_name == "SusinAgent" and not (isinstance(result, dict) and "tool_name" in result):
+                result = self.client._direct_stream(self.user_input, result["reason"], cancel=self._cancel,
+                                                   deadline=self.deadline)
+
+            if not is_stream(result):
+                self.result = result
+                self._finish("cancelled" if self._cancel.cancelled else "done")
+                return
+
+            try:
+                for tok in result:
+                    if self._cancel.cancelled:
+                        break
+                    if tok:
+                        with self._cond:
+                            self.parts.append(tok)
+                            self._cond.notify_all()
+            finally:
+                if hasattr(result, "close"):
+                    result.close()   # 중지/오류 시에도 생성기 정리 → 업스트림 스트림 해제
+            self._finish("cancelled" if self._cancel.cancelled else "done")
+        except RunCancelled:
+            self._finish("cancelled")
+        except Exception as e:
+            if self._cancel.cancelled:   # 취소로 스트림이 닫히며 난 오류
+                self._finish("cancelled")
+                return
+            self.error = e
+            self._finish("error")
+
+    def stage(self) -> str:
+        if self.finished:
+            return self.state
+        if self.agent_name is None:
+            return "routing"
+        for ev in reversed(self.debug.get("events", [])):
+            stage = _EVENT_STAGE.get(ev.get("event"))
+            if stage:
+                return stage
+        return "answering"
+
+    def follow(self, on_stage: Optional[Callable[[str], None]] = None, poll_sec: float = 0.1) -> Iterator[str]:
+        """처음부터 지금까지의 토큰을 내주고, 끝날 때까지 새 토큰을 기다림. 단계가 바뀌면 on_stage 호출."""
+        idx = 0
+        last_stage = None
+        while True:
+            with self._cond:
+                if idx >= len(self.parts) and not self.finished:
+                    self._cond.wait(timeout=poll_sec)
+                new = self.parts[idx:]
+                finished = self.finished
+            idx += len(new)
+
+            stage = self.stage()
+            if on_stage and stage != last_stage:
+                on_stage(stage)
+                last_stage = stage
+            if new:
+                yield "".join(new)
+            elif finished:
+                return
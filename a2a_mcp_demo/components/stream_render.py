@@ -0,0 +1,42 @@
+# stream_render.py
+# mcp_demo/stream_render.py와 같은 코드: 두 데모 앱은 각자 디렉터리에서 따로 실행되어 공유 패키지가 없으므로 복사본을 둠
+# → 한쪽을 고치면 다른 쪽도 같이 고칠 것 (a2a_mcp_demo/tests/test_stream_render.py가 본문이 같은지 확인)
+import time
+from typing import Iterable
+
+# 토큰마다 placeholder.markdown(full)을 부르면 문자열 누적이 O(n^2)이고, 매번 전체 마크다운이 웹소켓으로 재전송됨
+# → 버퍼에 모았다가 일정 간격(또는 일정 글자 수)마다만 화면 갱신
+FLUSH_INTERVAL_SEC = 0.05
+FLUSH_CHARS = 2000
+CURSOR = "▌"
+
+
+def render_stream(placeholder, tokens: Iterable[str], interval_sec: float = FLUSH_INTERVAL_SEC,
+                  flush_chars: int = FLUSH_CHARS, cursor: str = CURSOR) -> str:
+    """
+    tokens를 placeholder(st.empty())에 스트리밍 렌더링하고 전체 텍스트를 반환.
+    - interval_sec마다 또는 밀린 글자가 flush_chars 이상이면 갱신 (스트리밍 중에는 커서 표시)
+    - 끝나면(중간에 예외가 나도) 마지막 내용으로 1회 더 갱신
+    """
+    parts = []      # 화면에 이미 반영된 조각
+    pending = []    # 아직 반영 안 된 조각
+    pending_chars = 0
+    last_flush = time.monotonic()
+    try:
+        for tok in tokens:
+            if not tok:
+                continue
+            pending.append(tok)
+            pending_chars += len(tok)
+            now = time.monotonic()
+            if now - last_flush >= interval_sec or pending_chars >= flush_chars:
+                parts.append("".join(pending))
+                pending.clear()
+                pending_chars = 0
+                placeholder.markdown("".join(parts) + cursor)
+                last_flush = now
+    finally:
+        parts.extend(pending)
+        full = "".join(parts)
+        placeholder.markdown(full)
+    return full
@@ -1,4 +1,9 @@
 # susin_modal.py
+import hashlib
+import json
+import uuid
+
+import pandas as pd
 import requests
 import streamlit as st
 
@@ -7,7 +12,16 @@ from components.signals import emit_signal
 API_BASE = "http://localhost:8004"
 TIMEOUT = 8
 
-def call_backend_api(tool_name: str, args: dict) -> dict:
+def _idempotency_key(tool_name: str, args: dict) -> str:
+    # 모달 1회(nonce) + 요청 내용으로 키 생성: 같은 내용으로 '실행'을 다시 눌러도 한 번만 처리되고,
+    # 금액 등을 고치면 새 키가 됨 (nonce는 모달을 열 때 새로 만들고, 서버가 확정 응답을 주면 버림
+    # → 시간 초과/연결 오류 뒤 재시도만 같은 키를 씀)
+    nonce = st.session_state.setdefault("susin_idem_nonce", uuid.uuid4().hex)
+    body = json.dumps({"tool": tool_name, **args}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f"{nonce}:{body}".encode("utf-8")).hexdigest()
+
+
+def call_backend_api(tool_name: str, args: dict, idempotency_key: str = None) -> dict:
     try:
         if tool_name == "transfer":
             url = f"{API_BASE}/tool/transfer"
@@ -22,13 +36,17 @@ def call_backend_api(tool_name: str, args: dict) -> dict:
                 "product_name": args.get("product_name"),
                 "amount": int(args.get("amount", 0)),
             }
+        elif tool_name == "transfer_batch":
+            url = f"{API_BASE}/tool/transfer_batch"
+            payload = {"items": args.get("items") or [], "mode": args.get("mode", "atomic")}
         else:
             return {"ok": False, "error": "지원되지 않는 tool_name 입니다."}
 
         if any(v in (None, "", 0) for v in payload.values()):
             return {"ok": False, "error": "필수 파라미터가 비어 있습니다."}
 
-        resp = requests.post(url, json=payload, timeout=TIMEOUT)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        resp = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
         if resp.ok:
             return {"ok": True, "data": resp.json()}
         else:
@@ -36,9 +54,14 @@ def call_backend_api(tool_name: str, args: dict) -> dict:
                 err = resp.json()
             except Exception:
                 err = {"detail": resp.text}
+            if isinstance(err, dict) and err.get("message"):
+                return {"ok": False, "error": err["message"], "data": err}
             return {"ok": False, "error": f"HTTP {resp.status_code}: {err}"}
     except requests.exceptions.Timeout:
-        return {"ok": False, "error": "요청 시간이 초과되었습니다."}
+        # 서버가 처리했는지 알 수 없음 → 같은 멱등 키로 재시도해야 중복 이체가 없음
+        return {"ok": False, "error": "요청 시간이 초과되었습니다.", "retryable": True}
+    except requests.exceptions.ConnectionError:
+        return {"ok": False, "error": "서버에 연결하지 못했습니다.", "retryable": True}
     except Exception as e:
         return {"ok": False, "error": f"예상치 못한 오류: {e}"}
 
@@ -48,12 +71,43 @@ def _make_chat(tool: str, args: dict, msg: str, ok=True):
         return f"이체 {'성공' if ok else '실패'}: {args.get('recipient')}에게 {int(args.get('amount',0)):,}원 – {msg}"
     if tool == "deposit_product":
         return f"상품 입금 {'성공' if ok else '실패'}: {args.get('product_name')} {int(args.get('amount',0)):,}원 – {msg}"
+    if tool == "transfer_batch":
+        items = args.get("items") or []
+        total = sum(int(it.get("amount", 0)) for it in items)
+        return f"일괄 처리 {'성공' if ok else '실패'}: {len(items)}건 합계 {total:,}원 – {msg}"
     return msg
 
+
+_BATCH_COLUMNS = ["type", "recipient", "product_name", "amount", "transfer_desc"]
+
+
+def _clean_batch_rows(df: pd.DataFrame) -> list:
+    # data_editor 결과(빈 칸은 NaN/None) → API 요청용 항목 목록
+    items = []
+    for row in df.to_dict("records"):
+        if pd.isna(row.get("amount")) and not any(isinstance(row.get(c), str) and row[c].strip() for c in _BATCH_COLUMNS):
+            continue   # 완전히 빈 행
+        kind = row.get("type")
+        if not isinstance(kind, str):   # 종류를 비워 둔 행은 입력된 칸으로 추정
+            kind = "deposit_product" if isinstance(row.get("product_name"), str) and not isinstance(row.get("recipient"), str) else "transfer"
+        item = {"type": kind, "amount": 0 if pd.isna(row.get("amount")) else int(row["amount"])}
+        for col in ("recipient", "product_name", "transfer_desc"):
+            val = row.get(col)
+            if isinstance(val, str) and val.strip():
+                item[col] = val.strip()
+        items.append(item)
+    return items
+
 def open_susin_modal(payload: dict):
     tool = payload.get("tool_name")
     args = payload.get("arguments", {})
-    title = "📌 이체 확인" if tool == "transfer" else "📌 상품 입금 확인" if tool == "deposit_product" else "📌 알 수 없는 작업"
+    title = {
+        "transfer": "📌 이체 확인",
+        "deposit_product": "📌 상품 입금 확인",
+        "transfer_batch": "📌 일괄 이체 확인",
+    }.get(tool, "📌 알 수 없는 작업")
+    # 새 결정마다 새 nonce (이전 모달에서 실패한 요청의 키/저장된 응답을 물려받지 않게)
+    st.session_state["susin_idem_nonce"] = uuid.uuid4().hex
 
     @st.dialog(title)
     def _modal():
@@ -77,6 +131,28 @@ def open_susin_modal(payload: dict):
                 "amount": int(amount),
             }
 
+        elif tool == "transfer_batch":
+            df = pd.DataFrame(args.get("items") or [], columns=_BATCH_COLUMNS)
+            edited = st.data_editor(
+                df,
+                num_rows="dynamic",
+                use_container_width=True,
+                key="susin_batch_items",
+                column_config={
+                    "type": st.column_config.SelectboxColumn("종류", options=["transfer", "deposit_product"], required=True),
+                    "recipient": st.column_config.TextColumn("받는 사람"),
+                    "product_name": st.column_config.TextColumn("상품 이름"),
+                    "amount": st.column_config.NumberColumn("금액", min_value=0, step=1, format="%d"),
+                    "transfer_desc": st.column_config.TextColumn("이체 내용"),
+                },
+            )
+            atomic = st.checkbox("전부 성공할 때만 처리 (하나라도 실패하면 전체 취소)",
+                                 value=args.get("mode", "atomic") == "atomic", key="susin_batch_atomic")
+            items = _clean_batch_rows(edited)
+            st.caption(f"총 {len(items)}건 · 합계 {sum(it['amount'] for it in items):,}원")
+
+            args_to_send = {"items": items, "mode": "atomic" if atomic else "best_effort"}
+
         else:
             st.error("지원되지 않는 tool_name 입니다.")
             if st.button("닫기", use_container_width=True):
@@ -87,11 +163,18 @@ def open_susin_modal(payload: dict):
         with c1:
             if st.button("실행", type="primary", use_container_width=True, key="susin_run"):
                 with st.spinner("처리 중..."):
-                    result = call_backend_api(tool, args_to_send)
+                    result = call_backend_api(tool, args_to_send, _idempotency_key(tool, args_to_send))
 
-                if result.get("ok"):
+                if result.get("retryable"):
+                    # 결과를 모르는 실패: 모달을 그대로 두고, 다시 '실행'하면 같은 키로 재시도 (서버가 중복 제거)
+                    st.error(f"{result['error']} 다시 '실행'을 누르면 중복 없이 재시도합니다.")
+                elif result.get("ok"):
+                    st.session_state.pop("susin_idem_nonce", None)   # 확정 응답 → 다음 요청은 새 키
                     data = result.get("data", {})
                     msg = data.get("message", "요청이 성공했습니다.")
+                    failed = [r for r in data.get("results", []) if not r.get("accepted")]
+                    if failed:   # best_effort 일괄 처리에서 일부 실패
+                        msg += " 실패: " + ", ".join(f"{r['index'] + 1}번({r.get('error')})" for r in failed)
                     emit_signal("success", {
                         "message": msg,
                         "chat": _make_chat(tool, args_to_send, msg, ok=True),
@@ -99,6 +182,7 @@ def open_susin_modal(payload: dict):
                     })
                     st.rerun()
                 else:
+                    st.session_state.pop("susin_idem_nonce", None)   # 잔액 부족/검증 실패 등 확정된 실패
                     msg = result.get("error", "요청에 실패했습니다.")
                     emit_signal("error", {
                         "message": msg,
@@ -109,6 +193,7 @@ def open_susin_modal(payload: dict):
 
         with c2:
             if st.button("취소", type="secondary", use_container_width=True, key="susin_cancel"):
+                st.session_state.pop("susin_idem_nonce", None)
                 emit_signal("cancel", {
                     "message": "요청을 취소했습니다.",
                     "chat": "요청이 취소되었습니다.",
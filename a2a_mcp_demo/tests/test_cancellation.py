@@ -0,0 +1,226 @@
+# test_cancellation.py
+# 취소 후 연결 누수 회귀 테스트: 가짜 OpenAI(SSE) 서버 + 느린 transaction MCP 서버를 같은 프로세스에 띄우고
+#   - 첫 토큰 전 취소 / 도구 본문 수신 중 취소 / 요약 스트리밍 중 취소를 각각 N회 (PipelineJob.cancel)
+#   - execute() 생성기를 중간에 close()
+# 한 뒤, 서버 쪽에 열린 스트림/연결도, 클라이언트 쪽 소켓도 0개인지 확인
+#
+# 실행 예:
+#   cd a2a_mcp_demo && python -m pytest -q tests/test_cancellation.py
+#   CANCEL_RUNS=50 python -m pytest -q tests/test_cancellation.py
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from openai import OpenAI  # noqa: E402
+
+from a2a_client import A2AClient  # noqa: E402
+from agents.agent_base import MCPAgentBase  # noqa: E402
+from components.pipeline_worker import PipelineJob  # noqa: E402
+
+N = int(os.getenv("CANCEL_RUNS", 10))
+USER_INPUT = "이번 달 거래 내역"
+
+
+class FakeServers:
+    """LLM(SSE)/MCP 요청을 받는 가짜 서버. active는 지금 응답 중인 요청 수 (0이어야 누수 없음)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {"llm_stream": 0, "tool": 0}
+        self.ttft_sec = 0.0         # 요약 스트림의 첫 토큰까지 지연
+        self.tool_body_sec = 0.0    # 도구 응답 본문을 나눠 보내는 총 시간
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a):
+                pass
+
+            def _track(self, kind, delta):
+                with outer.lock:
+                    outer.active[kind] += delta
+
+            def _head(self, ctype, length=None):
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                if length is not None:
+                    self.send_header("Content-Length", str(length))
+                self.send_header("Connection", "close")   # keep-alive 풀에 남는 소켓이 누수로 보이지 않게
+                self.end_headers()
+                self.close_connection = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.endswith("/chat/completions"):
+                    return self._sse() if body.get("stream") else self._decision(body)
+                self._tool()
+
+            def _decision(self, body):
+                prompt = body["messages"][-1]["content"]
+                if "Agent 목록" in prompt:
+                    content = {"route": "AGENT", "agent_name": "TransactionAgent", "reason": "test"}
+                else:
+                    content = {"route": "TOOL", "mcp": "transaction", "tool_name": "transactions",
+                               "arguments": {"name": "홍길동"}, "reason": "test"}
+                out = json.dumps({
+                    "id": "x", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": json.dumps(content)}}],
+                }).encode()
+                self._head("application/json", len(out))
+                self.wfile.write(out)
+
+            def _tool(self):
+                self._track("tool", 1)
+                try:
+                    rows = json.dumps({"records": [{"amount": i} for i in range(50)]}).encode()
+                    self._head("application/json", len(rows))
+                    step = max(1, len(rows) // 20)
+                    for i in range(0, len(rows), step):
+                        self.wfile.write(rows[i:i + step])
+                        self.wfile.flush()
+                        time.sleep(outer.tool_body_sec / 20)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    self._track("tool", -1)
+
+            def _sse(self):
+                self._track("llm_stream", 1)
+                try:
+                    self._head("text/event-stream")
+                    time.sleep(outer.ttft_sec)
+                    for i in range(300):
+                        ev = {"id": "x", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o",
+                              "choices": [{"index": 0, "delta": {"content": f"t{i} "}, "finish_reason": None}]}
+                        self.wfile.write(f"data: {json.dumps(ev)}\n\n".encode())
+                        self.wfile.flush()
+                        time.sleep(0.02)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    self._track("llm_stream", -1)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port
+        self.url = f"http://127.0.0.1:{self.port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def idle(self) -> bool:
+        with self.lock:
+            return not any(self.active.values())
+
+
+def established_sockets(port: int):
+    """(클라이언트 쪽, 서버 쪽) ESTABLISHED TCP 연결 수 — /proc/net/tcp 기준"""
+    client = server = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        if not os.path.exists(table):
+            continue
+        with open(table) as f:
+            next(f)
+            for line in f:
+                cols = line.split()
+                if cols[3] != "01":    # ESTABLISHED
+                    continue
+                local_port = int(cols[1].rsplit(":", 1)[1], 16)
+                remote_port = int(cols[2].rsplit(":", 1)[1], 16)
+                client += remote_port == port
+                server += local_port == port
+    return client, server
+
+
+def assert_no_leaks(servers: FakeServers, timeout_sec: float = 5.0):
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        if servers.idle() and established_sockets(servers.port) == (0, 0):
+            return
+        time.sleep(0.02)
+    client, server = established_sockets(servers.port)
+    pytest.fail(f"leak: server active {servers.active}, client sockets {client}, server sockets {server}")
+
+
+@pytest.fixture(scope="module")
+def servers():
+    s = FakeServers()
+    yield s
+    s.httpd.shutdown()
+
+
+@pytest.fixture
+def client(servers, monkeypatch):
+    monkeypatch.setattr(MCPAgentBase, "_load_server_map", lambda self: {"transaction": [servers.url]})
+    servers.ttft_sec = 0.0
+    servers.tool_body_sec = 0.0
+    llm = OpenAI(api_key="test", base_url=f"{servers.url}/v1", max_retries=0)
+    return A2AClient(agents_root=str(ROOT / "agents"), llm_client=llm,
+                     fallback_agent_dir=str(ROOT / "agents" / "basic_agent"))
+
+
+def wait_stage(job: PipelineJob, stage: str, timeout_sec: float = 5.0):
+    deadline = time.monotonic() + timeout_sec
+    while job.stage() != stage:
+        assert time.monotonic() < deadline, f"stage {stage!r} not reached (now {job.stage()!r})"
+        time.sleep(0.005)
+
+
+def cancel_and_finish(job: PipelineJob, max_ms: float = 1000):
+    t0 = time.perf_counter()
+    job.cancel()
+    for _ in job.follow():
+        pass
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    assert job.state == "cancelled", (job.state, job.error)
+    assert elapsed_ms < max_ms, f"cancel took {elapsed_ms:.0f} ms"
+
+
+def test_cancel_before_first_token(servers, client):
+    servers.ttft_sec = 3.0
+    for _ in range(N):
+        job = PipelineJob(client, USER_INPUT).start()
+        wait_stage(job, "summarizing")
+        time.sleep(0.1)                  # 요약 스트림 응답 헤더는 받았고 첫 토큰은 아직
+        assert not job.parts
+        cancel_and_finish(job)
+    assert_no_leaks(servers)
+
+
+def test_cancel_mid_tool_body(servers, client):
+    servers.tool_body_sec = 3.0
+    for _ in range(N):
+        job = PipelineJob(client, USER_INPUT).start()
+        wait_stage(job, "calling")
+        time.sleep(0.3)                  # 도구 응답 본문을 나눠 받는 중
+        cancel_and_finish(job)
+    assert_no_leaks(servers)
+
+
+def test_cancel_mid_summary(servers, client):
+    for _ in range(N):
+        job = PipelineJob(client, USER_INPUT).start()
+        tokens = job.follow()
+        next(tokens)
+        next(tokens)                     # 요약 토큰을 몇 개 받은 뒤
+        cancel_and_finish(job)
+    assert_no_leaks(servers)
+
+
+def test_close_execute_generator(servers, client):
+    for _ in range(N):
+        result = client.run(USER_INPUT, debug={})["result"]
+        next(result)
+        next(result)
+        result.close()                   # 소비자가 중간에 멈춤 → 업스트림 스트림도 닫혀야 함
+    assert_no_leaks(servers)
@@ -0,0 +1,21 @@
+# test_stream_render.py
+# components/stream_render.py와 mcp_demo/stream_render.py는 같은 코드의 복사본 → 머리 주석만 빼고 같아야 함
+#
+# 실행 예:
+#   cd a2a_mcp_demo && python -m pytest -q tests/test_stream_render.py
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+COPIES = [ROOT / "components" / "stream_render.py", ROOT.parent / "mcp_demo" / "stream_render.py"]
+
+
+def body(path: Path) -> str:
+    """맨 위 주석 줄(파일 이름/복사본 안내)을 뺀 나머지"""
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    start = next(i for i, line in enumerate(lines) if not line.startswith("#"))
+    return "".join(lines[start:])
+
+
+def test_stream_render_copies_match():
+    first, second = (body(p) for p in COPIES)
+    assert first == second, f"{COPIES[0]}와 {COPIES[1]}의 코드가 달라졌습니다. 두 파일을 같이 고치세요."
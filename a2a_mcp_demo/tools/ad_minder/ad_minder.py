@@ -1,10 +1,16 @@
 # ad_minder.py
+import os
+import json
+import threading
 import uvicorn
+import numpy as np
 import pandas as pd
+from dataclasses import dataclass
 from fastapi import FastAPI
 from pydantic import BaseModel, Field
 from fastapi.responses import JSONResponse
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 app = FastAPI()
@@ -34,6 +40,357 @@ raw_data = [
 df = pd.DataFrame(raw_data)
 df["base_dt"] = pd.to_datetime(df["base_dt"])  # 문자열 → datetime
 
+# ---------------------------------------------
+# 배너별 누적합 인덱스
+# ---------------------------------------------
+# 배너마다 날짜 오름차순 NumPy 배열 + 노출/클릭 누적합(앞에 0 포함)을 보관
+# → 기간 합계 = searchsorted 2회 + 뺄셈 (기간 길이/전체 데이터 크기와 무관)
+# 날짜는 epoch 기준 일수(int64)로 저장
+@dataclass
+class BannerSeries:
+    days: np.ndarray        # int64, 오름차순/중복 없음
+    impr: np.ndarray        # int64
+    click: np.ndarray       # int64
+    cum_impr: np.ndarray    # int64, len = len(days) + 1
+    cum_click: np.ndarray   # int64, len = len(days) + 1
+
+    @classmethod
+    def from_arrays(cls, days: np.ndarray, impr: np.ndarray, click: np.ndarray) -> "BannerSeries":
+        return cls(
+            days=days,
+            impr=impr,
+            click=click,
+            cum_impr=np.concatenate(([0], np.cumsum(impr, dtype=np.int64))),
+            cum_click=np.concatenate(([0], np.cumsum(click, dtype=np.int64))),
+        )
+
+    def merge(self, days: np.ndarray, impr: np.ndarray, click: np.ndarray,
+              mode: str = "upsert") -> Tuple["BannerSeries", int, int]:
+        """
+        정렬·중복 제거된 일자 배치를 병합한 새 시리즈를 반환 (self는 변경하지 않음).
+          - upsert: 같은 일자가 있으면 값을 교체
+          - append: 같은 일자가 있으면 값을 더함
+        누적합은 처음 바뀐 위치부터만 다시 계산 → 끝에 덧붙이는 경우 추가분만 계산.
+        반환: (새 시리즈, 신규 일자 수, 갱신 일자 수)
+        """
+        n = len(self.days)
+        pos = np.searchsorted(self.days, days)
+        exists = np.zeros(len(days), dtype=bool)
+        if n:
+            exists = (pos < n) & (self.days[np.minimum(pos, n - 1)] == days)
+
+        new_impr = self.impr.copy()
+        new_click = self.click.copy()
+        hit = pos[exists]
+        if mode == "append":
+            new_impr[hit] += impr[exists]
+            new_click[hit] += click[exists]
+        else:
+            new_impr[hit] = impr[exists]
+            new_click[hit] = click[exists]
+
+        miss = pos[~exists]
+        new_days = np.insert(self.days, miss, days[~exists])
+        new_impr = np.insert(new_impr, miss, impr[~exists])
+        new_click = np.insert(new_click, miss, click[~exists])
+
+        first = int(pos.min()) if len(pos) else n
+        cum_impr = np.empty(len(new_days) + 1, dtype=np.int64)
+        cum_click = np.empty(len(new_days) + 1, dtype=np.int64)
+        cum_impr[:first + 1] = self.cum_impr[:first + 1]
+        cum_click[:first + 1] = self.cum_click[:first + 1]
+        cum_impr[first + 1:] = self.cum_impr[first] + np.cumsum(new_impr[first:], dtype=np.int64)
+        cum_click[first + 1:] = self.cum_click[first] + np.cumsum(new_click[first:], dtype=np.int64)
+
+        merged = BannerSeries(new_days, new_impr, new_click, cum_impr, cum_click)
+        return merged, int((~exists).sum()), int(exists.sum())
+
+    def values_at(self, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """주어진 일자들의 (노출, 클릭) — 없는 일자는 0"""
+        n = len(self.days)
+        if n == 0:
+            zeros = np.zeros(len(days), dtype=np.int64)
+            return zeros, zeros.copy()
+        pos = np.minimum(np.searchsorted(self.days, days), n - 1)
+        exists = self.days[pos] == days
+        return np.where(exists, self.impr[pos], 0), np.where(exists, self.click[pos], 0)
+
+    def bounds(self, start_day: int, end_day: int) -> Tuple[int, int]:
+        lo = int(np.searchsorted(self.days, start_day, side="left"))
+        hi = int(np.searchsorted(self.days, end_day, side="right"))
+        return lo, hi
+
+    def range_sum(self, start_day: int, end_day: int) -> Tuple[int, int, int]:
+        """(노출합, 클릭합, 일수)"""
+        lo, hi = self.bounds(start_day, end_day)
+        return (
+            int(self.cum_impr[hi] - self.cum_impr[lo]),
+            int(self.cum_click[hi] - self.cum_click[lo]),
+            hi - lo,
+        )
+
+
+def to_day(ts: pd.Timestamp) -> int:
+    return int(np.datetime64(ts.date(), "D").astype(np.int64))
+
+
+EMPTY_SERIES = BannerSeries.from_arrays(
+    np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+)
+
+
+def _collapse(days: np.ndarray, impr: np.ndarray, click: np.ndarray, mode: str):
+    """(정렬된) 한 배너의 배치에서 같은 일자를 하나로: upsert는 마지막 값, append는 합계"""
+    if len(days) < 2 or (np.diff(days) > 0).all():
+        return days, impr, click
+    if mode == "append":
+        uniq, inv = np.unique(days, return_inverse=True)
+        sum_impr = np.zeros(len(uniq), dtype=np.int64)
+        sum_click = np.zeros(len(uniq), dtype=np.int64)
+        np.add.at(sum_impr, inv, impr)
+        np.add.at(sum_click, inv, click)
+        return uniq, sum_impr, sum_click
+    _, rev_idx = np.unique(days[::-1], return_index=True)
+    last = len(days) - 1 - rev_idx
+    return days[last], impr[last], click[last]
+
+
+# ---------------------------------------------
+# 주/월 롤업 (materialized)
+# ---------------------------------------------
+# 배너별 + 전체 배너 합계를 ISO 주(월요일 시작)/월 버킷으로 미리 합산해 둠.
+# 버킷도 BannerSeries로 보관(days = 버킷 시작일)하므로 누적합/병합 로직을 그대로 재사용.
+# 일자 데이터가 바뀌면 변화량(delta)만 해당 버킷에 더함.
+ROLLUP_GRAINS = ("week", "month")
+ALL_BANNERS = None   # 롤업 테이블에서 전체 배너 합계 키
+
+
+def bucket_start(days: np.ndarray, grain: str) -> np.ndarray:
+    if grain == "week":
+        return days - (days + 3) % 7          # 1970-01-01 = 목요일 → 월요일 기준
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def bucket_end(starts: np.ndarray, grain: str) -> np.ndarray:
+    if grain == "week":
+        return starts + 6
+    next_month = starts.astype("datetime64[D]").astype("datetime64[M]") + 1
+    return next_month.astype("datetime64[D]").astype(np.int64) - 1
+
+
+class Rollups:
+    def __init__(self):
+        # 전체 배너 일자 합계 (전체 합계 쿼리의 경계 구간용)
+        self.day_total: BannerSeries = EMPTY_SERIES
+        self.tables: Dict[str, Dict[Optional[int], BannerSeries]] = {g: {} for g in ROLLUP_GRAINS}
+
+    def add_deltas(self, ids: np.ndarray, days: np.ndarray, d_impr: np.ndarray, d_click: np.ndarray):
+        """(배너, 일자)별 변화량을 일자 합계/주·월 버킷에 더함. ids 기준으로 정렬되어 있어야 함."""
+        if len(ids) == 0:
+            return
+        order = np.argsort(days, kind="stable")
+        self.day_total = self._add(self.day_total, days[order], d_impr[order], d_click[order])
+        cuts = np.flatnonzero(np.diff(ids)) + 1
+        for grain, table in self.tables.items():
+            keys = bucket_start(days, grain)
+            for seg_ids, seg_keys, seg_impr, seg_click in zip(
+                np.split(ids, cuts), np.split(keys, cuts), np.split(d_impr, cuts), np.split(d_click, cuts)
+            ):
+                bnnr_id = int(seg_ids[0])
+                table[bnnr_id] = self._add(table.get(bnnr_id, EMPTY_SERIES), seg_keys, seg_impr, seg_click)
+            table[ALL_BANNERS] = self._add(
+                table.get(ALL_BANNERS, EMPTY_SERIES), keys[order], d_impr[order], d_click[order]
+            )
+
+    @staticmethod
+    def _add(series: BannerSeries, keys: np.ndarray, impr: np.ndarray, click: np.ndarray) -> BannerSeries:
+        keys, impr, click = _collapse(keys, impr, click, "append")
+        return series.merge(keys, impr, click, "append")[0]
+
+
+def apply_batch(index: Dict[int, BannerSeries], ids: np.ndarray, days: np.ndarray,
+                impr: np.ndarray, click: np.ndarray, mode: str = "upsert",
+                rollups: Optional[Rollups] = None) -> Tuple[int, int, int]:
+    """
+    (bnnr_id, 일자(epoch 일수), 노출, 클릭) 배치를 배너별로 나눠 인덱스에 병합.
+    배너 단위로 새 시리즈를 만든 뒤 교체하므로 조회 쪽은 락 없이 일관된 스냅샷을 읽음.
+    rollups가 주어지면 병합 전후 차이만큼 롤업도 갱신.
+    반환: (반영 배너 수, 신규 일자 수, 갱신 일자 수)
+    """
+    if len(ids) == 0:
+        return 0, 0, 0
+    order = np.lexsort((days, ids))   # 안정 정렬 → 같은 키는 입력 순서 유지
+    ids, days, impr, click = ids[order], days[order], impr[order], click[order]
+    cuts = np.flatnonzero(np.diff(ids)) + 1
+    inserted = updated = 0
+    deltas = []
+    for seg_ids, seg_days, seg_impr, seg_click in zip(
+        np.split(ids, cuts), np.split(days, cuts), np.split(impr, cuts), np.split(click, cuts)
+    ):
+        bnnr_id = int(seg_ids[0])
+        seg_days, seg_impr, seg_click = _collapse(seg_days, seg_impr, seg_click, mode)
+        current = index.get(bnnr_id, EMPTY_SERIES)
+        if rollups is not None:
+            if mode == "append":
+                d_impr, d_click = seg_impr, seg_click
+            else:
+                old_impr, old_click = current.values_at(seg_days)
+                d_impr, d_click = seg_impr - old_impr, seg_click - old_click
+            deltas.append((np.full(len(seg_days), bnnr_id, dtype=np.int64), seg_days, d_impr, d_click))
+        merged, ins, upd = current.merge(seg_days, seg_impr, seg_click, mode)
+        index[bnnr_id] = merged
+        inserted += ins
+        updated += upd
+    if rollups is not None:
+        rollups.add_deltas(*(np.concatenate(parts) for parts in zip(*deltas)))
+    return len(cuts) + 1, inserted, updated
+
+
+def build_index(frame: pd.DataFrame, rollups: Optional[Rollups] = None) -> Dict[int, BannerSeries]:
+    index: Dict[int, BannerSeries] = {}
+    if frame.empty:
+        return index
+    apply_batch(
+        index,
+        frame["bnnr_id"].to_numpy(dtype=np.int64),
+        frame["base_dt"].to_numpy(dtype="datetime64[D]").astype(np.int64),
+        frame["impression_cnt"].to_numpy(dtype=np.int64),
+        frame["click_cnt"].to_numpy(dtype=np.int64),
+        rollups=rollups,
+    )
+    return index
+
+
+ROLLUPS = Rollups()
+BANNER_INDEX: Dict[int, BannerSeries] = build_index(df, ROLLUPS)
+
+# ---------------------------------------------
+# 적재(ingestion) 저장소: append-only JSONL
+# ---------------------------------------------
+# 한 줄 = 한 배치: {"mode": "upsert"|"append", "rows": [[bnnr_id, "YYYY-MM-DD", 노출, 클릭], ...]}
+# 시작 시 raw_data(시드) 위에 순서대로 재적용 → 재시작 후에도 동일 상태 복원
+# 인덱스는 프로세스 메모리에 있고 _write_lock도 프로세스 안에서만 유효 → 서버는 1개(단일 writer)로만 띄움
+#   (레플리카를 여러 개 띄우면 /ingest가 다른 레플리카에 보이지 않고 저장소 줄이 섞일 수 있음,
+#    그래서 manifest에 "replica_safe": false → 클라이언트도 분산/헤징 없이 첫 URL로만 호출)
+STORE_PATH = Path(os.environ.get("AD_MINDER_STORE", Path(__file__).with_name("ad_minder_store.jsonl")))
+_write_lock = threading.Lock()   # 쓰기(저장+반영) 직렬화, 조회는 락 없음
+_index_version = 0               # 적재마다 증가 → 다중 배너 스냅샷 무효화
+
+
+def _rows_to_arrays(rows: List[list]):
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    ids, dts, impr, click = zip(*rows)
+    return (
+        np.asarray(ids, dtype=np.int64),
+        np.asarray(dts, dtype="datetime64[D]").astype(np.int64),
+        np.asarray(impr, dtype=np.int64),
+        np.asarray(click, dtype=np.int64),
+    )
+
+
+def ingest_rows(rows: List[list], mode: str = "upsert") -> Tuple[int, int, int]:
+    """저장소에 먼저 기록(write-ahead) 후 인덱스에 반영"""
+    arrays = _rows_to_arrays(rows)
+    with _write_lock:
+        with STORE_PATH.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"mode": mode, "rows": rows}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        result = apply_batch(BANNER_INDEX, *arrays, mode=mode, rollups=ROLLUPS)
+        global _index_version
+        _index_version += 1
+        return result
+
+
+def replay_store(index: Dict[int, BannerSeries], path: Path = STORE_PATH,
+                 rollups: Optional[Rollups] = None) -> int:
+    if not path.exists():
+        return 0
+    batches = 0
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # 비정상 종료로 잘린 마지막 줄 등은 건너뜀
+            apply_batch(index, *_rows_to_arrays(batch.get("rows") or []),
+                        mode=batch.get("mode", "upsert"), rollups=rollups)
+            batches += 1
+    return batches
+
+
+replay_store(BANNER_INDEX, rollups=ROLLUPS)
+
+# ---------------------------------------------
+# 다중 배너 조회용 압축 스냅샷
+# ---------------------------------------------
+# 모든 배너를 (배너 순번, 일자) 복합 키 하나의 정렬 배열로 이어 붙이고 전역 누적합을 둠
+# → N개 배너의 기간 합계를 searchsorted 한 번(벡터)으로 계산
+# 적재 후 첫 다중 배너 조회에서만 다시 만들어짐 (쓰기 경로는 영향 없음)
+DAY_OFFSET = 1 << 20          # 음수 일수(1970년 이전) 보정
+DAY_SPAN = 1 << 21            # 배너 하나가 차지하는 키 범위
+
+
+@dataclass
+class PackedIndex:
+    ids: np.ndarray         # 배너 번호 (오름차순)
+    keys: np.ndarray        # 순번 * DAY_SPAN + DAY_OFFSET + 일수
+    cum_impr: np.ndarray    # 전역 누적합, len = len(keys) + 1
+    cum_click: np.ndarray
+
+    @classmethod
+    def build(cls, index: Dict[int, BannerSeries]) -> "PackedIndex":
+        ids = np.array(sorted(index), dtype=np.int64)
+        series = [index[int(b)] for b in ids]
+        lengths = np.array([len(x.days) for x in series], dtype=np.int64)
+        if lengths.sum() == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(ids, empty, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))
+        ranks = np.repeat(np.arange(len(ids), dtype=np.int64), lengths)
+        keys = ranks * DAY_SPAN + DAY_OFFSET + np.concatenate([x.days for x in series])
+        impr = np.concatenate([x.impr for x in series])
+        click = np.concatenate([x.click for x in series])
+        return cls(
+            ids=ids,
+            keys=keys,
+            cum_impr=np.concatenate(([0], np.cumsum(impr, dtype=np.int64))),
+            cum_click=np.concatenate(([0], np.cumsum(click, dtype=np.int64))),
+        )
+
+    def range_totals(self, ids: np.ndarray, start_day: int, end_day: int):
+        """(노출합, 클릭합, 일수) 배열 — 인덱스에 없는 배너는 0"""
+        n = len(self.ids)
+        ranks = np.searchsorted(self.ids, ids)
+        present = np.zeros(len(ids), dtype=bool)
+        if n:
+            present = (ranks < n) & (self.ids[np.minimum(ranks, n - 1)] == ids)
+        base = ranks * DAY_SPAN + DAY_OFFSET
+        lo = np.searchsorted(self.keys, base + start_day, side="left")
+        hi = np.searchsorted(self.keys, base + end_day, side="right")
+        impr = np.where(present, self.cum_impr[hi] - self.cum_impr[lo], 0)
+        click = np.where(present, self.cum_click[hi] - self.cum_click[lo], 0)
+        days = np.where(present, hi - lo, 0)
+        return impr, click, days
+
+
+_packed_lock = threading.Lock()
+_packed_cache: Dict[str, object] = {"key": None, "packed": None}
+
+
+def packed_index() -> PackedIndex:
+    key = (id(BANNER_INDEX), _index_version)
+    if _packed_cache["key"] != key:
+        with _packed_lock:
+            if _packed_cache["key"] != key:
+                _packed_cache["packed"] = PackedIndex.build(BANNER_INDEX)
+                _packed_cache["key"] = key
+    return _packed_cache["packed"]
+
 # ---------------------------------------------
 # 요청 스키마
 # ---------------------------------------------
@@ -42,6 +399,36 @@ class PerformanceRequest(BaseModel):
     start_date: str = Field(..., description="조회 시작일 (YYYY-MM-DD)")
     end_date: str = Field(..., description="조회 종료일 (YYYY-MM-DD)")
 
+class CompareRequest(BaseModel):
+    bnnr_ids: Optional[List[int]] = Field(None, description="배너 번호 목록 (생략/빈 목록이면 전체 배너)")
+    start_date: str = Field(..., description="조회 시작일 (YYYY-MM-DD)")
+    end_date: str = Field(..., description="조회 종료일 (YYYY-MM-DD)")
+
+class RankingRequest(BaseModel):
+    start_date: str = Field(..., description="조회 시작일 (YYYY-MM-DD)")
+    end_date: str = Field(..., description="조회 종료일 (YYYY-MM-DD)")
+    metric: str = Field("ctr", pattern="^(ctr|click|impression)$", description="정렬 기준 (ctr/click/impression)")
+    top_n: int = Field(5, ge=1, le=100, description="상위 N개")
+    min_impression: int = Field(0, ge=0, description="최소 노출 수 (CTR 순위에서 표본이 작은 배너 제외용)")
+    bnnr_ids: Optional[List[int]] = Field(None, description="후보 배너 번호 목록 (생략 시 전체 배너)")
+
+class TrendRequest(BaseModel):
+    bnnr_id: Optional[int] = Field(None, description="배너 번호 (생략 시 전체 배너 합계)")
+    start_date: str = Field(..., description="조회 시작일 (YYYY-MM-DD)")
+    end_date: str = Field(..., description="조회 종료일 (YYYY-MM-DD)")
+    granularity: str = Field("week", pattern="^(week|month)$", description="집계 단위 (week/month)")
+
+class DailyMetric(BaseModel):
+    bnnr_id: int = Field(..., description="배너 번호 (정수)")
+    base_dt: str = Field(..., description="기준일 (YYYY-MM-DD)")
+    impression_cnt: int = Field(..., ge=0, description="노출 수")
+    click_cnt: int = Field(..., ge=0, description="클릭 수")
+
+class IngestRequest(BaseModel):
+    rows: List[DailyMetric] = Field(..., min_length=1, description="일자별 실적 행 목록")
+    mode: str = Field("upsert", pattern="^(upsert|append)$",
+                      description="upsert: 같은 배너/일자 값 교체, append: 기존 값에 더함")
+
 # ---------------------------------------------
 # 유틸 함수
 # ---------------------------------------------
@@ -78,11 +465,11 @@ def build_payload(bnnr_id: int, start_date: str, end_date: str):
             "message": "종료일이 시작일보다 빠를 수 없습니다.",
         }
 
-    # 데이터 필터링
-    subset = df[(df["bnnr_id"] == bnnr_id) & (df["base_dt"].between(start, end))].copy()
-    subset.sort_values("base_dt", inplace=True)
+    # 인덱스 구간 탐색
+    series = BANNER_INDEX.get(bnnr_id)
+    lo, hi = series.bounds(to_day(start), to_day(end)) if series is not None else (0, 0)
 
-    if subset.empty:
+    if hi <= lo:
         return {
             "bnnr_id": bnnr_id,
             "start_date": start_date,
@@ -93,47 +480,44 @@ def build_payload(bnnr_id: int, start_date: str, end_date: str):
             "message": "해당 조건에 맞는 실적 데이터가 없습니다.",
         }
 
-    # 상세 레코드 리스트 (문자열 날짜로 변환하여 반환)
+    # 상세 레코드 리스트 (구간 슬라이스 → 문자열 날짜로 변환하여 반환)
+    days = series.days[lo:hi]
+    impr = series.impr[lo:hi]
+    click = series.click[lo:hi]
+    ctrs = np.divide(click, impr, out=np.zeros(len(impr), dtype=np.float64), where=impr != 0).round(6)
     records = [
         {
-            "bnnr_id": int(row.bnnr_id),
-            "base_dt": row.base_dt.strftime("%Y-%m-%d"),
-            "impression_cnt": int(row.impression_cnt),
-            "click_cnt": int(row.click_cnt),
-            "ctr": round((row.click_cnt / row.impression_cnt) if row.impression_cnt else 0.0, 6),
+            "bnnr_id": int(bnnr_id),
+            "base_dt": dt,
+            "impression_cnt": i,
+            "click_cnt": c,
+            "ctr": r,
         }
-        for _, row in subset.iterrows()
+        for dt, i, c, r in zip(
+            np.datetime_as_string(days.astype("datetime64[D]")).tolist(),
+            impr.tolist(), click.tolist(), ctrs.tolist(),
+        )
     ]
 
-    # --- 배너ID 기준 groupby 합계/CTR 계산 ---
-    grouped_df = subset.groupby("bnnr_id", as_index=False).agg(
-        impression_sum=("impression_cnt", "sum"),
-        click_sum=("click_cnt", "sum")
-    )
-    grouped_df["ctr"] = grouped_df.apply(
-        lambda r: (r["click_sum"] / r["impression_sum"]) if r["impression_sum"] else 0.0,
-        axis=1
-    )
+    # --- 배너ID 기준 합계/CTR (누적합 차분) ---
+    total_impr = int(series.cum_impr[hi] - series.cum_impr[lo])
+    total_click = int(series.cum_click[hi] - series.cum_click[lo])
+    ctr = (total_click / total_impr) if total_impr else 0.0
     grouped = [
         {
-            "bnnr_id": int(row.bnnr_id),
-            "impression_sum": int(row.impression_sum),
-            "click_sum": int(row.click_sum),
-            "ctr": round(float(row.ctr), 6)
+            "bnnr_id": int(bnnr_id),
+            "impression_sum": total_impr,
+            "click_sum": total_click,
+            "ctr": round(ctr, 6)
         }
-        for _, row in grouped_df.iterrows()
     ]
 
     # 전체 요약(단일 배너 요청이므로 grouped[0]과 동일)
-    total_impr = int(subset["impression_cnt"].sum())
-    total_click = int(subset["click_cnt"].sum())
-    ctr = (total_click / total_impr) if total_impr else 0.0
-
     summary = {
         "total_impression": total_impr,
         "total_click": total_click,
         "ctr": round(ctr, 6),
-        "days": len(subset),
+        "days": hi - lo,
         "date_range": {
             "start": start.strftime("%Y-%m-%d"),
             "end": end.strftime("%Y-%m-%d"),
@@ -151,6 +535,176 @@ def build_payload(bnnr_id: int, start_date: str, end_date: str):
     }
 
 
+def check_range(start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> Optional[str]:
+    if start is None or end is None:
+        return "날짜 형식은 YYYY-MM-DD 이어야 합니다."
+    if end < start:
+        return "종료일이 시작일보다 빠를 수 없습니다."
+    return None
+
+
+def range_totals(bnnr_ids: Optional[List[int]], start_day: int, end_day: int):
+    """
+    여러 배너의 기간 합계를 NumPy 배열로 반환: (ids, 노출합, 클릭합, 일수, ctr)
+    압축 스냅샷에서 전체 배너를 한 번에 searchsorted + 누적합 차분 (기간 길이와 무관)
+    """
+    packed = packed_index()
+    if bnnr_ids:
+        ids = np.array(list(dict.fromkeys(bnnr_ids)), dtype=np.int64)
+    else:
+        ids = packed.ids
+    impr, click, days = packed.range_totals(ids, start_day, end_day)
+    ctr = np.divide(click, impr, out=np.zeros(len(ids), dtype=np.float64), where=impr != 0)
+    return ids, impr, click, days, ctr
+
+
+def top_n_indices(values: np.ndarray, ids: np.ndarray, k: int) -> np.ndarray:
+    """전체 정렬 대신 argpartition으로 상위 k개만 고른 뒤 그 안에서만 정렬 (동점은 배너 번호 오름차순)"""
+    if k < len(values):
+        cand = np.argpartition(-values, k - 1)[:k]
+        # 경계값과 같은 동점 후보를 모두 포함해야 배너 번호 기준 정렬이 결정적
+        cand = np.union1d(cand, np.flatnonzero(values == values[cand].min()))
+    else:
+        cand = np.arange(len(values))
+    order = np.lexsort((ids[cand], -values[cand]))
+    return cand[order][:k]
+
+
+def build_compare_payload(bnnr_ids: Optional[List[int]], start_date: str, end_date: str):
+    start, end = parse_date(start_date), parse_date(end_date)
+    base = {"bnnr_ids": bnnr_ids or None, "start_date": start_date, "end_date": end_date}
+    error = check_range(start, end)
+    if error:
+        return {**base, "grouped": [], "missing_bnnr_ids": [], "summary": None, "message": error}
+
+    ids, impr, click, days, ctr = range_totals(bnnr_ids, to_day(start), to_day(end))
+    has_data = days > 0
+    grouped = [
+        {"bnnr_id": b, "impression_sum": i, "click_sum": c, "ctr": r, "days": d}
+        for b, i, c, r, d in zip(
+            ids[has_data].tolist(), impr[has_data].tolist(), click[has_data].tolist(),
+            ctr[has_data].round(6).tolist(), days[has_data].tolist(),
+        )
+    ]
+    if not grouped:
+        return {**base, "grouped": [], "missing_bnnr_ids": ids.tolist(), "summary": None,
+                "message": "해당 조건에 맞는 실적 데이터가 없습니다."}
+
+    total_impr = int(impr.sum())
+    total_click = int(click.sum())
+    summary = {
+        "total_impression": total_impr,
+        "total_click": total_click,
+        "ctr": round((total_click / total_impr) if total_impr else 0.0, 6),
+        "banners": len(grouped),
+        "date_range": {"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")},
+    }
+    return {**base, "grouped": grouped, "missing_bnnr_ids": ids[~has_data].tolist(),
+            "summary": summary, "message": None}
+
+
+def build_ranking_payload(req: "RankingRequest"):
+    start, end = parse_date(req.start_date), parse_date(req.end_date)
+    base = {"start_date": req.start_date, "end_date": req.end_date, "metric": req.metric, "top_n": req.top_n}
+    error = check_range(start, end)
+    if error:
+        return {**base, "ranking": [], "message": error}
+
+    ids, impr, click, days, ctr = range_totals(req.bnnr_ids, to_day(start), to_day(end))
+    keep = (days > 0) & (impr >= req.min_impression)
+    ids, impr, click, ctr = ids[keep], impr[keep], click[keep], ctr[keep]
+    if len(ids) == 0:
+        return {**base, "ranking": [], "message": "해당 조건에 맞는 실적 데이터가 없습니다."}
+
+    values = {"ctr": ctr, "click": click, "impression": impr}[req.metric].astype(np.float64)
+    top = top_n_indices(values, ids, req.top_n)
+    ranking = [
+        {"rank": rank, "bnnr_id": b, "impression_sum": i, "click_sum": c, "ctr": r}
+        for rank, (b, i, c, r) in enumerate(zip(
+            ids[top].tolist(), impr[top].tolist(), click[top].tolist(), ctr[top].round(6).tolist(),
+        ), start=1)
+    ]
+    return {**base, "candidates": int(len(ids)), "ranking": ranking, "message": None}
+
+
+MAX_TREND_BUCKETS = 400
+
+
+def bucket_label(start_day: int, grain: str) -> str:
+    d = pd.Timestamp(np.datetime64(int(start_day), "D"))
+    if grain == "week":
+        iso = d.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    return d.strftime("%Y-%m")
+
+
+def build_trend_payload(req: "TrendRequest"):
+    """
+    주/월 버킷별 추이.
+      - 기간에 완전히 포함된 버킷: 롤업 테이블에서 바로 조회
+      - 시작/끝에 걸친 부분 버킷(최대 2개): 일자 누적합으로 계산
+    → 분기/연 단위 조회도 버킷 수만큼만 일함 (일자 행을 순회하지 않음)
+    """
+    grain = req.granularity
+    start, end = parse_date(req.start_date), parse_date(req.end_date)
+    base = {"bnnr_id": req.bnnr_id, "start_date": req.start_date, "end_date": req.end_date, "granularity": grain}
+    error = check_range(start, end)
+    if error:
+        return {**base, "buckets": [], "summary": None, "message": error}
+
+    s_day, e_day = to_day(start), to_day(end)
+    daily = ROLLUPS.day_total if req.bnnr_id is None else BANNER_INDEX.get(req.bnnr_id)
+    table = ROLLUPS.tables[grain].get(req.bnnr_id)
+    if daily is None or table is None or daily.range_sum(s_day, e_day)[2] == 0:
+        return {**base, "buckets": [], "summary": None, "message": "해당 조건에 맞는 실적 데이터가 없습니다."}
+
+    first = int(bucket_start(np.array([s_day], dtype=np.int64), grain)[0])
+    if grain == "week":
+        starts = np.arange(first, e_day + 1, 7, dtype=np.int64)
+    else:
+        months = np.arange(np.datetime64(first, "D").astype("datetime64[M]"),
+                           np.datetime64(e_day, "D").astype("datetime64[M]") + 1)
+        starts = months.astype("datetime64[D]").astype(np.int64)
+    if len(starts) > MAX_TREND_BUCKETS:
+        return {**base, "buckets": [], "summary": None,
+                "message": f"버킷 수가 너무 많습니다(최대 {MAX_TREND_BUCKETS}개). 기간이나 집계 단위를 조정하세요."}
+
+    ends = bucket_end(starts, grain)
+    impr, click = table.values_at(starts)
+    partial = (starts < s_day) | (ends > e_day)
+    for i in np.flatnonzero(partial):
+        impr[i], click[i], _ = daily.range_sum(max(int(starts[i]), s_day), min(int(ends[i]), e_day))
+
+    clip_start = np.maximum(starts, s_day).astype("datetime64[D]")
+    clip_end = np.minimum(ends, e_day).astype("datetime64[D]")
+    ctr = np.divide(click, impr, out=np.zeros(len(impr), dtype=np.float64), where=impr != 0)
+    buckets = [
+        {
+            "period": bucket_label(b, grain),
+            "start": cs,
+            "end": ce,
+            "impression_sum": i,
+            "click_sum": c,
+            "ctr": r,
+            "partial": p,
+        }
+        for b, cs, ce, i, c, r, p in zip(
+            starts.tolist(), np.datetime_as_string(clip_start).tolist(), np.datetime_as_string(clip_end).tolist(),
+            impr.tolist(), click.tolist(), ctr.round(6).tolist(), partial.tolist(),
+        )
+    ]
+    total_impr = int(impr.sum())
+    total_click = int(click.sum())
+    summary = {
+        "total_impression": total_impr,
+        "total_click": total_click,
+        "ctr": round((total_click / total_impr) if total_impr else 0.0, 6),
+        "buckets": len(buckets),
+        "date_range": {"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")},
+    }
+    return {**base, "buckets": buckets, "summary": summary, "message": None}
+
+
 # ---------------------------------------------
 # 엔드포인트
 # ---------------------------------------------
@@ -181,6 +735,127 @@ def get_performance(request: PerformanceRequest):
     return JSONResponse(content=payload, media_type="application/json; charset=utf-8")
 
 
+@app.post("/tool/performance_compare")
+def get_performance_compare(request: CompareRequest):
+    """
+    입력 예:
+    {
+      "bnnr_ids": [1232, 5555],   # 생략하면 전체 배너
+      "start_date": "2025-08-09",
+      "end_date": "2025-08-11"
+    }
+
+    출력 예:
+    {
+      "bnnr_ids": [1232, 5555],
+      "grouped": [
+        {"bnnr_id": 1232, "impression_sum": 393, "click_sum": 38, "ctr": 0.096692, "days": 3},
+        {"bnnr_id": 5555, "impression_sum": 600, "click_sum": 67, "ctr": 0.111667, "days": 3}
+      ],
+      "missing_bnnr_ids": [],
+      "summary": {"total_impression": 993, "total_click": 105, "ctr": 0.10574, "banners": 2, "date_range": {...}},
+      "message": null
+    }
+    """
+    payload = build_compare_payload(request.bnnr_ids, request.start_date, request.end_date)
+    return JSONResponse(content=payload, media_type="application/json; charset=utf-8")
+
+
+@app.post("/tool/performance_ranking")
+def get_performance_ranking(request: RankingRequest):
+    """
+    입력 예:
+    {
+      "start_date": "2025-08-09",
+      "end_date": "2025-08-11",
+      "metric": "ctr",
+      "top_n": 3
+    }
+
+    출력 예:
+    {
+      "metric": "ctr",
+      "top_n": 3,
+      "candidates": 3,
+      "ranking": [
+        {"rank": 1, "bnnr_id": 5555, "impression_sum": 600, "click_sum": 67, "ctr": 0.111667},
+        ...
+      ],
+      "message": null
+    }
+    """
+    payload = build_ranking_payload(request)
+    return JSONResponse(content=payload, media_type="application/json; charset=utf-8")
+
+
+@app.post("/tool/performance_trend")
+def get_performance_trend(request: TrendRequest):
+    """
+    입력 예:
+    {
+      "bnnr_id": 1232,            # 생략하면 전체 배너 합계
+      "start_date": "2025-07-01",
+      "end_date": "2025-09-30",
+      "granularity": "month"
+    }
+
+    출력 예:
+    {
+      "bnnr_id": 1232,
+      "granularity": "month",
+      "buckets": [
+        {"period": "2025-08", "start": "2025-08-01", "end": "2025-08-31",
+         "impression_sum": 493, "click_sum": 47, "ctr": 0.095335, "partial": false},
+        ...
+      ],
+      "summary": {"total_impression": 493, "total_click": 47, "ctr": 0.095335, "buckets": 3, "date_range": {...}},
+      "message": null
+    }
+    """
+    payload = build_trend_payload(request)
+    return JSONResponse(content=payload, media_type="application/json; charset=utf-8")
+
+
+@app.post("/ingest")
+def ingest(request: IngestRequest):
+    """
+    일자별 실적 일괄 적재 (광고 파이프라인용, 에이전트 도구 아님)
+
+    입력 예:
+    {
+      "mode": "upsert",
+      "rows": [
+        {"bnnr_id": 1232, "base_dt": "2025-08-12", "impression_cnt": 140, "click_cnt": 13}
+      ]
+    }
+
+    출력 예:
+    {"accepted": true, "mode": "upsert", "rows": 1, "banners": 1, "inserted": 1, "updated": 0}
+    """
+    # 날짜는 한 번에 파싱/정규화
+    dts = pd.to_datetime([r.base_dt for r in request.rows], format="%Y-%m-%d", errors="coerce")
+    if dts.isna().any():
+        bad = request.rows[int(np.flatnonzero(dts.isna())[0])].base_dt
+        return JSONResponse(
+            content={"accepted": False, "error": f"날짜 형식은 YYYY-MM-DD 이어야 합니다: {bad}"},
+            status_code=400,
+        )
+    rows = [
+        [r.bnnr_id, dt, r.impression_cnt, r.click_cnt]
+        for r, dt in zip(request.rows, dts.strftime("%Y-%m-%d"))
+    ]
+
+    banners, inserted, updated = ingest_rows(rows, mode=request.mode)
+    return JSONResponse(content={
+        "accepted": True,
+        "mode": request.mode,
+        "rows": len(rows),
+        "banners": banners,
+        "inserted": inserted,
+        "updated": updated,
+    })
+
+
 @app.get("/tools")
 def list_tools():
     # 오픈API 식 파라미터 스키마 제공
@@ -197,6 +872,49 @@ def list_tools():
                 },
                 "required": ["bnnr_id", "start_date", "end_date"]
             }
+        },
+        {
+            "name": "performance_compare",
+            "description": "여러 배너 번호(생략 시 전체 배너)와 기간을 입력받아 배너별 실적 합계(노출/클릭/CTR)를 한 번에 비교합니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "bnnr_ids": {"type": "array", "items": {"type": "integer"}, "description": "배너 번호 목록 (생략 시 전체 배너)"},
+                    "start_date": {"type": "string", "description": "조회 시작일 (YYYY-MM-DD)"},
+                    "end_date": {"type": "string", "description": "조회 종료일 (YYYY-MM-DD)"}
+                },
+                "required": ["start_date", "end_date"]
+            }
+        },
+        {
+            "name": "performance_ranking",
+            "description": "기간 내 배너들을 CTR/클릭/노출 기준으로 순위를 매겨 상위 N개 배너를 반환합니다. (예: 이번 주 CTR 가장 높은 배너)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {"type": "string", "description": "조회 시작일 (YYYY-MM-DD)"},
+                    "end_date": {"type": "string", "description": "조회 종료일 (YYYY-MM-DD)"},
+                    "metric": {"type": "string", "enum": ["ctr", "click", "impression"], "description": "정렬 기준 (기본 ctr)"},
+                    "top_n": {"type": "integer", "description": "상위 N개 (기본 5)"},
+                    "min_impression": {"type": "integer", "description": "최소 노출 수 (선택, CTR 순위에서 표본이 작은 배너 제외)"},
+                    "bnnr_ids": {"type": "array", "items": {"type": "integer"}, "description": "후보 배너 번호 목록 (생략 시 전체 배너)"}
+                },
+                "required": ["start_date", "end_date"]
+            }
+        },
+        {
+            "name": "performance_trend",
+            "description": "배너 번호(생략 시 전체 배너 합계)와 기간을 입력받아 주(week)/월(month) 단위 실적 추이(노출/클릭/CTR)를 반환합니다. 분기·연간 등 긴 기간 조회에 적합합니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "bnnr_id": {"type": "integer", "description": "배너 번호 (생략 시 전체 배너 합계)"},
+                    "start_date": {"type": "string", "description": "조회 시작일 (YYYY-MM-DD)"},
+                    "end_date": {"type": "string", "description": "조회 종료일 (YYYY-MM-DD)"},
+                    "granularity": {"type": "string", "enum": ["week", "month"], "description": "집계 단위 (기본 week)"}
+                },
+                "required": ["start_date", "end_date"]
+            }
         }
     ]
 
@@ -0,0 +1,119 @@
+# bench_ad_minder.py
+# 배너 기간 조회 벤치마크: DataFrame 필터(기존 방식) vs 배너별 누적합 인덱스
+#
+# 실행 예:
+#   python bench_ad_minder.py --banners 2000 --days 1000 --queries 200
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import ad_minder
+
+
+def make_frame(n_banners: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.repeat(np.arange(1, n_banners + 1, dtype=np.int64), n_days)
+    days = np.tile(pd.date_range("2020-01-01", periods=n_days, freq="D").to_numpy(), n_banners)
+    impr = rng.integers(50, 5000, size=ids.size, dtype=np.int64)
+    click = (impr * rng.uniform(0.0, 0.2, size=ids.size)).astype(np.int64)
+    return pd.DataFrame({"bnnr_id": ids, "base_dt": days, "impression_cnt": impr, "click_cnt": click})
+
+
+def legacy_query(frame: pd.DataFrame, bnnr_id: int, start: pd.Timestamp, end: pd.Timestamp):
+    # 기존 build_payload 의 핵심 경로 (between 필터 → 정렬 → iterrows → groupby → apply)
+    subset = frame[(frame["bnnr_id"] == bnnr_id) & (frame["base_dt"].between(start, end))].copy()
+    subset.sort_values("base_dt", inplace=True)
+    records = [
+        {
+            "bnnr_id": int(row.bnnr_id),
+            "base_dt": row.base_dt.strftime("%Y-%m-%d"),
+            "impression_cnt": int(row.impression_cnt),
+            "click_cnt": int(row.click_cnt),
+            "ctr": round((row.click_cnt / row.impression_cnt) if row.impression_cnt else 0.0, 6),
+        }
+        for _, row in subset.iterrows()
+    ]
+    grouped_df = subset.groupby("bnnr_id", as_index=False).agg(
+        impression_sum=("impression_cnt", "sum"),
+        click_sum=("click_cnt", "sum"),
+    )
+    grouped_df["ctr"] = grouped_df.apply(
+        lambda r: (r["click_sum"] / r["impression_sum"]) if r["impression_sum"] else 0.0,
+        axis=1,
+    )
+    return records, grouped_df
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - t0) / max(len(queries), 1) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--banners", type=int, default=2000)
+    ap.add_argument("--days", type=int, default=1000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--range-days", type=int, default=7, help="조회 기간 길이(일)")
+    ap.add_argument("--legacy-queries", type=int, default=20, help="기존 방식은 느리므로 별도 횟수")
+    args = ap.parse_args()
+
+    frame = make_frame(args.banners, args.days)
+    print(f"rows={len(frame):,} (banners={args.banners:,} x days={args.days:,})")
+
+    t0 = time.perf_counter()
+    ad_minder.ROLLUPS = ad_minder.Rollups()
+    ad_minder.BANNER_INDEX = ad_minder.build_index(frame, ad_minder.ROLLUPS)
+    print(f"index + rollup build: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    t0 = time.perf_counter()
+    ad_minder.packed_index()
+    print(f"packed snapshot build: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    base = pd.Timestamp("2020-01-01")
+    queries = []
+    for _ in range(args.queries):
+        bnnr_id = int(rng.integers(1, args.banners + 1))
+        offset = int(rng.integers(0, max(args.days - args.range_days, 1)))
+        start = base + pd.Timedelta(days=offset)
+        end = start + pd.Timedelta(days=args.range_days - 1)
+        queries.append((bnnr_id, start, end))
+
+    def indexed(bnnr_id, start, end):
+        ad_minder.build_payload(bnnr_id, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+
+    def summary_only(bnnr_id, start, end):
+        ad_minder.BANNER_INDEX[bnnr_id].range_sum(ad_minder.to_day(start), ad_minder.to_day(end))
+
+    def ranking(bnnr_id, start, end):
+        ad_minder.build_ranking_payload(ad_minder.RankingRequest(
+            start_date=start.strftime("%Y-%m-%d"), end_date=end.strftime("%Y-%m-%d"), metric="ctr", top_n=10,
+        ))
+
+    legacy_ms = timed(lambda b, s, e: legacy_query(frame, b, s, e), queries[:args.legacy_queries])
+    indexed_ms = timed(indexed, queries)
+    summary_ms = timed(summary_only, queries)
+
+    print(f"legacy  build_payload : {legacy_ms:9.3f} ms/query")
+    print(f"indexed build_payload : {indexed_ms:9.3f} ms/query  (x{legacy_ms / indexed_ms:,.0f})")
+    print(f"indexed range_sum     : {summary_ms:9.3f} ms/query  (x{legacy_ms / summary_ms:,.0f})")
+    ranking_ms = timed(ranking, queries[:args.legacy_queries])
+    print(f"top-10 CTR ranking    : {ranking_ms:9.3f} ms/query  (전체 {args.banners:,}개 배너)")
+
+    # 전체 배너 합계 추이: 1주 vs 1년 (롤업 버킷 + 경계 일자)
+    for label, span, grain in (("1 week ", 7, "week"), ("1 year ", 365, "week"), ("1 year ", 365, "month")):
+        trend_queries = []
+        for bnnr_id, start, _ in queries[:args.legacy_queries]:
+            trend_queries.append((None, start, start + pd.Timedelta(days=span - 1), grain))
+        ms = timed(lambda b, s, e, g: ad_minder.build_trend_payload(ad_minder.TrendRequest(
+            bnnr_id=b, start_date=s.strftime("%Y-%m-%d"), end_date=e.strftime("%Y-%m-%d"), granularity=g,
+        )), trend_queries)
+        print(f"all-banner trend {label}: {ms:9.3f} ms/query  (granularity={grain})")
+
+
+if __name__ == "__main__":
+    main()
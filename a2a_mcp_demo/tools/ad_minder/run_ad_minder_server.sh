@@ -1,2 +1,2 @@
 export PYTHONDONTWRITEBYTECODE=1
-uvicorn ad_minder:app --port 8002 --reload
\ No newline at end of file
+uvicorn ad_minder:app --port ${PORT:-8002} --reload
\ No newline at end of file
@@ -0,0 +1,145 @@
+# bench_mail_sender.py
+# 메일 발송 처리량 벤치마크: 단건(동기) vs 큐(202 + 백그라운드) vs 대량(한 세션 파이프라이닝)
+# 실제 메일 서버 대신 같은 프로세스의 SMTP 대역(smtp_standin.py)을 사용 (MAIL_SENDER_TEST_MODE=1)
+#
+# 실행 예:
+#   python bench_mail_sender.py --messages 500 --concurrency 8 --latency-ms 5 --connect-latency-ms 50
+#   python bench_mail_sender.py --fail-rate 0.02 --drop-rate 0.01      # 실패 주입
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=8, help="단건/큐 경로의 동시 요청 스레드 수")
+    ap.add_argument("--batch", type=int, default=100, help="대량 발송 1회당 수신인 수")
+    ap.add_argument("--workers", type=int, default=4, help="큐 워커 스레드 수")
+    ap.add_argument("--latency-ms", type=float, default=5.0, help="대역 서버의 메시지당 응답 지연")
+    ap.add_argument("--connect-latency-ms", type=float, default=50.0, help="대역 서버의 접속(로그인) 지연")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--reject-rate", type=float, default=0.0)
+    ap.add_argument("--drop-rate", type=float, default=0.0)
+    ap.add_argument("--backoff-sec", type=float, default=0.05, help="큐 재시도 간격 (벤치마크용으로 짧게)")
+    return ap.parse_args()
+
+
+args = parse_args()
+os.environ["MAIL_SENDER_TEST_MODE"] = "1"
+os.environ["SMTP_STANDIN_LATENCY_MS"] = str(args.latency_ms)
+os.environ["SMTP_STANDIN_CONNECT_LATENCY_MS"] = str(args.connect_latency_ms)
+os.environ["SMTP_STANDIN_FAIL_RATE"] = str(args.fail_rate)
+os.environ["SMTP_STANDIN_REJECT_RATE"] = str(args.reject_rate)
+os.environ["SMTP_STANDIN_DROP_RATE"] = str(args.drop_rate)
+
+import mail_sender as ms  # noqa: E402  (테스트 모드 환경변수를 먼저 설정해야 함)
+
+NAMES = [f"user{i:03d}" for i in range(100)]
+ms.RECIPIENT_MAP.update({n: f"{n}@example.com" for n in NAMES})
+
+
+def report(label: str, n: int, elapsed: float, latencies_ms, ok: int):
+    lat = np.asarray(latencies_ms, dtype=float)
+    p50, p99 = (np.percentile(lat, 50), np.percentile(lat, 99)) if lat.size else (0.0, 0.0)
+    print(f"{label:<22}: {n / elapsed:9.1f} msg/s  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  ok {ok}/{n}")
+
+
+def reset_pool():
+    ms.smtp_pool.close_all()
+    ms.smtp_pool.stats = {k: 0 for k in ms.smtp_pool.stats}
+    ms.SMTP_STANDIN.stats = {k: 0 for k in ms.SMTP_STANDIN.stats}
+
+
+def pool_note():
+    return f"    (SMTP 세션 {ms.SMTP_STANDIN.stats['sessions']}개, 풀 재접속 {ms.smtp_pool.stats['reconnects']}회)"
+
+
+def run_concurrent(fn, n: int, concurrency: int):
+    def one(i):
+        t0 = time.perf_counter()
+        res = fn(i)
+        return (time.perf_counter() - t0) * 1000, res
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        out = list(ex.map(one, range(n)))
+    return time.perf_counter() - t0, [o[0] for o in out], [o[1] for o in out]
+
+
+def bench_single():
+    reset_pool()
+
+    def send(i):
+        req = ms.MappedMailRequest(name=NAMES[i % len(NAMES)], subject=f"bench {i}", body="hello", queued=False)
+        return ms.send_mail_mapped(req).status_code == 200
+
+    elapsed, lat, oks = run_concurrent(send, args.messages, args.concurrency)
+    report("single (sync)", args.messages, elapsed, lat, sum(oks))
+    print(pool_note())
+
+
+def bench_queued():
+    reset_pool()
+    path = os.path.join(tempfile.mkdtemp(prefix="mailq_"), "bench.db")
+    ms.mail_queue = ms.MailQueue(path=path)
+    ms.MAIL_QUEUE_BACKOFF_SEC = args.backoff_sec
+    ms.mail_queue.start(args.workers)
+
+    def enqueue(i):
+        req = ms.MappedMailRequest(name=NAMES[i % len(NAMES)], subject=f"bench {i}", body="hello", queued=True)
+        return ms.send_mail_mapped(req).status_code == 202
+
+    t0 = time.perf_counter()
+    elapsed, lat, oks = run_concurrent(enqueue, args.messages, args.concurrency)
+    report("queued (accept 202)", args.messages, elapsed, lat, sum(oks))
+
+    while True:
+        counts = ms.mail_queue.counts()
+        if counts["queued"] == 0 and counts["sending"] == 0:
+            break
+        time.sleep(0.01)
+    drained = time.perf_counter() - t0
+    ms.mail_queue.stop()
+    with ms.mail_queue._lock:
+        rows = ms.mail_queue._db.execute("SELECT (updated_at - created_at) * 1000 FROM outbox WHERE status='sent'").fetchall()
+    report("queued (delivered)", args.messages, drained, [r[0] for r in rows], counts["sent"])
+    print(pool_note() + f"  failed {counts['failed']}")
+
+
+def bench_bulk():
+    reset_pool()
+    batches = [range(s, min(s + args.batch, args.messages)) for s in range(0, args.messages, args.batch)]
+    batch_ms, ok = [], 0
+    t0 = time.perf_counter()
+    for batch in batches:
+        req = ms.BulkMailRequest(
+            subject_template="[bench] {name}님 안내",
+            body_template="{name}님, 이번 달 포인트는 {point:,}점입니다.",
+            recipients=[{"name": NAMES[i % len(NAMES)], "variables": {"point": i * 10}} for i in batch],
+        )
+        t1 = time.perf_counter()
+        res = ms.send_mail_bulk(req)
+        batch_ms.append((time.perf_counter() - t1) * 1000)
+        ok += json.loads(res.body)["sent"]
+    # 배치 수가 적어(기본 5개) 분위수는 의미가 없으므로 처리량과 배치 평균 지연만 표시
+    elapsed = time.perf_counter() - t0
+    mean = float(np.mean(batch_ms)) if batch_ms else 0.0
+    print(f"{f'bulk (batch={args.batch})':<22}: {args.messages / elapsed:9.1f} msg/s  "
+          f"mean {mean:8.2f} ms/batch ({len(batch_ms)} batches)  ok {ok}/{args.messages}")
+    print(pool_note())
+
+
+if __name__ == "__main__":
+    print(f"messages={args.messages} concurrency={args.concurrency} latency={args.latency_ms}ms "
+          f"connect={args.connect_latency_ms}ms fail={args.fail_rate} reject={args.reject_rate} drop={args.drop_rate}")
+    bench_single()
+    bench_queued()
+    bench_bulk()
+    ms.smtp_pool.close_all()
+    ms.SMTP_STANDIN.stop()
@@ -1,9 +1,16 @@
 import os
 import re
 import ssl
+import time
 import smtplib
 import json
-from typing import Dict
+import random
+import sqlite3
+import threading
+import string
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
 
 import uvicorn
 from fastapi import FastAPI
@@ -14,14 +21,23 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 
+# ----- 테스트 모드 -----
+# MAIL_SENDER_TEST_MODE=1 이면 실제 메일 서버 대신 같은 프로세스의 SMTP 대역(smtp_standin.py)으로 발송
+#   - config.json 없어도 동작, Gmail 자격 증명 검사 생략, TLS/SSL 끔
+#   - 대역 동작은 환경변수로 조절: SMTP_STANDIN_LATENCY_MS, SMTP_STANDIN_CONNECT_LATENCY_MS,
+#     SMTP_STANDIN_FAIL_RATE(451), SMTP_STANDIN_REJECT_RATE(550), SMTP_STANDIN_DROP_RATE(연결 끊김)
+TEST_MODE = os.getenv("MAIL_SENDER_TEST_MODE", "") in ("1", "true", "True")
+
 # ----- config.json 로드 -----
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
-if not os.path.exists(CONFIG_PATH):
+if os.path.exists(CONFIG_PATH):
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+elif TEST_MODE:
+    config = {}
+else:
     raise FileNotFoundError(f"Config file not found: {CONFIG_PATH}")
 
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = json.load(f)
-
 # ----- 간단 정규화 -----
 def _normalize_password(s: str) -> str:
     # 앱 비밀번호는 공백 보이는 형태라서, 모든 공백 제거
@@ -38,9 +54,43 @@ SMTP_USE_TLS = bool(config.get("SMTP_USE_TLS", True))   # 587 + TLS
 SMTP_USE_SSL = bool(config.get("SMTP_USE_SSL", False))  # 465 + SSL
 SMTP_TIMEOUT = int(config.get("SMTP_TIMEOUT", 10))
 
+# 연결 풀 설정
+SMTP_POOL_SIZE = int(config.get("SMTP_POOL_SIZE", 4))                 # 최대 동시 세션 수
+SMTP_POOL_IDLE_SEC = float(config.get("SMTP_POOL_IDLE_SEC", 60))      # 이 시간 이상 놀던 세션은 폐기
+SMTP_POOL_NOOP_AFTER_SEC = float(config.get("SMTP_POOL_NOOP_AFTER_SEC", 5))  # 이 시간 이상 놀던 세션은 NOOP 확인
+
+# 발송 큐 설정 (queued 모드: 202 즉시 응답 + 백그라운드 발송)
+MAIL_QUEUE_DEFAULT = bool(config.get("MAIL_QUEUE_DEFAULT", True))     # 요청에 queued 미지정 시 기본값
+MAIL_QUEUE_PATH = config.get("MAIL_QUEUE_PATH") or os.path.join(os.path.dirname(__file__), "mail_queue.db")
+MAIL_QUEUE_WORKERS = int(config.get("MAIL_QUEUE_WORKERS", 2))
+MAIL_QUEUE_MAX_ATTEMPTS = int(config.get("MAIL_QUEUE_MAX_ATTEMPTS", 5))
+MAIL_QUEUE_BACKOFF_SEC = float(config.get("MAIL_QUEUE_BACKOFF_SEC", 2))   # 재시도 간격: 2, 4, 8, ... 초 (+지터)
+MAIL_QUEUE_BACKOFF_MAX_SEC = float(config.get("MAIL_QUEUE_BACKOFF_MAX_SEC", 300))
+
+# 대량(템플릿) 발송
+MAIL_BULK_MAX_RECIPIENTS = int(config.get("MAIL_BULK_MAX_RECIPIENTS", 500))
+
 # 수신인 매핑
 RECIPIENT_MAP: Dict[str, str] = config.get("RECIPIENT_MAP", {})
 
+SMTP_STANDIN = None
+if TEST_MODE:
+    from smtp_standin import SMTPStandIn
+
+    SMTP_STANDIN = SMTPStandIn(
+        latency_ms=float(os.getenv("SMTP_STANDIN_LATENCY_MS", 0)),
+        connect_latency_ms=float(os.getenv("SMTP_STANDIN_CONNECT_LATENCY_MS", 0)),
+        fail_rate=float(os.getenv("SMTP_STANDIN_FAIL_RATE", 0)),
+        reject_rate=float(os.getenv("SMTP_STANDIN_REJECT_RATE", 0)),
+        drop_rate=float(os.getenv("SMTP_STANDIN_DROP_RATE", 0)),
+    ).start()
+    SMTP_HOST, SMTP_PORT = SMTP_STANDIN.host, SMTP_STANDIN.port
+    SMTP_USE_TLS = SMTP_USE_SSL = False
+    SMTP_USERNAME = SMTP_USERNAME or "tester@example.com"
+    SMTP_FROM = SMTP_FROM or SMTP_USERNAME
+    RECIPIENT_MAP = RECIPIENT_MAP or {"홍길동": "hong@example.com", "김철수": "kim@example.com"}
+    MAIL_QUEUE_PATH = config.get("MAIL_QUEUE_PATH") or os.path.join(os.path.dirname(__file__), "mail_queue_test.db")
+
 app = FastAPI(title="Mapped Mail Sender API")
 
 
@@ -48,12 +98,30 @@ class MappedMailRequest(BaseModel):
     name: str = Field(..., description="수신인 이름 (매핑 딕셔너리에 있는 키)")
     subject: str = Field(..., description="메일 제목")
     body: str = Field(..., description="메일 본문")
+    queued: Optional[bool] = Field(None, description="true면 큐에 넣고 202 즉시 응답 (미지정 시 MAIL_QUEUE_DEFAULT)")
+
+
+class BulkRecipient(BaseModel):
+    name: str = Field(..., description="수신인 이름 (매핑 딕셔너리에 있는 키)")
+    variables: Dict[str, Any] = Field(default_factory=dict, description="템플릿 치환 변수 (name은 자동 포함)")
+
+
+class BulkMailRequest(BaseModel):
+    subject_template: str = Field(..., description="메일 제목 템플릿 ({변수명} 형식)")
+    body_template: str = Field(..., description="메일 본문 템플릿 ({변수명} 형식, 중괄호 자체는 {{ }})")
+    recipients: List[BulkRecipient] = Field(..., min_length=1, description="수신인 목록과 수신인별 변수")
+
+
+class MailStatusRequest(BaseModel):
+    message_id: str = Field(..., description="발송 요청 시 받은 message_id")
 
 
 # ----- 유효성 검사 (에러를 '명확한 메시지'로 반환) -----
 def _validate_smtp_config():
     if not (SMTP_HOST and SMTP_PORT and SMTP_FROM):
         raise ValueError("SMTP_HOST/PORT/FROM 설정이 누락되었습니다.")
+    if TEST_MODE:
+        return   # 로컬 대역은 자격 증명을 검사하지 않음
     # Gmail 사용하는데 사용자명이 이메일 형식이 아니거나 비ASCII면 바로 실패 사유 반환
     if "gmail.com" in SMTP_HOST:
         if "@" not in SMTP_USERNAME:
@@ -67,31 +135,278 @@ def _validate_smtp_config():
         raise ValueError("Gmail 앱 비밀번호는 공백 제거 후 영문/숫자 16자리여야 합니다.")
 
 
-def _build_message(to_email: str, req: MappedMailRequest) -> MIMEMultipart:
+_FROM_HEADER = formataddr((str(Header(SMTP_FROM_NAME, "utf-8")), SMTP_FROM))
+_MSGID_DOMAIN = SMTP_FROM.rpartition("@")[2] or None   # make_msgid()의 getfqdn() 조회를 매번 하지 않도록
+
+
+def _compose(to_email: str, subject: str, body: str) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg["Message-ID"] = make_msgid()
-    msg["From"] = formataddr((str(Header(SMTP_FROM_NAME, "utf-8")), SMTP_FROM))
+    msg["Message-ID"] = make_msgid(domain=_MSGID_DOMAIN)
+    msg["From"] = _FROM_HEADER
     msg["To"] = to_email
-    msg["Subject"] = str(Header(req.subject, "utf-8"))
-    msg.attach(MIMEText(req.body, _subtype="plain", _charset="utf-8"))
+    msg["Subject"] = str(Header(subject, "utf-8"))
+    msg.attach(MIMEText(body, _subtype="plain", _charset="utf-8"))
     return msg
 
 
-def _send_message(msg: MIMEMultipart, to_email: str) -> None:
-    _validate_smtp_config()
+def _build_message(to_email: str, req: MappedMailRequest) -> MIMEMultipart:
+    return _compose(to_email, req.subject, req.body)
+
+
+# ----- 템플릿 -----
+class MailTemplate:
+    """
+    str.format 문법의 템플릿. 파싱/필드 검사는 생성 시 1회, 수신인별로는 format_map만 수행.
+    템플릿은 사용자/LLM 입력이므로 {변수명}과 숫자 서식({point:,})만 허용:
+    속성/인덱스 접근({name.__class__}, {items[0]}), 변환(!r), 서식 안의 중첩 필드({x:{y}})는 거부
+    (format_map이 변수 객체를 따라가며 평가하므로 내부 값이 새어 나갈 수 있음)
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        fields = set()
+        for _, field, spec, conversion in string.Formatter().parse(text):   # 문법 오류면 ValueError
+            if field is None:
+                continue
+            if not field or field[0].isdigit():
+                raise ValueError(f"템플릿 변수는 이름으로 지정해야 합니다: '{{{field}}}'")
+            if "." in field or "[" in field:
+                raise ValueError(f"템플릿 변수에 속성/인덱스 접근은 쓸 수 없습니다: '{{{field}}}'")
+            if conversion or "{" in spec:
+                raise ValueError(f"템플릿 변수에 변환(!)이나 중첩 서식은 쓸 수 없습니다: '{{{field}}}'")
+            fields.add(field)
+        self.fields = fields
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        missing = self.fields.difference(variables)
+        if missing:
+            raise KeyError(", ".join(sorted(missing)))
+        return self.text.format_map(variables)
+
+
+def _connect() -> smtplib.SMTP:
+    """새 SMTP 세션 생성 (EHLO/STARTTLS/login 까지 완료된 상태로 반환)"""
     if SMTP_USE_SSL:
         context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context, timeout=SMTP_TIMEOUT) as server:
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.sendmail(SMTP_FROM, [to_email], msg.as_string())
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context, timeout=SMTP_TIMEOUT)
     else:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    try:
+        if not SMTP_USE_SSL:
             server.ehlo()
             if SMTP_USE_TLS:
                 server.starttls(context=ssl.create_default_context())
                 server.ehlo()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.sendmail(SMTP_FROM, [to_email], msg.as_string())
+        server.login(SMTP_USERNAME, SMTP_PASSWORD)
+    except Exception:
+        _close_quietly(server)
+        raise
+    return server
+
+
+def _close_quietly(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+# ----- 인증된 SMTP 세션 풀 -----
+class SMTPPool:
+    """
+    로그인까지 끝난 SMTP 세션을 재사용하는 상한 있는 풀.
+      - 유휴 세션은 LIFO로 재사용 (가장 최근에 쓴 세션이 살아 있을 확률이 높음)
+      - SMTP_POOL_IDLE_SEC 이상 놀던 세션은 폐기, SMTP_POOL_NOOP_AFTER_SEC 이상이면 NOOP으로 확인
+      - 세션이 SMTP_POOL_SIZE개 모두 사용 중이면 SMTP_TIMEOUT 동안 반납을 기다림 (먼저 온 순서대로)
+    """
+
+    def __init__(self, connect=_connect, max_size: int = SMTP_POOL_SIZE,
+                 idle_sec: float = SMTP_POOL_IDLE_SEC, noop_after_sec: float = SMTP_POOL_NOOP_AFTER_SEC,
+                 wait_timeout: float = SMTP_TIMEOUT):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.idle_sec = idle_sec
+        self.noop_after_sec = noop_after_sec
+        self.wait_timeout = wait_timeout
+        self._idle: deque = deque()          # (server, last_used)
+        self._in_use = 0
+        self._waiters: deque = deque()       # 대기 순번 (반납 직후 재요청한 스레드가 새치기하지 않도록)
+        self._cond = threading.Condition()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "noop_failed": 0,
+                      "reconnects": 0, "discarded": 0, "waits": 0}
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self.stats[key] += 1
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+
+    def _available(self) -> bool:
+        return bool(self._idle) or self._in_use < self.max_size
+
+    def _checkout(self, fresh: bool = False) -> smtplib.SMTP:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            candidate = None
+            evicted = None
+            with self._cond:
+                if self._waiters or not self._available():
+                    ticket = object()
+                    self._waiters.append(ticket)
+                    self.stats["waits"] += 1
+                    try:
+                        while self._waiters[0] is not ticket or not self._available():
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise TimeoutError("SMTP 연결 풀에서 세션을 얻지 못했습니다 (모든 세션 사용 중).")
+                            self._cond.wait(remaining)
+                    finally:
+                        self._waiters.remove(ticket)
+                        self._cond.notify_all()   # 다음 순번에게 차례 알림
+                if self._idle:
+                    if fresh:
+                        evicted = self._idle.popleft()[0]   # 상한 유지를 위해 가장 오래된 유휴 세션 정리
+                    else:
+                        candidate = self._idle.pop()
+                self._in_use += 1
+            if evicted is not None:
+                _close_quietly(evicted)
+
+            # 네트워크 왕복(NOOP/접속)은 락 밖에서
+            if candidate is None:
+                self._count("misses")
+                try:
+                    return self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            server, last_used = candidate
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_sec:
+                self._count("expired")
+            elif idle_for > self.noop_after_sec and not self._healthy(server):
+                self._count("noop_failed")
+            else:
+                self._count("hits")
+                return server
+            _close_quietly(server)
+            self._release_slot()
+
+    @staticmethod
+    def _healthy(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkin(self, server: smtplib.SMTP, reusable: bool) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((server, time.monotonic()))
+            else:
+                self.stats["discarded"] += 1
+            self._cond.notify_all()
+        if not reusable:
+            _close_quietly(server)
+
+    @contextmanager
+    def connection(self, fresh: bool = False):
+        server = self._checkout(fresh)
+        reusable = False
+        try:
+            yield server
+            reusable = True
+        except smtplib.SMTPServerDisconnected:
+            raise   # 세션이 끊김 → 폐기
+        except smtplib.SMTPResponseException as e:
+            # 발신/데이터 거부 등 메시지 단위 오류는 세션 재사용, 421(서비스 종료)은 폐기
+            reusable = e.smtp_code != 421
+            raise
+        except smtplib.SMTPRecipientsRefused:
+            reusable = True
+            raise
+        finally:
+            self._checkin(server, reusable)
+
+    def send(self, from_addr: str, to_addrs, msg_str: str) -> None:
+        """sendmail 1회. 재사용 세션이 끊겨 있었으면 새로 접속한 세션으로 1회 재시도."""
+        try:
+            with self.connection() as server:
+                server.sendmail(from_addr, to_addrs, msg_str)
+        except smtplib.SMTPServerDisconnected:
+            self._count("reconnects")
+            with self.connection(fresh=True) as server:
+                server.sendmail(from_addr, to_addrs, msg_str)
+
+    def send_many(self, from_addr: str, items: List[Tuple[str, str]]) -> List[Optional[Exception]]:
+        """
+        한 세션으로 여러 통을 연달아 sendmail. 결과는 items 순서대로 None(성공) 또는 예외.
+          - 수신 거부/데이터 거부 등 메시지 단위 오류는 기록 후 같은 세션으로 계속
+          - 세션이 끊기면(disconnect/421) 새로 접속해 남은 메시지부터 이어감
+            (새 세션에서 한 통도 못 보내고 또 끊기면 나머지는 그 오류로 실패 처리)
+        """
+        results: List[Optional[Exception]] = [None] * len(items)
+        i = 0
+        fresh = False
+        while i < len(items):
+            start = i
+            try:
+                with self.connection(fresh=fresh) as server:
+                    while i < len(items):
+                        to_email, msg_str = items[i]
+                        try:
+                            server.sendmail(from_addr, [to_email], msg_str)
+                        except smtplib.SMTPRecipientsRefused as e:
+                            results[i] = e
+                        except smtplib.SMTPResponseException as e:
+                            if e.smtp_code == 421:
+                                raise
+                            results[i] = e
+                        i += 1
+            except Exception as e:
+                lost = isinstance(e, smtplib.SMTPServerDisconnected) or (
+                    isinstance(e, smtplib.SMTPResponseException) and e.smtp_code == 421)
+                if lost and (i > start or not fresh):
+                    self._count("reconnects")
+                    fresh = True
+                    continue
+                for j in range(i, len(items)):
+                    results[j] = e
+                break
+        return results
+
+    def close_all(self) -> None:
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for server, _ in idle:
+            _close_quietly(server)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+                "hit_ratio": round(self.stats["hits"] / total, 4) if total else 0.0,
+            }
+
+
+smtp_pool = SMTPPool()
+
+
+def _send_message(msg: MIMEMultipart, to_email: str) -> None:
+    _validate_smtp_config()
+    smtp_pool.send(SMTP_FROM, [to_email], msg.as_string())
 
 
 # ----- 에러 → (status, payload) 변환을 최대한 단순화 -----
@@ -117,14 +432,174 @@ def _to_error_response(e: Exception):
     return 500, {"accepted": False, "error": e.__class__.__name__, "detail": str(e)}
 
 
+def _is_transient(e: Exception) -> bool:
+    """재시도할 만한 오류인지: 네트워크/서버 오류(502 계열) 또는 SMTP 4xx 응답"""
+    if isinstance(e, smtplib.SMTPResponseException) and 400 <= e.smtp_code < 500:
+        return True
+    status, _ = _to_error_response(e)
+    return status == 502
+
+
+# ----- 영속 발송 큐 (SQLite) -----
+class MailQueue:
+    """
+    queued → sending → sent | failed 상태를 갖는 로컬 발송 큐.
+      - 요청 스레드는 enqueue 후 바로 반환, 워커 스레드가 꺼내서 smtp_pool로 발송
+      - 일시적 오류는 지수 백오프로 재시도 (MAIL_QUEUE_MAX_ATTEMPTS 회까지)
+      - 프로세스가 죽어 'sending'에 남은 건은 재시작 시 다시 queued로 (at-least-once)
+    """
+
+    def __init__(self, path: str = MAIL_QUEUE_PATH, send=None):
+        self._send = send or (lambda row: smtp_pool.send(SMTP_FROM, [row["to_email"]], row["raw"]))
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._workers: list = []
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    message_id TEXT PRIMARY KEY,
+                    to_email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    raw TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox(status, next_attempt_at)")
+            self._db.execute("UPDATE outbox SET status='queued' WHERE status='sending'")
+
+    def enqueue(self, message_id: str, to_email: str, subject: str, raw: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO outbox (message_id, to_email, subject, raw, status, next_attempt_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (message_id, to_email, subject, raw, now, now, now),
+            )
+        self._wakeup.set()
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with self._lock:
+            return self._db.execute(
+                "UPDATE outbox SET status='sending', attempts=attempts+1, updated_at=?"
+                " WHERE message_id = (SELECT message_id FROM outbox WHERE status='queued' AND next_attempt_at<=?"
+                "                     ORDER BY next_attempt_at LIMIT 1)"
+                " RETURNING *",
+                (now, now),
+            ).fetchone()
+
+    def _finish(self, message_id: str, status: str, error: Optional[str] = None, retry_in: float = 0.0) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET status=?, last_error=?, next_attempt_at=?, updated_at=? WHERE message_id=?",
+                (status, error, now + retry_in, now, message_id),
+            )
+
+    def process_one(self) -> bool:
+        """due 상태인 메일 1건 처리. 처리할 게 없으면 False."""
+        row = self._claim()
+        if row is None:
+            return False
+        try:
+            self._send(row)
+            self._finish(row["message_id"], "sent")
+        except Exception as e:
+            _, payload = _to_error_response(e)
+            error = json.dumps(payload, ensure_ascii=False, default=str)
+            if _is_transient(e) and row["attempts"] < MAIL_QUEUE_MAX_ATTEMPTS:
+                delay = min(MAIL_QUEUE_BACKOFF_SEC * (2 ** (row["attempts"] - 1)), MAIL_QUEUE_BACKOFF_MAX_SEC)
+                self._finish(row["message_id"], "queued", error, retry_in=delay * random.uniform(0.8, 1.2))
+            else:
+                self._finish(row["message_id"], "failed", error)
+        return True
+
+    def _next_due_in(self) -> float:
+        with self._lock:
+            row = self._db.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status='queued'").fetchone()
+        if row[0] is None:
+            return 1.0
+        return max(0.0, min(1.0, row[0] - time.time()))
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            if self.process_one():
+                continue
+            self._wakeup.wait(self._next_due_in())
+            self._wakeup.clear()
+
+    def start(self, workers: int = MAIL_QUEUE_WORKERS) -> None:
+        self._stop.clear()
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._worker, name=f"mail-queue-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        for t in self._workers:
+            t.join(timeout)
+        self._workers = []
+
+    def status(self, message_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT message_id, to_email, subject, status, attempts, last_error, created_at, updated_at"
+                " FROM outbox WHERE message_id=?",
+                (message_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        out = dict(row)
+        if out["last_error"]:
+            try:
+                out["last_error"] = json.loads(out["last_error"])
+            except ValueError:
+                pass
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {"queued": 0, "sending": 0, "sent": 0, "failed": 0, **{r[0]: r[1] for r in rows}}
+
+
+mail_queue = MailQueue()
+
+
 # ----- API -----
+@app.on_event("startup")
+def _start_queue_workers():
+    mail_queue.start()
+
+
 @app.post("/tool/send_mail_mapped")
 def send_mail_mapped(req: MappedMailRequest):
     to_email = RECIPIENT_MAP.get(req.name)
     if not to_email:
         return JSONResponse(content={"accepted": False, "error": f"'{req.name}' 수신인을 찾을 수 없습니다."}, status_code=404)
+    queued = MAIL_QUEUE_DEFAULT if req.queued is None else req.queued
     try:
         msg = _build_message(to_email, req)
+        if queued:
+            _validate_smtp_config()   # 설정 오류는 큐에 넣기 전에 바로 알림
+            mail_queue.enqueue(msg["Message-ID"], to_email, req.subject, msg.as_string())
+            return JSONResponse(
+                content={"accepted": True, "queued": True, "status": "queued",
+                         "to": to_email, "subject": req.subject, "message_id": msg["Message-ID"]},
+                status_code=202,
+            )
         _send_message(msg, to_email)  # 동기 전송
         return JSONResponse(content={"accepted": True, "to": to_email, "subject": req.subject, "message_id": msg["Message-ID"]})
     except Exception as e:
@@ -132,6 +607,101 @@ def send_mail_mapped(req: MappedMailRequest):
         return JSONResponse(content=payload, status_code=status)
 
 
+@app.post("/tool/send_mail_bulk")
+def send_mail_bulk(req: BulkMailRequest):
+    if len(req.recipients) > MAIL_BULK_MAX_RECIPIENTS:
+        return JSONResponse(
+            content={"accepted": False, "error": f"수신인은 한 번에 최대 {MAIL_BULK_MAX_RECIPIENTS}명까지 가능합니다."},
+            status_code=400,
+        )
+    try:
+        _validate_smtp_config()
+        subject_tpl = MailTemplate(req.subject_template)
+        body_tpl = MailTemplate(req.body_template)
+    except ValueError as e:
+        return JSONResponse(content={"accepted": False, "error": "ValueError", "detail": str(e)}, status_code=400)
+
+    # 1) 수신인별 렌더링 + MIME 생성 (발송 전 단계의 실패는 그 수신인만 제외)
+    results: List[Dict[str, Any]] = []
+    outgoing: List[Tuple[str, str]] = []
+    slots: List[int] = []
+    for r in req.recipients:
+        to_email = RECIPIENT_MAP.get(r.name)
+        item: Dict[str, Any] = {"name": r.name, "to": to_email}
+        results.append(item)
+        if not to_email:
+            item.update(accepted=False, error=f"'{r.name}' 수신인을 찾을 수 없습니다.")
+            continue
+        variables = {"name": r.name, **r.variables}
+        try:
+            msg = _compose(to_email, subject_tpl.render(variables), body_tpl.render(variables))
+        except KeyError as e:
+            item.update(accepted=False, error=f"템플릿 변수가 없습니다: {e.args[0]}")
+            continue
+        except (ValueError, IndexError, AttributeError) as e:
+            item.update(accepted=False, error=f"템플릿 렌더링 실패: {e}")
+            continue
+        item["message_id"] = msg["Message-ID"]
+        outgoing.append((to_email, msg.as_string()))
+        slots.append(len(results) - 1)
+
+    # 2) 한 세션으로 파이프라이닝 발송
+    errors = smtp_pool.send_many(SMTP_FROM, outgoing) if outgoing else []
+    for slot, err in zip(slots, errors):
+        if err is None:
+            results[slot]["accepted"] = True
+        else:
+            _, payload = _to_error_response(err)
+            results[slot].update(payload)
+
+    sent = sum(1 for r in results if r.get("accepted"))
+    status = 200
+    if outgoing and sent == 0 and errors[0] is not None and all(e is errors[0] for e in errors):
+        status, _ = _to_error_response(errors[0])   # 세션/인증 단위 실패로 한 통도 못 보냄
+    return JSONResponse(
+        content={
+            "accepted": sent > 0,
+            "total": len(results),
+            "sent": sent,
+            "failed": len(results) - sent,
+            "results": results,
+            "message": f"{len(results)}명 중 {sent}명에게 발송했습니다.",
+        },
+        status_code=status,
+    )
+
+
+@app.post("/tool/mail_status")
+def mail_status(req: MailStatusRequest):
+    info = mail_queue.status(req.message_id.strip())
+    if info is None:
+        return JSONResponse(content={"found": False, "error": "해당 message_id의 발송 요청을 찾을 수 없습니다."}, status_code=404)
+    return JSONResponse(content={"found": True, **info})
+
+
+@app.get("/metrics/mail_queue")
+def mail_queue_metrics():
+    return JSONResponse(content=mail_queue.counts())
+
+
+@app.get("/metrics/smtp_standin")
+def smtp_standin_metrics():
+    if SMTP_STANDIN is None:
+        return JSONResponse(content={"error": "테스트 모드(MAIL_SENDER_TEST_MODE=1)에서만 사용할 수 있습니다."}, status_code=404)
+    return JSONResponse(content=SMTP_STANDIN.snapshot())
+
+
+@app.get("/metrics/smtp_pool")
+def smtp_pool_metrics():
+    return JSONResponse(content=smtp_pool.snapshot())
+
+
+@app.on_event("shutdown")
+def _close_pool():
+    mail_queue.stop()
+    smtp_pool.close_all()
+
+
 # (필요하면 유지, 아니면 삭제해도 됨)
 @app.get("/tools")
 def list_tools():
@@ -143,10 +713,44 @@ def list_tools():
             "properties": {
                 "name": {"type": "string", "description": "수신인 이름 (config.json의 RECIPIENT_MAP 키)"},
                 "subject": {"type": "string", "description": "메일 제목"},
-                "body": {"type": "string", "description": "메일 본문"}
+                "body": {"type": "string", "description": "메일 본문"},
+                "queued": {"type": "boolean", "description": "true면 큐에 넣고 즉시 응답(기본), false면 발송 완료까지 대기"}
             },
             "required": ["name", "subject", "body"]
         }
+    }, {
+        "name": "send_mail_bulk",
+        "description": "제목/본문 템플릿과 수신인 목록(수신인별 변수)을 받아 한 번에 여러 명에게 개인화된 메일을 발송하고 수신인별 결과를 반환합니다.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "subject_template": {"type": "string", "description": "메일 제목 템플릿. {name}, {변수명} 형식으로 치환"},
+                "body_template": {"type": "string", "description": "메일 본문 템플릿. {name}, {변수명} 형식으로 치환 (중괄호 자체는 {{ }})"},
+                "recipients": {
+                    "type": "array",
+                    "description": "수신인 목록",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "수신인 이름 (config.json의 RECIPIENT_MAP 키)"},
+                            "variables": {"type": "object", "description": "이 수신인에게 쓸 템플릿 변수 (name은 자동 포함)"}
+                        },
+                        "required": ["name"]
+                    }
+                }
+            },
+            "required": ["subject_template", "body_template", "recipients"]
+        }
+    }, {
+        "name": "mail_status",
+        "description": "메일 발송 요청 시 받은 message_id로 발송 상태(queued/sending/sent/failed)를 조회합니다.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "message_id": {"type": "string", "description": "발송 요청 응답의 message_id"}
+            },
+            "required": ["message_id"]
+        }
     }]
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+# smtp_standin.py
+# 로컬 테스트/벤치마크용 SMTP 서버 대역 (실제 발송 없음)
+#   - smtplib이 쓰는 명령(EHLO/AUTH/MAIL/RCPT/DATA/RSET/NOOP/QUIT)만 처리
+#   - 지연(접속/메시지)과 실패(일시 오류 451, 수신 거부 550, 연결 끊김)를 확률로 주입
+#
+# 단독 실행 예:
+#   python smtp_standin.py --port 2525 --latency-ms 20 --fail-rate 0.01
+import argparse
+import random
+import socketserver
+import threading
+import time
+from typing import Dict, Optional
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def _read_data(self) -> int:
+        size = 0
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                return size
+            size += len(line)
+
+    def handle(self) -> None:
+        standin = self.server.standin
+        standin._count("sessions")
+        standin._sleep(standin.connect_latency_ms)   # TCP/TLS/로그인 비용 흉내
+        self._reply("220 smtp-standin ESMTP ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            cmd = raw.decode("utf-8", "replace").strip()
+            verb = cmd.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-smtp-standin\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "HELO":
+                self._reply("250 smtp-standin")
+            elif verb == "AUTH":
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                self._reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                if standin._roll(standin.reject_rate):
+                    standin._count("rejected")
+                    self._reply("550 5.1.1 Recipient rejected (injected)")
+                else:
+                    self._reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                self._read_data()
+                standin._sleep(standin.latency_ms)
+                if standin._roll(standin.drop_rate):
+                    standin._count("dropped")
+                    return   # 응답 없이 연결 종료 → 클라이언트는 SMTPServerDisconnected
+                if standin._roll(standin.fail_rate):
+                    standin._count("temp_failed")
+                    self._reply("451 4.3.0 Temporary failure (injected)")
+                else:
+                    standin._count("accepted")
+                    self._reply("250 2.0.0 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 2.0.0 OK")
+            elif verb == "QUIT":
+                self._reply("221 2.0.0 Bye")
+                return
+            else:
+                self._reply("502 5.5.2 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    standin: "SMTPStandIn"
+
+
+class SMTPStandIn:
+    """
+    같은 프로세스 안에서 스레드로 도는 SMTP 서버 대역.
+    latency_ms: 메시지(DATA)당 응답 지연, connect_latency_ms: 접속 시 인사말 지연
+    fail_rate: DATA 후 451(일시 오류), reject_rate: RCPT 550, drop_rate: DATA 후 연결 끊기
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 connect_latency_ms: float = 0.0, fail_rate: float = 0.0, reject_rate: float = 0.0,
+                 drop_rate: float = 0.0, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.connect_latency_ms = connect_latency_ms
+        self.fail_rate = fail_rate
+        self.reject_rate = reject_rate
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self.stats = {"sessions": 0, "accepted": 0, "temp_failed": 0, "rejected": 0, "dropped": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    @staticmethod
+    def _sleep(ms: float) -> None:
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def start(self) -> "SMTPStandIn":
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.standin = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="smtp-standin", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                **self.stats,
+                "port": self.port,
+                "latency_ms": self.latency_ms,
+                "connect_latency_ms": self.connect_latency_ms,
+                "fail_rate": self.fail_rate,
+                "reject_rate": self.reject_rate,
+                "drop_rate": self.drop_rate,
+            }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=2525)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--connect-latency-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--reject-rate", type=float, default=0.0)
+    ap.add_argument("--drop-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    standin = SMTPStandIn(args.host, args.port, args.latency_ms, args.connect_latency_ms,
+                          args.fail_rate, args.reject_rate, args.drop_rate).start()
+    print(f"SMTP stand-in listening on {standin.host}:{standin.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
@@ -1,2 +1,2 @@
 export PYTHONDONTWRITEBYTECODE=1
-uvicorn transaction:app --port 8001 --reload
\ No newline at end of file
+uvicorn transaction:app --port ${PORT:-8001} --reload
\ No newline at end of file
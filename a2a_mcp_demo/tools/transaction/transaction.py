@@ -1,10 +1,12 @@
 # spend_api_min.py
+import json
 import uvicorn
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from pydantic import BaseModel, Field
-from fastapi.responses import JSONResponse
-from typing import Optional, List, Dict
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional, List, Dict, Iterator, Tuple
 
 app = FastAPI(title="Transaction API")
 
@@ -55,39 +57,170 @@ data = [
 df = pd.DataFrame(data)
 df["일자"] = pd.to_datetime(df["일자"], format="%Y-%m-%d", errors="coerce")
 
+# 이름 → 연속 구간 인덱스
+# - 이름/일자/카테고리 순으로 한 번만 정렬해 두면 고객별 거래는 [lo, hi) 연속 구간이 됨
+# - 행 위치가 고정되므로 커서(다음 페이지 시작 위치)로 그대로 사용 가능
+df = df.sort_values(["이름", "일자", "카테고리(대분류)", "카테고리(중분류)"], kind="mergesort").reset_index(drop=True)
+NAME_SPANS: Dict[str, Tuple[int, int]] = {
+    name: (int(pos[0]), int(pos[-1]) + 1)
+    for name, pos in df.groupby("이름", sort=False).indices.items()
+}
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_ROWS = 500   # NDJSON 스트리밍 시 한 번에 변환하는 행 수
+
 # ----------------------- 스키마 -----------------------
-class TxnRequest(BaseModel):
+class PageParams(BaseModel):
+    limit: Optional[int] = Field(None, ge=1, description="페이지당 최대 레코드 수 (미지정 시 전체)")
+    cursor: Optional[str] = Field(None, description="이전 응답의 next_cursor (다음 페이지 조회용)")
+    format: Optional[str] = Field(None, description="'ndjson'이면 레코드를 한 줄씩 스트리밍")
+
+class TxnRequest(PageParams):
     name: str = Field(..., description="고객 이름 (정확 매칭)")
 
-class CategoryOnlyRequest(BaseModel):
+class CategoryOnlyRequest(PageParams):
     name: str = Field(..., description="고객 이름 (정확 매칭)")
     category_major: str = Field(..., description="카테고리(대분류) (예: 식비/여가/쇼핑/교통/구독/간식/운동 등)")
 
+MAX_BATCH_NAMES = 50
+
+class BatchTxnRequest(BaseModel):
+    names: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_NAMES, description="고객 이름 목록 (정확 매칭)")
+    category_major: Optional[str] = Field(None, description="카테고리(대분류) (선택)")
+    limit: Optional[int] = Field(None, ge=1, description="고객별 최대 레코드 수 (선택)")
+
 # ----------------------- 공통 변환 -----------------------
 from typing import Any
+RECORD_COLUMNS = ["이름", "일자", "지출내역", "카테고리(대분류)", "카테고리(중분류)", "금액"]
+
+def iter_records(sub: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+    for name, dt, desc, major, minor, amount in sub[RECORD_COLUMNS].itertuples(index=False, name=None):
+        yield {
+            "이름": name,
+            "일자": dt.strftime("%Y-%m-%d") if pd.notna(dt) else None,
+            "지출내역": desc,
+            "카테고리(대분류)": major,
+            "카테고리(중분류)": minor,
+            "금액": int(amount),
+        }
+
 def to_records(sub: pd.DataFrame) -> List[Dict[str, Any]]:
     sub_sorted = sub.sort_values(["일자", "카테고리(대분류)", "카테고리(중분류)"])
-    return [
-        {
-            "이름": r["이름"],
-            "일자": r["일자"].strftime("%Y-%m-%d") if pd.notna(r["일자"]) else None,
-            "지출내역": r["지출내역"],
-            "카테고리(대분류)": r["카테고리(대분류)"],
-            "카테고리(중분류)": r["카테고리(중분류)"],
-            "금액": int(r["금액"]),
-        }
-        for _, r in sub_sorted.iterrows()
-    ]
+    return list(iter_records(sub_sorted))
+
+# ----------------------- 조회/페이지네이션 -----------------------
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor in (None, ""):
+        return 0
+    try:
+        pos = int(cursor)
+    except (TypeError, ValueError):
+        return None
+    return pos if pos >= 0 else None
+
+def select_positions(name: str, category_major: Optional[str] = None, start: int = 0) -> np.ndarray:
+    """
+    조건에 맞는 행 위치(정렬된 df 기준)를 오름차순으로 반환.
+    - 이름은 NAME_SPANS 구간으로 바로 자르고, 카테고리는 그 구간 안에서만 마스킹
+    - start(커서) 이전 행은 제외
+    """
+    lo, hi = NAME_SPANS.get(name, (0, 0))
+    lo = max(lo, start)
+    if lo >= hi:
+        return np.empty(0, dtype=np.int64)
+    if category_major is None:
+        return np.arange(lo, hi, dtype=np.int64)
+    mask = df["카테고리(대분류)"].to_numpy()[lo:hi] == category_major
+    return lo + np.flatnonzero(mask)
+
+def select_positions_batch(names: List[str], category_major: Optional[str] = None) -> List[np.ndarray]:
+    """
+    여러 고객의 행 위치를 한 번에 계산.
+    - 이름별 구간을 이어 붙인 뒤 카테고리 마스크는 전체에 대해 1회만 적용
+    - 반환 순서는 names 순서와 동일
+    """
+    spans = [NAME_SPANS.get(n, (0, 0)) for n in names]
+    lengths = np.array([hi - lo for lo, hi in spans], dtype=np.int64)
+    if lengths.sum() == 0:
+        return [np.empty(0, dtype=np.int64) for _ in names]
+    positions = np.concatenate([np.arange(lo, hi, dtype=np.int64) for lo, hi in spans])
+    owner = np.repeat(np.arange(len(names)), lengths)
+    if category_major is not None:
+        keep = df["카테고리(대분류)"].to_numpy()[positions] == category_major
+        positions, owner = positions[keep], owner[keep]
+    bounds = np.searchsorted(owner, np.arange(len(names) + 1))
+    return [positions[bounds[i]:bounds[i + 1]] for i in range(len(names))]
+
+def paginate(positions: np.ndarray, limit: Optional[int]) -> Tuple[np.ndarray, Optional[str]]:
+    if limit is None or len(positions) <= limit:
+        return positions, None
+    page = positions[:limit]
+    return page, str(int(page[-1]) + 1)
+
+def wants_ndjson(req: PageParams, request: Request) -> bool:
+    if (req.format or "").lower() == "ndjson":
+        return True
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def ndjson_stream(meta: Dict[str, Any], positions: np.ndarray, next_cursor: Optional[str]) -> Iterator[bytes]:
+    """
+    NDJSON 스트림:
+      1행: {"_meta": {...요청 정보}}
+      N행: 레코드 1건씩
+      끝행: {"_end": {"count", "next_cursor", "message"}}
+    STREAM_CHUNK_ROWS 단위로 행을 꺼내 변환하므로 서버 메모리는 결과 크기와 무관.
+    """
+    yield (json.dumps({"_meta": meta}, ensure_ascii=False) + "\n").encode("utf-8")
+    count = 0
+    for i in range(0, len(positions), STREAM_CHUNK_ROWS):
+        chunk = df.iloc[positions[i:i + STREAM_CHUNK_ROWS]]
+        for rec in iter_records(chunk):
+            count += 1
+            yield (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+    end = {
+        "count": count,
+        "next_cursor": next_cursor,
+        "message": None if count else "해당 조건에 맞는 거래 내역이 없습니다.",
+    }
+    yield (json.dumps({"_end": end}, ensure_ascii=False) + "\n").encode("utf-8")
+
+def respond(meta: Dict[str, Any], req: PageParams, request: Request,
+            category_major: Optional[str] = None):
+    start = parse_cursor(req.cursor)
+    if start is None:
+        return JSONResponse(
+            content={**meta, "records": [], "next_cursor": None, "message": "cursor 값이 올바르지 않습니다."},
+            status_code=400,
+            media_type="application/json; charset=utf-8",
+        )
+    positions = select_positions(req.name.strip(), category_major, start)
+    positions, next_cursor = paginate(positions, req.limit)
+
+    if wants_ndjson(req, request):
+        return StreamingResponse(ndjson_stream(meta, positions, next_cursor), media_type=NDJSON_MEDIA_TYPE)
+
+    records = list(iter_records(df.iloc[positions]))
+    return JSONResponse(
+        content={
+            **meta,
+            "records": records,
+            "next_cursor": next_cursor,
+            "message": None if records else "해당 조건에 맞는 거래 내역이 없습니다.",
+        },
+        media_type="application/json; charset=utf-8",
+    )
 
 # ----------------------- 엔드포인트 -----------------------
 # (1) 이름만 받아 전체 거래 반환
 @app.post("/tool/transactions")
-def get_transactions(req: TxnRequest):
+def get_transactions(req: TxnRequest, request: Request):
     """
     입력 예:
     {
       "name": "조용걸"
     }
+    (선택) "limit": 페이지 크기, "cursor": 이전 응답의 next_cursor,
+           "format": "ndjson" 또는 Accept: application/x-ndjson → 한 줄에 1건씩 스트리밍
 
     출력 예(전체 거래 내역 반환):
     {
@@ -111,35 +244,65 @@ def get_transactions(req: TxnRequest):
         },
         ...
       ],
+      "next_cursor": null,
       "message": null
     }
     """
-    mask = (df["이름"] == req.name.strip())
-    sub = df.loc[mask].copy()
-    records = to_records(sub)
-
-    return JSONResponse(
-        content={
-            "name": req.name,
-            "records": records,
-            "message": None if records else "해당 조건에 맞는 거래 내역이 없습니다.",
-        },
-        media_type="application/json; charset=utf-8",
-    )
+    return respond({"name": req.name}, req, request)
 
 
 # (2) 이름 + 대분류로 필터
 @app.post("/tool/transactions_by_category")
-def get_transactions_by_category(req: CategoryOnlyRequest):
-    mask = (df["이름"] == req.name.strip()) & (df["카테고리(대분류)"] == req.category_major)
-    sub = df.loc[mask].copy()
-    records = to_records(sub)
+def get_transactions_by_category(req: CategoryOnlyRequest, request: Request):
+    return respond(
+        {"name": req.name, "category_major": req.category_major},
+        req, request, category_major=req.category_major,
+    )
+
+# (3) 여러 고객 일괄 조회 (+ 선택적 대분류 필터)
+@app.post("/tool/transactions_batch")
+def get_transactions_batch(req: BatchTxnRequest):
+    """
+    입력 예:
+    {
+      "names": ["김민수", "박지훈"],
+      "category_major": "쇼핑"   # 선택
+    }
+
+    출력 예:
+    {
+      "names": ["김민수", "박지훈"],
+      "category_major": "쇼핑",
+      "results": [
+        {"name": "김민수", "count": 2, "total_amount": 50800, "records": [...], "message": null},
+        {"name": "박지훈", "count": 3, "total_amount": 108000, "records": [...], "message": null}
+      ],
+      "message": null
+    }
+    """
+    names = list(dict.fromkeys(n.strip() for n in req.names if n and n.strip()))
+    per_name = select_positions_batch(names, req.category_major)
+    amounts = df["금액"].to_numpy()
+
+    results = []
+    for name, positions in zip(names, per_name):
+        total = int(amounts[positions].sum())
+        page, _ = paginate(positions, req.limit)
+        records = list(iter_records(df.iloc[page]))
+        results.append({
+            "name": name,
+            "count": int(len(positions)),
+            "total_amount": total,
+            "records": records,
+            "message": None if records else "해당 조건에 맞는 거래 내역이 없습니다.",
+        })
+
     return JSONResponse(
         content={
-            "name": req.name,
+            "names": names,
             "category_major": req.category_major,
-            "records": records,
-            "message": None if records else "해당 조건에 맞는 거래 내역이 없습니다.",
+            "results": results,
+            "message": None if any(r["records"] for r in results) else "해당 조건에 맞는 거래 내역이 없습니다.",
         },
         media_type="application/json; charset=utf-8",
     )
@@ -154,7 +317,9 @@ def list_tools():
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "name": {"type": "string", "description": "고객 이름 (정확 매칭, 필수)"}
+                    "name": {"type": "string", "description": "고객 이름 (정확 매칭, 필수)"},
+                    "limit": {"type": "integer", "description": "페이지당 최대 레코드 수 (선택)"},
+                    "cursor": {"type": "string", "description": "이전 응답의 next_cursor (선택, 다음 페이지 조회)"}
                 },
                 "required": ["name"]
             }
@@ -166,10 +331,25 @@ def list_tools():
                 "type": "object",
                 "properties": {
                     "name": {"type": "string", "description": "고객 이름 (정확 매칭, 필수)"},
-                    "category_major": {"type": "string", "description": "카테고리(대분류, 필수)"}
+                    "category_major": {"type": "string", "description": "카테고리(대분류, 필수)"},
+                    "limit": {"type": "integer", "description": "페이지당 최대 레코드 수 (선택)"},
+                    "cursor": {"type": "string", "description": "이전 응답의 next_cursor (선택, 다음 페이지 조회)"}
                 },
                 "required": ["name", "category_major"]
             }
+        },
+        {
+            "name": "transactions_batch",
+            "description": "여러 고객 이름(및 선택적 카테고리(대분류))을 한 번에 받아 고객별 거래 레코드와 합계 금액을 반환합니다. 여러 고객 비교 시 사용합니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "names": {"type": "array", "items": {"type": "string"}, "description": "고객 이름 목록 (정확 매칭, 필수)"},
+                    "category_major": {"type": "string", "description": "카테고리(대분류, 선택)"},
+                    "limit": {"type": "integer", "description": "고객별 최대 레코드 수 (선택)"}
+                },
+                "required": ["names"]
+            }
         }
     ]
 
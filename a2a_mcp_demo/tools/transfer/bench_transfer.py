@@ -0,0 +1,113 @@
+# bench_transfer.py
+# 원장 이체 처리량 벤치마크: 한 계좌 집중(기본 통장) vs 여러 계좌 분산, 멱등 키 재시도 포함
+# + 기본 통장 샤드가 쓰기 중(느린 디스크 흉내)일 때 다른 샤드 계좌의 이체가 기다리지 않는지
+# 임시 SQLite 파일을 쓰므로 실제 transfer_ledger.db 에는 영향 없음
+#
+# 실행 예:
+#   python bench_transfer.py --transfers 2000 --threads 8 --accounts 16
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("TRANSFER_LEDGER_PATH", os.path.join(tempfile.mkdtemp(prefix="ledger_"), "bench.db"))
+
+import transfer  # noqa: E402  (원장 경로 환경변수를 먼저 설정해야 함)
+
+
+def run(fn, n: int, threads: int):
+    def one(i):
+        t0 = time.perf_counter()
+        fn(i)
+        return (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex, contextlib.redirect_stdout(io.StringIO()):   # 엔드포인트 print 억제
+        lat = np.fromiter(ex.map(one, range(n)), dtype=float, count=n)
+    return time.perf_counter() - t0, lat
+
+
+def report(label: str, n: int, elapsed: float, lat):
+    print(f"{label:<30}: {n / elapsed:9.1f} transfers/s  p50 {np.percentile(lat, 50):7.2f} ms  "
+          f"p99 {np.percentile(lat, 99):7.2f} ms")
+
+
+def totals(ledger: transfer.Ledger):
+    # 출금 기입(amount < 0)이 이체 1건 (입금 기입은 다른 샤드에 있을 수 있음)
+    money = txns = 0
+    for shard in range(ledger.shards):
+        db = ledger._conn(shard)
+        money += db.execute("SELECT COALESCE(SUM(balance), 0) FROM accounts").fetchone()[0]
+        txns += db.execute("SELECT COUNT(*) FROM entries WHERE amount < 0").fetchone()[0]
+    return money, txns
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--transfers", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--accounts", type=int, default=16, help="분산 시나리오의 출금 계좌 수")
+    ap.add_argument("--hold-ms", type=float, default=200, help="기본 통장 샤드의 쓰기 잠금을 잡고 있는 시간")
+    args = ap.parse_args()
+    n = args.transfers
+    ledger = transfer.ledger
+    print(f"ledger={ledger.path} shards={ledger.shards} transfers={n:,} threads={args.threads}")
+    money0, _ = totals(ledger)
+
+    # 1) 기본 통장 한 곳에서만 출금 (엔드포인트 경로 그대로)
+    def hot(i):
+        req = transfer.TransferRequest(recipient=f"수취인{i % 50}", amount=100, transfer_desc="bench")
+        transfer.transfer_to_recipient(req, idempotency_key=f"hot-{i}")
+
+    report("hot account (endpoint)", n, *run(hot, n, args.threads))
+
+    # 2) 여러 출금 계좌로 분산 (샤드가 다르면 쓰기 잠금이 따로)
+    seed = [(transfer.OWN, f"bench-{k}") for k in range(args.accounts)]
+    for src in seed:
+        ledger._conn(ledger._shard(src)).execute(
+            "INSERT OR IGNORE INTO accounts (kind, name, balance, updated_at) VALUES (?, ?, 1000000000, 0)", src)
+    money0 += 1_000_000_000 * args.accounts
+
+    def spread_from(accounts, tag):
+        def spread(i):
+            src = accounts[i % len(accounts)]
+            ledger.transfer(src, (transfer.RECIPIENT, f"수취인{i % 50}"), 100, "bench",
+                            lambda txn_id, bal: {"accepted": True}, idempotency_key=f"{tag}-{i}", request_hash="x")
+        return spread
+
+    report(f"spread over {args.accounts} accounts", n, *run(spread_from(seed, "spread"), n, args.threads))
+
+    # 2-1) 기본 통장 샤드의 쓰기 잠금을 hold-ms 동안 잡고 있는 동안, 그 샤드 밖 계좌끼리의 이체
+    #      (입금 계좌도 같은 샤드를 피함) → 잠금을 기다리지 않으면 p99가 hold-ms보다 훨씬 작음
+    hot_shard = ledger._shard((transfer.OWN, transfer.ACCOUNT_NAME))
+    others = [a for a in seed if ledger._shard(a) != hot_shard]
+    if ledger.shards > 1 and others:
+        m = min(n, 500)
+        with ledger._transaction(hot_shard):
+            t_hold = time.perf_counter()
+            elapsed, lat = run(lambda i: ledger.transfer(
+                others[i % len(others)], others[(i + 1) % len(others)], 100, "bench",
+                lambda txn_id, bal: {"accepted": True}), m, args.threads)
+            time.sleep(max(0.0, args.hold_ms / 1000 - (time.perf_counter() - t_hold)))
+        report(f"other shards, hot shard held", m, elapsed, lat)
+
+    # 3) 같은 멱등 키로 2번씩 (풀링된 HTTP 클라이언트의 재시도 상황) → 실제 이체는 n건이어야 함
+    _, txns_before = totals(ledger)
+
+    def retried(i):
+        req = transfer.TransferRequest(recipient=f"수취인{i % 50}", amount=100, transfer_desc="bench")
+        transfer.transfer_to_recipient(req, idempotency_key=f"retry-{i // 2}")
+
+    report("idempotent retries (x2)", n, *run(retried, n, args.threads))
+    money1, txns_after = totals(ledger)
+    print(f"applied {txns_after - txns_before:,} transfers for {n:,} requests "
+          f"(expected {(n + 1) // 2:,}), money conserved: {money0 == money1}")
+
+
+if __name__ == "__main__":
+    main()
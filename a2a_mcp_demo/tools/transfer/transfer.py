@@ -1,6 +1,16 @@
 # transfer_api.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, validator
 
@@ -9,6 +19,319 @@ app = FastAPI(title="Transfers & Deposits API")
 # (데모) 기본 계좌 (출금자는 고정)
 ACCOUNT_NAME = "기본 입출금통장"
 
+# 원장(SQLite, WAL) 위치와 기본 계좌 초기 잔액
+# 샤드가 2개 이상이면 transfer_ledger.{0..N-1}.db 로 나눠 저장 (샤드 수는 원장을 만든 뒤 바꿀 수 없음)
+LEDGER_PATH = os.getenv("TRANSFER_LEDGER_PATH") or os.path.join(os.path.dirname(__file__), "transfer_ledger.db")
+LEDGER_SHARDS = int(os.getenv("TRANSFER_LEDGER_SHARDS", 8))
+INITIAL_BALANCE = int(os.getenv("TRANSFER_INITIAL_BALANCE", 10_000_000))
+MAX_BATCH_ITEMS = 100
+
+# 계좌 종류 (같은 이름이라도 종류가 다르면 다른 계좌)
+OWN, RECIPIENT, PRODUCT = "own", "recipient", "product"
+Account = Tuple[str, str]   # (kind, name)
+
+
+# -----------------------------
+# 원장 (잔액 + 복식 기입 + 멱등 키)
+# -----------------------------
+class InsufficientFunds(Exception):
+    pass
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+class Ledger:
+    """
+    SQLite(WAL) 원장을 계좌 해시로 LEDGER_SHARDS개 파일에 나눠 저장.
+      - accounts: 계좌별 잔액 / entries: 거래(txn_id)마다 출금(-)·입금(+) 2줄 기입
+      - idempotency: 멱등 키 → 최초 응답(status, payload) 저장, 같은 키 재요청은 저장된 응답을 그대로 반환
+        (키는 출금 계좌의 샤드에 저장 → 멱등 키 범위는 출금 계좌 단위)
+      - SQLite는 파일 하나에 쓰기 트랜잭션을 하나만 허용하므로 잠금 단위 = 샤드
+        → 다른 샤드에 있는 계좌끼리는 서로의 쓰기를 기다리지 않음, 같은 샤드(같은 계좌 포함)는 직렬
+        프로세스 안에서는 샤드별 threading.Lock을 먼저 잡고 BEGIN IMMEDIATE
+        (SQLite busy 대기는 sleep 간격으로 재시도해서 꼬리 지연이 커짐, 락은 풀리는 즉시 다음 요청이 진행)
+      - 출금(잔액 확인·차감·기입·멱등 키 저장)은 출금 계좌 샤드에서 한 트랜잭션으로 원자적
+        입금 계좌가 다른 샤드면 같은 트랜잭션에 outbox 행을 남기고, 커밋 후 입금 샤드에 반영
+        (입금 기입은 (txn_id, 계좌) 유일 → 중복 반영 없음, 반영 전에 죽으면 시작 시 recover()가 outbox로 마저 반영)
+      - 잔액 차감은 'balance >= amount' 조건부 UPDATE라서 음수 잔액은 생기지 않음
+    """
+
+    def __init__(self, path: str = LEDGER_PATH, initial_balance: int = INITIAL_BALANCE, shards: int = LEDGER_SHARDS):
+        self.path = path
+        self.shards = max(1, shards)
+        root, ext = os.path.splitext(path)
+        self.paths = [path] if self.shards == 1 else [f"{root}.{i}{ext}" for i in range(self.shards)]
+        self._local = threading.local()
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+        for shard in range(self.shards):
+            self._init_shard(shard)
+        own = (OWN, ACCOUNT_NAME)
+        self._conn(self._shard(own)).execute(
+            "INSERT OR IGNORE INTO accounts (kind, name, balance, updated_at) VALUES (?, ?, ?, ?)",
+            (*own, initial_balance, time.time()),
+        )
+        self.recover()
+
+    def _init_shard(self, shard: int) -> None:
+        db = self._conn(shard)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                balance INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (kind, name)
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                txn_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                memo TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS entries_txn_account ON entries(txn_id, kind, name);
+            CREATE TABLE IF NOT EXISTS idempotency (
+                key TEXT PRIMARY KEY,
+                request_hash TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS outbox (
+                txn_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                memo TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (txn_id, kind, name)
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        # 계좌 → 샤드 배치가 샤드 수에 달려 있으므로 기존 원장을 다른 샤드 수로 열지 않음
+        db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('shards', ?)", (str(self.shards),))
+        stored = db.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()[0]
+        if int(stored) != self.shards:
+            raise RuntimeError(f"{self.paths[shard]}는 샤드 {stored}개로 만든 원장입니다. (TRANSFER_LEDGER_SHARDS={self.shards})")
+
+    def _shard(self, account: Account) -> int:
+        # 프로세스마다 바뀌는 hash() 대신 고정 해시
+        digest = hashlib.blake2b(f"{account[0]}:{account[1]}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.shards
+
+    def _conn(self, shard: int) -> sqlite3.Connection:
+        # 요청 스레드마다 샤드별 전용 커넥션 (트랜잭션은 BEGIN IMMEDIATE로 직접 관리)
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        db = conns.get(shard)
+        if db is None:
+            db = conns[shard] = sqlite3.connect(self.paths[shard], isolation_level=None, timeout=10)
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @contextmanager
+    def _transaction(self, shard: int):
+        db = self._conn(shard)
+        with self._locks[shard]:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _credit(db: sqlite3.Connection, txn_id: str, dst: Account, amount: int, memo: str, now: float) -> None:
+        # 이미 반영된 txn_id면 건너뜀 (outbox 재반영 시 중복 입금 방지)
+        cur = db.execute(
+            "INSERT OR IGNORE INTO entries (txn_id, kind, name, amount, memo, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (txn_id, dst[0], dst[1], amount, memo, now),
+        )
+        if cur.rowcount:
+            db.execute(
+                "INSERT INTO accounts (kind, name, balance, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (kind, name) DO UPDATE SET balance = balance + excluded.balance, updated_at = excluded.updated_at",
+                (dst[0], dst[1], amount, now),
+            )
+
+    def _move(self, db: sqlite3.Connection, txn_id: str, src: Account, dst: Account, amount: int, memo: str,
+              now: float, pending: List[Tuple[str, Account, int, str, float]]) -> int:
+        """
+        출금 샤드 트랜잭션(db)에서 src → dst 로 amount 이동, 출금 후 src 잔액 반환 (잔액 부족이면 InsufficientFunds)
+        dst가 다른 샤드면 outbox에 남기고 pending에 추가 (커밋 후 _deliver로 반영)
+        """
+        cur = db.execute(
+            "UPDATE accounts SET balance = balance - ?, updated_at = ? WHERE kind = ? AND name = ? AND balance >= ?",
+            (amount, now, src[0], src[1], amount),
+        )
+        if cur.rowcount == 0:
+            row = db.execute("SELECT balance FROM accounts WHERE kind = ? AND name = ?", src).fetchone()
+            raise InsufficientFunds(row[0] if row else 0)
+        db.execute(
+            "INSERT INTO entries (txn_id, kind, name, amount, memo, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (txn_id, src[0], src[1], -amount, memo, now),
+        )
+        if self._shard(dst) == self._shard(src):
+            self._credit(db, txn_id, dst, amount, memo, now)
+        else:
+            db.execute(
+                "INSERT INTO outbox (txn_id, kind, name, amount, memo, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (txn_id, dst[0], dst[1], amount, memo, now),
+            )
+            pending.append((txn_id, dst, amount, memo, now))
+        return db.execute("SELECT balance FROM accounts WHERE kind = ? AND name = ?", src).fetchone()[0]
+
+    def _deliver(self, pending: List[Tuple[str, Account, int, str, float]]) -> None:
+        """출금 커밋 후 다른 샤드의 입금 반영 (입금 샤드별로 트랜잭션 1회)"""
+        by_shard: Dict[int, List[Tuple[str, Account, int, str, float]]] = {}
+        for item in pending:
+            by_shard.setdefault(self._shard(item[1]), []).append(item)
+        for shard, items in sorted(by_shard.items()):
+            with self._transaction(shard) as db:
+                for txn_id, dst, amount, memo, now in items:
+                    self._credit(db, txn_id, dst, amount, memo, now)
+
+    def recover(self) -> int:
+        """
+        outbox를 입금 샤드에 마저 반영하고 비움 (시작 시 1회). 반환: 새로 반영한 입금 수
+        (실행 중에는 outbox를 지우지 않음 → 출금 샤드에 쓰기를 한 번 더 하지 않기 위함)
+        """
+        delivered = 0
+        for shard in range(self.shards):
+            db = self._conn(shard)
+            rows = db.execute("SELECT txn_id, kind, name, amount, memo, created_at FROM outbox").fetchall()
+            for txn_id, kind, name, amount, memo, created_at in rows:
+                with self._transaction(self._shard((kind, name))) as dst_db:
+                    before = dst_db.total_changes
+                    self._credit(dst_db, txn_id, (kind, name), amount, memo, created_at)
+                    delivered += dst_db.total_changes > before
+            if rows:
+                with self._transaction(shard) as src_db:
+                    src_db.executemany("DELETE FROM outbox WHERE txn_id = ? AND kind = ? AND name = ?",
+                                       [(r[0], r[1], r[2]) for r in rows])
+        return delivered
+
+    @staticmethod
+    def _replay(db: sqlite3.Connection, key: Optional[str], request_hash: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if not key:
+            return None
+        row = db.execute("SELECT request_hash, status_code, response FROM idempotency WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[0] != request_hash:
+            raise IdempotencyConflict(key)
+        return row[1], json.loads(row[2])
+
+    @staticmethod
+    def _remember(db: sqlite3.Connection, key: Optional[str], request_hash: str, status: int, payload: Dict[str, Any]) -> None:
+        if key:
+            db.execute(
+                "INSERT INTO idempotency (key, request_hash, status_code, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, request_hash, status, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+
+    def transfer(self, src: Account, dst: Account, amount: int, memo: str, render,
+                 idempotency_key: Optional[str] = None, request_hash: str = "") -> Tuple[int, Dict[str, Any], bool]:
+        """
+        이체 1건을 원자적으로 기록.
+        render(txn_id, balance_after) → 성공 응답 payload. 반환: (status, payload, replayed)
+        """
+        pending: List[Tuple[str, Account, int, str, float]] = []
+        with self._transaction(self._shard(src)) as db:
+            replay = self._replay(db, idempotency_key, request_hash)
+            if replay is not None:
+                return replay[0], replay[1], True
+            now = time.time()
+            txn_id = uuid.uuid4().hex
+            try:
+                balance = self._move(db, txn_id, src, dst, amount, memo, now, pending)
+                status, payload = 200, render(txn_id, balance)
+            except InsufficientFunds as e:
+                status, payload = 400, insufficient_payload(src, amount, e.args[0])
+            self._remember(db, idempotency_key, request_hash, status, payload)
+        self._deliver(pending)
+        return status, payload, False
+
+    def transfer_batch(self, src: Account, legs: List[Tuple[Account, int, str]], atomic: bool, render,
+                       idempotency_key: Optional[str] = None, request_hash: str = "") -> Tuple[int, Dict[str, Any], bool]:
+        """
+        여러 건을 출금 샤드의 한 트랜잭션(커밋 1회)으로 기록. legs: [(dst, amount, memo), ...]
+          - atomic=True: 한 건이라도 잔액 부족이면 전체 롤백
+          - atomic=False: 가능한 건만 반영
+        render(outcomes, balance_after) → (status, payload), outcomes[i] = (txn_id, None) 또는 (None, 당시 잔액)
+        """
+        pending: List[Tuple[str, Account, int, str, float]] = []
+        with self._transaction(self._shard(src)) as db:
+            replay = self._replay(db, idempotency_key, request_hash)
+            if replay is not None:
+                return replay[0], replay[1], True
+            now = time.time()
+            outcomes: List[Tuple[Optional[str], Optional[int]]] = []
+            db.execute("SAVEPOINT batch")
+            for dst, amount, memo in legs:
+                txn_id = uuid.uuid4().hex
+                try:
+                    self._move(db, txn_id, src, dst, amount, memo, now, pending)
+                    outcomes.append((txn_id, None))
+                except InsufficientFunds as e:
+                    outcomes.append((None, e.args[0]))
+                    if atomic:
+                        break
+            if atomic and outcomes and outcomes[-1][0] is None:
+                db.execute("ROLLBACK TO batch")
+                pending.clear()
+            db.execute("RELEASE batch")
+            balance = db.execute("SELECT balance FROM accounts WHERE kind = ? AND name = ?", src).fetchone()[0]
+            status, payload = render(outcomes, balance)
+            self._remember(db, idempotency_key, request_hash, status, payload)
+        self._deliver(pending)
+        return status, payload, False
+
+    def balances(self) -> Dict[str, Dict[str, int]]:
+        out: Dict[str, Dict[str, int]] = {}
+        rows = [row for shard in range(self.shards)
+                for row in self._conn(shard).execute("SELECT kind, name, balance FROM accounts")]
+        for kind, name, balance in sorted(rows):
+            out.setdefault(kind, {})[name] = balance
+        return out
+
+
+def insufficient_payload(src: Account, amount: int, balance: int) -> Dict[str, Any]:
+    return {
+        "accepted": False,
+        "error": "InsufficientFunds",
+        "balance": balance,
+        "message": f"{src[1]} 잔액이 부족합니다. (요청 {amount:,}원 / 잔액 {balance:,}원)",
+    }
+
+
+def request_hash(endpoint: str, req: BaseModel) -> str:
+    body = json.dumps({"endpoint": endpoint, **req.dict()}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def ledger_response(status: int, payload: Dict[str, Any], replayed: bool) -> JSONResponse:
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(content=payload, status_code=status, headers=headers)
+
+
+def conflict_response(key: str) -> JSONResponse:
+    return JSONResponse(
+        content={"accepted": False, "error": "IdempotencyConflict",
+                 "message": f"Idempotency-Key '{key}'는 다른 요청 내용으로 이미 사용되었습니다."},
+        status_code=409,
+    )
+
+
+ledger = Ledger()
+
 
 # -----------------------------
 # 요청 스키마
@@ -36,11 +359,46 @@ class ProductDepositRequest(BaseModel):
         return v
 
 
+class BatchItem(BaseModel):
+    type: Literal["transfer", "deposit_product"] = Field(..., description="transfer(이체) 또는 deposit_product(예/적금 입금)")
+    amount: int = Field(..., description="금액(원 단위, 정수)")
+    recipient: Optional[str] = Field(None, description="받는 사람 이름 (transfer)")
+    transfer_desc: Optional[str] = Field("", description="이체 내용 (transfer)")
+    product_name: Optional[str] = Field(None, description="예/적금 상품명 (deposit_product)")
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, description="이체/입금 목록")
+    mode: Literal["atomic", "best_effort"] = Field("atomic", description="atomic: 전부 성공 또는 전부 취소, best_effort: 가능한 건만 처리")
+
+
+def batch_item_error(item: BatchItem) -> Optional[str]:
+    if item.amount <= 0:
+        return "amount는 0보다 커야 합니다."
+    if item.type == "transfer" and not (item.recipient or "").strip():
+        return "transfer 항목에는 recipient가 필요합니다."
+    if item.type == "deposit_product" and not (item.product_name or "").strip():
+        return "deposit_product 항목에는 product_name이 필요합니다."
+    return None
+
+
+def batch_item_leg(item: BatchItem) -> Tuple[Account, int, str]:
+    if item.type == "transfer":
+        return (RECIPIENT, item.recipient.strip()), item.amount, item.transfer_desc or ""
+    return (PRODUCT, item.product_name.strip()), item.amount, item.product_name.strip()
+
+
+def batch_item_label(item: BatchItem) -> str:
+    if item.type == "transfer":
+        return f"{item.recipient}에게 {item.amount:,}원 이체"
+    return f"{item.product_name} 상품으로 {item.amount:,}원 입금"
+
+
 # -----------------------------
 # 1) 특정 지정인한테 이체
 # -----------------------------
 @app.post("/tool/transfer")
-def transfer_to_recipient(req: TransferRequest):
+def transfer_to_recipient(req: TransferRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     입력 예:
     {
@@ -52,27 +410,39 @@ def transfer_to_recipient(req: TransferRequest):
     출력 예:
     {
       "accepted": true,
+      "txn_id": "3f2a...",
+      "balance": 9950000,
       "message": "기본 입출금통장에서 홍길동에게 50000원을 이체했습니다. (이체 내용: 점심값)"
     }
-    """
-    # 실제로는 송금 시스템/DB 처리 로직이 들어갈 자리
-    print(f"[이체] {ACCOUNT_NAME}에서 {req.recipient}에게 {req.amount}원을 이체했습니다. "
-          f"(이체 내용: {req.transfer_desc})")
 
-    return JSONResponse(
-        content={
+    같은 Idempotency-Key 헤더로 다시 요청하면 이체하지 않고 최초 응답을 그대로 반환합니다.
+    """
+    def render(txn_id: str, balance: int) -> Dict[str, Any]:
+        print(f"[이체] {ACCOUNT_NAME}에서 {req.recipient}에게 {req.amount}원을 이체했습니다. "
+              f"(이체 내용: {req.transfer_desc})")
+        return {
             "accepted": True,
+            "txn_id": txn_id,
+            "balance": balance,
             "message": f"{ACCOUNT_NAME}에서 {req.recipient}에게 {req.amount}원을 이체했습니다. "
                        f"(이체 내용: {req.transfer_desc})"
         }
-    )
+
+    try:
+        status, payload, replayed = ledger.transfer(
+            (OWN, ACCOUNT_NAME), (RECIPIENT, req.recipient), req.amount, req.transfer_desc, render,
+            idempotency_key=idempotency_key, request_hash=request_hash("transfer", req),
+        )
+    except IdempotencyConflict:
+        return conflict_response(idempotency_key)
+    return ledger_response(status, payload, replayed)
 
 
 # -----------------------------
 # 2) 예/적금 상품으로 입금
 # -----------------------------
 @app.post("/tool/deposit_product")
-def deposit_to_savings(req: ProductDepositRequest):
+def deposit_to_savings(req: ProductDepositRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     입력 예:
     {
@@ -83,17 +453,123 @@ def deposit_to_savings(req: ProductDepositRequest):
     출력 예:
     {
       "accepted": true,
+      "txn_id": "9c1b...",
+      "balance": 9700000,
       "message": "기본 입출금통장에서 자유적금 12개월 상품으로 300000원을 입금했습니다."
     }
     """
-    print(f"[입금] {ACCOUNT_NAME}에서 {req.product_name} 상품으로 {req.amount}원을 입금했습니다.")
-
-    return JSONResponse(
-        content={
+    def render(txn_id: str, balance: int) -> Dict[str, Any]:
+        print(f"[입금] {ACCOUNT_NAME}에서 {req.product_name} 상품으로 {req.amount}원을 입금했습니다.")
+        return {
             "accepted": True,
+            "txn_id": txn_id,
+            "balance": balance,
             "message": f"{ACCOUNT_NAME}에서 {req.product_name} 상품으로 {req.amount}원을 입금했습니다."
         }
-    )
+
+    try:
+        status, payload, replayed = ledger.transfer(
+            (OWN, ACCOUNT_NAME), (PRODUCT, req.product_name), req.amount, req.product_name, render,
+            idempotency_key=idempotency_key, request_hash=request_hash("deposit_product", req),
+        )
+    except IdempotencyConflict:
+        return conflict_response(idempotency_key)
+    return ledger_response(status, payload, replayed)
+
+
+# -----------------------------
+# 3) 여러 건 일괄 이체/입금 (한 번의 요청, 한 번의 커밋)
+# -----------------------------
+@app.post("/tool/transfer_batch")
+def transfer_batch(req: BatchRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """
+    입력 예:
+    {
+      "mode": "atomic",
+      "items": [
+        {"type": "transfer", "recipient": "홍길동", "amount": 30000, "transfer_desc": "회식비"},
+        {"type": "transfer", "recipient": "김철수", "amount": 30000, "transfer_desc": "회식비"}
+      ]
+    }
+
+    출력 예:
+    {
+      "accepted": true, "mode": "atomic", "applied": 2, "failed": 0, "total_amount": 60000, "balance": 9940000,
+      "results": [{"index": 0, "accepted": true, "txn_id": "...", "message": "홍길동에게 30,000원 이체"}, ...],
+      "message": "2건 중 2건을 처리했습니다. (합계 60,000원)"
+    }
+    """
+    if len(req.items) > MAX_BATCH_ITEMS:
+        return JSONResponse(
+            content={"accepted": False, "message": f"한 번에 최대 {MAX_BATCH_ITEMS}건까지 처리할 수 있습니다."},
+            status_code=400,
+        )
+    atomic = req.mode == "atomic"
+
+    # 1) 검증 (한 번에 전부): atomic이면 하나라도 틀리면 아무것도 하지 않음
+    errors = [batch_item_error(item) for item in req.items]
+    if atomic and any(errors):
+        return JSONResponse(
+            content={
+                "accepted": False, "mode": req.mode, "applied": 0, "failed": len(req.items),
+                "results": [{"index": i, "accepted": False, "error": err or "다른 항목 오류로 처리하지 않았습니다."}
+                            for i, err in enumerate(errors)],
+                "message": "입력값이 올바르지 않은 항목이 있어 아무것도 처리하지 않았습니다.",
+            },
+            status_code=400,
+        )
+    valid = [i for i, err in enumerate(errors) if err is None]
+    legs = [batch_item_leg(req.items[i]) for i in valid]
+
+    def render(outcomes, balance: int):
+        results: List[Dict[str, Any]] = [{"index": i, "accepted": False, "error": err} for i, err in enumerate(errors)]
+        rolled_back = atomic and outcomes and outcomes[-1][0] is None
+        for pos, i in enumerate(valid):
+            item = req.items[i]
+            if pos >= len(outcomes):
+                results[i]["error"] = "앞선 항목 실패로 처리하지 않았습니다."
+                continue
+            txn_id, short_balance = outcomes[pos]
+            if short_balance is not None:
+                results[i]["error"] = insufficient_payload((OWN, ACCOUNT_NAME), item.amount, short_balance)["message"]
+            elif rolled_back:
+                results[i]["error"] = "다른 항목 실패로 취소되었습니다."
+            else:
+                results[i].update(accepted=True, txn_id=txn_id, message=batch_item_label(item))
+                results[i].pop("error")
+        applied = [r for r in results if r["accepted"]]
+        total = sum(req.items[r["index"]].amount for r in applied)
+        if applied:
+            print(f"[일괄] {ACCOUNT_NAME}에서 {len(applied)}건, 합계 {total}원을 처리했습니다.")
+        payload = {
+            "accepted": bool(applied) and (not atomic or len(applied) == len(results)),
+            "mode": req.mode,
+            "applied": len(applied),
+            "failed": len(results) - len(applied),
+            "total_amount": total,
+            "balance": balance,
+            "results": results,
+            "message": (f"{len(results)}건 중 {len(applied)}건을 처리했습니다. (합계 {total:,}원)" if not rolled_back
+                        else f"잔액이 부족해 전체 요청을 취소했습니다. (요청 합계 {sum(l[1] for l in legs):,}원 / 잔액 {balance:,}원)"),
+        }
+        return (200 if applied else 400), payload
+
+    try:
+        status, payload, replayed = ledger.transfer_batch(
+            (OWN, ACCOUNT_NAME), legs, atomic, render,
+            idempotency_key=idempotency_key, request_hash=request_hash("transfer_batch", req),
+        )
+    except IdempotencyConflict:
+        return conflict_response(idempotency_key)
+    return ledger_response(status, payload, replayed)
+
+
+# -----------------------------
+# 4) 잔액 조회 (운영/확인용, 도구 아님)
+# -----------------------------
+@app.get("/accounts")
+def list_accounts():
+    return JSONResponse(content=ledger.balances())
 
 
 # (선택) 도구 스펙 노출
@@ -124,6 +600,32 @@ def list_tools():
                 },
                 "required": ["product_name", "amount"]
             }
+        },
+        {
+            "name": "transfer_batch",
+            "description": "고정된 기본 입출금통장에서 여러 건의 이체/예적금 입금을 한 번에 처리합니다. (예: 팀원 5명에게 각각 3만원) 기본은 전부 성공 또는 전부 취소(atomic)입니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "items": {
+                        "type": "array",
+                        "description": "처리할 이체/입금 목록",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {"type": "string", "enum": ["transfer", "deposit_product"], "description": "transfer(이체) 또는 deposit_product(예/적금 입금)"},
+                                "recipient": {"type": "string", "description": "받는 사람 (transfer)"},
+                                "amount": {"type": "integer", "description": "금액(원 단위)"},
+                                "transfer_desc": {"type": "string", "description": "이체 내용 (transfer)"},
+                                "product_name": {"type": "string", "description": "예/적금 상품명 (deposit_product)"}
+                            },
+                            "required": ["type", "amount"]
+                        }
+                    },
+                    "mode": {"type": "string", "enum": ["atomic", "best_effort"], "description": "atomic(기본): 전부 성공 또는 전부 취소, best_effort: 가능한 건만 처리"}
+                },
+                "required": ["items"]
+            }
         }
     ]
 
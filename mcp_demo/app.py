@@ -3,6 +3,9 @@ import requests
 import json
 from openai import OpenAI
 
+from stream_render import render_stream
+from tool_discovery import ToolDiscovery
+
 openai_key = ""  # 실제 키로 교체
 client = OpenAI(api_key=openai_key)
 
@@ -11,16 +14,13 @@ MCP_SERVERS = {
     "news": "http://localhost:8002"
 }
 
+@st.cache_resource
+def get_tool_discovery():
+    # 프로세스당 1개: 서버별 /tools 동시 조회(서버마다 타임아웃) + 디스크 캐시/ETag 재검증 + 백그라운드 갱신
+    return ToolDiscovery(MCP_SERVERS).start()
+
 def fetch_tool_metadata():
-    tools = []
-    for name, base_url in MCP_SERVERS.items():
-        try:
-            res = requests.get(f"{base_url}/tools")
-            for tool in res.json():
-                tools.append({"mcp": name, "tool": tool})
-        except Exception as e:
-            st.error(f"[ERROR] {name} 서버 연결 실패: {e}")
-    return tools
+    return get_tool_discovery().tools()
 
 def ask_gpt_for_tool(user_input, tool_metadata):
     prompt = f"""
@@ -98,8 +98,10 @@ st.title("🤖 MCP 챗봇")
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-if "tool_metadata" not in st.session_state:
-    st.session_state.tool_metadata = fetch_tool_metadata()
+# 툴 목록은 세션마다 조회하지 않고, 프로세스 공유 캐시에서 매 실행마다 최신 목록을 읽음
+tool_metadata = fetch_tool_metadata()
+if not tool_metadata:
+    st.warning("사용 가능한 MCP 툴이 없습니다. 서버 상태를 확인하세요. (직접 응답만 가능)")
 
 # 이전 메시지 히스토리 렌더링
 for msg in st.session_state.messages:
@@ -117,21 +119,16 @@ if user_input:
     # 챗봇 응답 렌더링
     with st.chat_message("assistant"):
         response_placeholder = st.empty()
-        full_response = ""
 
-        decision = ask_gpt_for_tool(user_input, st.session_state.tool_metadata)
+        decision = ask_gpt_for_tool(user_input, tool_metadata)
 
         if decision.get("route") == "DIRECT":
-            for token in direct_response(user_input):
-                full_response += token
-                response_placeholder.markdown(full_response)
+            full_response = render_stream(response_placeholder, direct_response(user_input))
         else:
             mcp = decision["mcp"]
             tool = decision["tool_name"]
             args = decision["arguments"]
-            for token in call_mcp(mcp, tool, args):
-                full_response += token
-                response_placeholder.markdown(full_response)
+            full_response = render_stream(response_placeholder, call_mcp(mcp, tool, args))
 
     # 히스토리에 챗봇 응답 추가
     st.session_state.messages.append({"role": "assistant", "content": full_response})
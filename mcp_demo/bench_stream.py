@@ -0,0 +1,162 @@
+# bench_stream.py
+# 뉴스 MCP 서버 동시 스트리밍 벤치마크 (가짜 LLM 사용, 실제 API 호출 없음)
+#   - async 핸들러(현재 news.py) vs 기존 방식(sync 핸들러 + blocking 스트림, 스레드풀 점유) 비교
+#   - 첫 토큰까지 시간(TTFB) / 전체 완료 시간 p50·p99, 초당 완료 스트림 수
+#   - 클라이언트가 중간에 끊었을 때 업스트림 스트림이 닫히는지 확인
+#   - 인기 종목 몰림: 같은 topic 동시 요청이 생성 1회로 합쳐지는지(single-flight), 이후 TTL 캐시 재생
+#   서버는 별도 프로세스(--serve)로 띄워 부하 생성기와 GIL을 나눠 쓰지 않게 하고,
+#   부하 생성기는 asyncio 소켓으로 직접 HTTP/1.1을 보냄 (httpx 스트리밍은 수백 개 동시 스트림에서 클라이언트가 먼저 병목)
+#
+# 실행 예:
+#   python bench_stream.py --streams 300 --ttft-ms 200 --delay-ms 20 --tokens 50
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--streams", type=int, default=300, help="동시 스트림 수")
+    ap.add_argument("--ttft-ms", type=float, default=200)
+    ap.add_argument("--delay-ms", type=float, default=20)
+    ap.add_argument("--tokens", type=int, default=50)
+    ap.add_argument("--disconnects", type=int, default=100, help="첫 토큰 후 끊을 스트림 수")
+    ap.add_argument("--hot-topics", type=int, default=5, help="몰림 시나리오의 서로 다른 topic 수")
+    ap.add_argument("--port", type=int, default=18002)
+    ap.add_argument("--serve", action="store_true", help="(내부용) 벤치마크 대상 서버로 실행")
+    return ap.parse_args()
+
+
+args = parse_args()
+os.environ["MCP_FAKE_LLM"] = "1"
+os.environ["FAKE_LLM_TTFT_MS"] = str(args.ttft_ms)
+os.environ["FAKE_LLM_DELAY_MS"] = str(args.delay_ms)
+os.environ["FAKE_LLM_TOKENS"] = str(args.tokens)
+
+
+
+# ---- 서버 프로세스 (--serve) ----
+def serve():
+    import uvicorn
+    from fastapi.responses import StreamingResponse
+
+    import news  # 가짜 LLM 환경변수를 먼저 설정해야 함
+
+    news.print = lambda *a, **k: None   # 요청마다 찍는 로그 억제
+
+    @news.app.post("/legacy/get_news")
+    def legacy_get_news(request: news.NewsRequest):
+        return StreamingResponse(legacy_blocking_stream(request.topic), media_type="application/json")
+
+    @news.app.get("/bench/llm_stats")
+    def llm_stats():
+        return news.llm.stats
+
+    uvicorn.run(news.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# ---- 비교용: 기존 방식 (sync 핸들러 + blocking 스트림 → 요청마다 스레드풀 워커 1개 점유) ----
+def legacy_blocking_stream(topic: str):
+    time.sleep(args.ttft_ms / 1000)
+    for i in range(args.tokens):
+        yield f"토큰{i} "
+        time.sleep(args.delay_ms / 1000)
+
+
+def start_server() -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", *sys.argv[1:]], cwd=os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/tools", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("벤치마크 서버가 뜨지 않았습니다.")
+
+
+async def open_stream(path: str, topic: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", args.port)
+    body = json.dumps({"topic": topic}).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+    )
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n")   # 응답 헤더
+    return reader, writer
+
+
+async def one_stream(path: str, topic: str):
+    t0 = time.perf_counter()
+    reader, writer = await open_stream(path, topic)
+    await reader.read(1)
+    ttfb = time.perf_counter() - t0
+    while await reader.read(65536):
+        pass
+    writer.close()
+    return ttfb * 1000, (time.perf_counter() - t0) * 1000
+
+
+async def llm_calls(base: str) -> int:
+    async with httpx.AsyncClient(base_url=base) as client:
+        return (await client.get("/bench/llm_stats")).json()["created"]
+
+
+async def run_wave(path: str, topics, label: str = None, base: str = None):
+    n = len(topics)
+    calls0 = await llm_calls(base) if base else 0
+    t0 = time.perf_counter()
+    out = await asyncio.gather(*(one_stream(path, topic) for topic in topics))
+    elapsed = time.perf_counter() - t0
+    ttfb = np.array([o[0] for o in out])
+    total = np.array([o[1] for o in out])
+    calls = f"  LLM 호출 {await llm_calls(base) - calls0}회" if base else ""
+    print(f"{label or path:<20}: {n / elapsed:7.1f} streams/s  wall {elapsed:6.2f} s  "
+          f"TTFB p50 {np.percentile(ttfb, 50):7.0f} ms p99 {np.percentile(ttfb, 99):7.0f} ms  "
+          f"total p99 {np.percentile(total, 99):7.0f} ms{calls}")
+
+
+async def run_disconnects(base: str, n: int):
+    async def cut(i):
+        reader, writer = await open_stream("/tool/get_news", f"끊김{i}")
+        await reader.read(1)   # 첫 토큰만 받고 연결 종료
+        writer.close()
+
+    async with httpx.AsyncClient(base_url=base, timeout=None) as client:
+        before = (await client.get("/bench/llm_stats")).json()
+        await asyncio.gather(*(cut(i) for i in range(n)))
+        await asyncio.sleep(max(0.5, args.delay_ms * 5 / 1000))
+        after = (await client.get("/bench/llm_stats")).json()
+    closed = after["closed_early"] - before["closed_early"]
+    print(f"disconnect          : {n}개 중 업스트림 조기 종료 {closed}개, 남은 활성 스트림 {after['active']}개")
+
+
+def main():
+    ideal = (args.ttft_ms + args.delay_ms * args.tokens) / 1000
+    print(f"streams={args.streams} fake LLM: ttft={args.ttft_ms}ms delay={args.delay_ms}ms tokens={args.tokens} "
+          f"(스트림 1개 약 {ideal:.2f} s)")
+    server = start_server()
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        unique = [f"종목{i}" for i in range(args.streams)]   # 합치기/캐시가 개입하지 않도록 모두 다른 topic
+        asyncio.run(run_wave("/tool/get_news", unique, base=base))
+        asyncio.run(run_wave("/legacy/get_news", unique))
+        asyncio.run(run_disconnects(base, args.disconnects))
+        hot = [f"인기종목{i % args.hot_topics}" for i in range(args.streams)]
+        asyncio.run(run_wave("/tool/get_news", hot, f"hot x{args.hot_topics} (live)", base))
+        asyncio.run(run_wave("/tool/get_news", hot, f"hot x{args.hot_topics} (cached)", base))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    serve() if args.serve else main()
@@ -2,6 +2,8 @@ import requests
 import json
 from openai import OpenAI
 
+from tool_discovery import ToolDiscovery
+
 openai_key = ""  # 실제 키로 교체
 client = OpenAI(api_key=openai_key)
 
@@ -10,16 +12,11 @@ MCP_SERVERS = {
     "news": "http://localhost:8002"
 }
 
+# 서버별 /tools 를 동시에 조회 (서버마다 타임아웃, 디스크 캐시 + ETag 재검증, 백그라운드 갱신)
+tool_discovery = ToolDiscovery(MCP_SERVERS)
+
 def fetch_tool_metadata():
-    tools = []
-    for name, base_url in MCP_SERVERS.items():
-        try:
-            res = requests.get(f"{base_url}/tools")
-            for tool in res.json():
-                tools.append({"mcp": name, "tool": tool})
-        except Exception as e:
-            print(f"[ERROR] {name} 서버 연결 실패: {e}")
-    return tools
+    return tool_discovery.tools()
 
 def ask_gpt_for_tool(user_input, tool_metadata):
     prompt = f"""
@@ -67,7 +64,7 @@ def call_mcp(mcp_name, tool_name, args):
         return f"[ERROR] MCP 호출 실패: {e}"
 
 def main():
-    tool_metadata = fetch_tool_metadata()
+    tool_discovery.start()
     print("\n✅ MCP 클라이언트 시작")
 
     while True:
@@ -75,7 +72,7 @@ def main():
         if user_input.lower() == "exit":
             break
 
-        decision = ask_gpt_for_tool(user_input, tool_metadata)
+        decision = ask_gpt_for_tool(user_input, fetch_tool_metadata())   # 백그라운드 갱신된 최신 목록
 
         if decision.get("route") == "DIRECT":
 
@@ -0,0 +1,64 @@
+# fake_llm.py
+# 로컬 테스트/벤치마크용 가짜 LLM (AsyncOpenAI의 chat.completions.create(stream=True) 흉내)
+#   - 첫 토큰 지연(FAKE_LLM_TTFT_MS) 후 토큰마다 FAKE_LLM_DELAY_MS 간격으로 FAKE_LLM_TOKENS개 생성
+#   - 생성/완료/중도 종료 횟수를 stats로 노출 (업스트림 호출 수, 취소 전파 확인용)
+#
+# 사용: MCP_FAKE_LLM=1 uvicorn news:app --port 8002
+import asyncio
+import os
+from types import SimpleNamespace
+from typing import Dict
+
+FAKE_LLM_TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", 200))
+FAKE_LLM_DELAY_MS = float(os.getenv("FAKE_LLM_DELAY_MS", 20))
+FAKE_LLM_TOKENS = int(os.getenv("FAKE_LLM_TOKENS", 50))
+
+_TEXT = "요청하신 내용을 요약하면 다음과 같습니다. 최근 동향은 대체로 안정적이며 단기 변동성에 유의할 필요가 있습니다. "
+
+
+def _chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """async for 로 토큰 chunk를 내주는 스트림. close()는 중도 종료도 안전하게 처리."""
+
+    def __init__(self, owner: "FakeAsyncOpenAI", prompt: str):
+        self._owner = owner
+        self._prompt = prompt
+        self._done = False
+        self._closed = False
+
+    async def __aiter__(self):
+        await asyncio.sleep(self._owner.ttft_ms / 1000)
+        words = (_TEXT * (self._owner.tokens // 10 + 1)).split(" ")
+        for i in range(self._owner.tokens):
+            if self._closed:
+                return
+            yield _chunk(words[i % len(words)] + " ")
+            await asyncio.sleep(self._owner.delay_ms / 1000)
+        self._done = True
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._owner._count("completed" if self._done else "closed_early")
+        self._owner._count("active", -1)
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, ttft_ms: float = FAKE_LLM_TTFT_MS, delay_ms: float = FAKE_LLM_DELAY_MS, tokens: int = FAKE_LLM_TOKENS):
+        self.ttft_ms = ttft_ms
+        self.delay_ms = delay_ms
+        self.tokens = tokens
+        self.stats: Dict[str, int] = {"created": 0, "completed": 0, "closed_early": 0, "active": 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        self.stats[key] += delta   # 이벤트 루프 단일 스레드에서만 호출
+
+    async def _create(self, model: str, messages, stream: bool = False, **kwargs) -> FakeStream:
+        self._count("created")
+        self._count("active")
+        return FakeStream(self, messages[-1]["content"])
@@ -1,62 +1,103 @@
+import os
+
+import anyio
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from pydantic import BaseModel
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from single_flight import SingleFlightCache, normalize_key
+from tool_discovery import tools_response
 
 app = FastAPI()
 openai_key = ""
-llm = OpenAI(api_key=openai_key)
+
+# 같은 주제 동시 요청은 생성 1회로 합치고, 완료된 응답은 TTL 동안 재사용 (0이면 캐시 끔, 합치기는 유지)
+stream_cache = SingleFlightCache(
+    ttl_sec=float(os.getenv("MCP_CACHE_TTL_SEC", 60)),
+    max_entries=int(os.getenv("MCP_CACHE_MAX_ENTRIES", 256)),
+)
+
+# MCP_FAKE_LLM=1 이면 실제 API 대신 가짜 LLM(fake_llm.py)으로 스트리밍 (부하 테스트/벤치마크용)
+if os.getenv("MCP_FAKE_LLM") == "1":
+    from fake_llm import FakeAsyncOpenAI
+    llm = FakeAsyncOpenAI()
+else:
+    llm = AsyncOpenAI(api_key=openai_key)
 
 class NewsRequest(BaseModel):
     topic: str
 
-def news_stream_generator(topic: str):
+async def relay_stream(request: Request, subscription):
+    """
+    토큰 스트림 → 클라이언트. 이벤트 루프에서 돌기 때문에 요청마다 스레드를 점유하지 않음.
+    클라이언트가 끊기면(서버가 이 제너레이터를 취소하거나, 다음 토큰 전에 끊김이 감지되면)
+    구독을 바로 정리 → 마지막 구독자였다면 업스트림 LLM 생성도 중단됨
+    """
+    try:
+        async for text in subscription:
+            if await request.is_disconnected():
+                break
+            yield text
+    finally:
+        with anyio.CancelScope(shield=True):   # 취소된 상태에서도 정리는 끝까지
+            await subscription.aclose()
+
+
+async def llm_text_stream(messages):
+    response = await llm.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
+    try:
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await response.close()
+
+
+def news_stream_generator(request: Request, topic: str):
 
-    print("뉴스 MCP 호출")
+    def open_upstream():
+        print("뉴스 MCP 호출")
 
-    prompt = f"너는 주식 뉴스 분석가야. '{topic}' 종목에 대해 투자자 관점에서 요약해줘."
+        prompt = f"너는 주식 뉴스 분석가야. '{topic}' 종목에 대해 투자자 관점에서 요약해줘."
 
-    response = llm.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+        return llm_text_stream([
             {"role": "system", "content": "당신은 종목 뉴스에 정통한 투자 분석가입니다."},
             {"role": "user", "content": prompt}
-        ],
-        stream=True
-    )
-
-    def generator():
-        #yield '{"topic": "' + topic + '", "tool": "get_news", "result": "'
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-        #yield '"}'
+        ])
 
-    return generator()
+    return relay_stream(request, stream_cache.subscribe(normalize_key(topic), open_upstream))
 
 @app.post("/tool/get_news")
-def get_news(request: NewsRequest):
-    return StreamingResponse(news_stream_generator(request.topic), media_type="application/json")
+async def get_news(req: NewsRequest, request: Request):
+    return StreamingResponse(news_stream_generator(request, req.topic), media_type="application/json")
 
-@app.get("/tools")
-def list_tools():
-    return [
-        {
-            "name": "get_news",
-            "description": "뉴스 주제에 대한 요약을 제공합니다.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "topic": {
-                        "type": "string",
-                        "description": "뉴스 주제 (회사, 인물, 사건 등)"
-                    }
-                },
-                "required": ["topic"]
-            }
+@app.get("/metrics/stream_cache")
+def stream_cache_metrics():
+    return stream_cache.snapshot()
+
+TOOLS = [
+    {
+        "name": "get_news",
+        "description": "뉴스 주제에 대한 요약을 제공합니다.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "topic": {
+                    "type": "string",
+                    "description": "뉴스 주제 (회사, 인물, 사건 등)"
+                }
+            },
+            "required": ["topic"]
         }
-    ]
+    }
+]
+
+@app.get("/tools")
+def list_tools(request: Request):
+    # ETag가 같으면 304 (클라이언트의 조건부 재검증)
+    return tools_response(request, TOOLS)
 
 if __name__ == "__main__":
     uvicorn.run("news:app", host="0.0.0.0", port=8002, reload=True)
\ No newline at end of file
@@ -0,0 +1,122 @@
+# single_flight.py
+# 같은 키(정규화된 topic/location) 요청을 LLM 생성 1회로 합치는 single-flight + 완료 스트림 TTL 캐시
+#   - 생성 중인 키로 요청이 오면 새로 생성하지 않고, 지금까지 나온 토큰부터 따라붙어 같이 받음
+#   - 완료된 스트림은 TTL 동안 캐시에서 바로 재생
+#   - 구독자가 모두 끊기면 업스트림 생성도 취소 (결과는 캐시하지 않음)
+import asyncio
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+def normalize_key(text: str) -> str:
+    """NFC 정규화 + 공백 정리 + 대소문자 무시 ('  삼성전자 ' == '삼성전자', 'NVIDIA' == 'nvidia')"""
+    return " ".join(unicodedata.normalize("NFC", text).split()).casefold()
+
+
+class _Flight:
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.changed = asyncio.Event()
+
+    def publish(self) -> None:
+        # 기다리던 구독자를 모두 깨우고, 다음 변경용 이벤트로 교체
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlightCache:
+    def __init__(self, ttl_sec: float = 60.0, max_entries: int = 256):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._flights: Dict[str, _Flight] = {}
+        self._cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.stats = {"requests": 0, "upstream": 0, "coalesced": 0, "cache_hits": 0, "cancelled": 0}
+
+    def _cached(self, key: str) -> Optional[List[str]]:
+        hit = self._cache.get(key)
+        if hit is None:
+            return None
+        expires_at, chunks = hit
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return chunks
+
+    def _store(self, key: str, chunks: List[str]) -> None:
+        if self.ttl_sec <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.ttl_sec, chunks)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _produce(self, key: str, flight: _Flight, open_stream: Callable[[], AsyncIterator[str]]) -> None:
+        upstream = open_stream()
+        try:
+            async for chunk in upstream:
+                flight.chunks.append(chunk)
+                flight.publish()
+            flight.done = True
+            self._store(key, flight.chunks)
+        except asyncio.CancelledError:
+            flight.error = ConnectionAbortedError("upstream cancelled")
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            await upstream.aclose()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.publish()
+
+    async def subscribe(self, key: str, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        key에 대한 토큰 스트림. open_stream()은 실제 업스트림 생성이 필요할 때만 호출됨.
+        """
+        self.stats["requests"] += 1
+        cached = self._cached(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            yield "".join(cached)   # 완료된 응답은 한 번에
+            return
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, open_stream))
+            self.stats["upstream"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        flight.subscribers += 1
+        try:
+            idx = 0
+            while True:
+                if idx < len(flight.chunks):
+                    end = len(flight.chunks)
+                    yield "".join(flight.chunks[idx:end])   # 늦게 붙은 구독자는 밀린 토큰을 한 번에
+                    idx = end
+                    continue
+                if flight.error is not None:
+                    raise flight.error
+                if flight.done:
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None and not flight.task.done():
+                self.stats["cancelled"] += 1
+                if self._flights.get(key) is flight:
+                    del self._flights[key]   # 이후 요청은 새로 생성
+                flight.task.cancel()   # 아무도 안 보는 생성은 중단 (업스트림 스트림도 닫힘)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self.stats, "in_flight": len(self._flights), "cached": len(self._cache), "ttl_sec": self.ttl_sec}
@@ -0,0 +1,151 @@
+# tool_discovery.py
+# MCP 서버 /tools 조회: 병렬 + 서버별 타임아웃 + 디스크 캐시(ETag 조건부 재검증) + 백그라운드 갱신
+#   - 시작 지연은 서버 수의 합이 아니라 가장 느린 서버의 타임아웃으로 제한됨
+#   - 응답하지 않는 서버는 디스크 캐시의 마지막 툴 목록을 그대로 사용
+#   - 서버 쪽은 tools_response()로 ETag를 붙이고 If-None-Match가 같으면 304 반환
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+TOOL_CACHE_PATH = os.getenv("MCP_TOOL_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tool_cache.json"))
+TOOL_DISCOVERY_TIMEOUT_SEC = float(os.getenv("MCP_TOOL_DISCOVERY_TIMEOUT_SEC", 2.0))
+TOOL_REFRESH_SEC = float(os.getenv("MCP_TOOL_REFRESH_SEC", 60.0))
+
+
+# ---- 서버 쪽: /tools 응답에 ETag ----
+def tools_etag(tools: list) -> str:
+    body = json.dumps(tools, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+
+def tools_response(request, tools: list):
+    """FastAPI /tools 핸들러용. 클라이언트가 가진 목록과 같으면 본문 없이 304."""
+    from fastapi.responses import JSONResponse, Response
+
+    etag = tools_etag(tools)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=tools, headers=headers)
+
+
+# ---- 클라이언트 쪽 ----
+class ToolDiscovery:
+    def __init__(
+        self,
+        servers: Dict[str, str],
+        cache_path: str = TOOL_CACHE_PATH,
+        timeout_sec: float = TOOL_DISCOVERY_TIMEOUT_SEC,
+        refresh_sec: float = TOOL_REFRESH_SEC,
+        on_error: Callable[[str], None] = print,
+    ):
+        self.servers = dict(servers)
+        self.cache_path = cache_path
+        self.timeout_sec = timeout_sec
+        self.refresh_sec = refresh_sec
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._load()   # name -> {base_url, etag, tools, fetched_at}
+        self._session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.servers)), thread_name_prefix="tool-discovery")
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "timeouts": 0}
+
+    # -- 디스크 캐시 --
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # 주소가 바뀐 서버의 캐시는 버림
+        return {name: e for name, e in data.items() if self.servers.get(name) == e.get("base_url")}
+
+    def _save(self) -> None:
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)   # 쓰다 죽어도 이전 캐시는 온전
+        except OSError as e:
+            self.on_error(f"[WARN] 툴 캐시 저장 실패: {e}")
+
+    # -- 조회 --
+    def _fetch_one(self, name: str, base_url: str) -> None:
+        """서버 1곳 조회. 목록이 바뀌었으면 디스크 캐시도 갱신 (타임아웃 뒤 늦게 끝나도 반영). 실패는 예외로 올림."""
+        with self._lock:
+            cached = self._entries.get(name)
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        res = self._session.get(f"{base_url}/tools", headers=headers, timeout=self.timeout_sec)
+        if res.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            with self._lock:
+                cached["fetched_at"] = time.time()
+            return
+        res.raise_for_status()
+        tools = res.json()
+        self.stats["fetched"] += 1
+        with self._lock:
+            changed = cached is None or cached.get("tools") != tools
+            self._entries[name] = {
+                "base_url": base_url,
+                "etag": res.headers.get("ETag"),
+                "tools": tools,
+                "fetched_at": time.time(),
+            }
+            if changed:
+                self._save()
+
+    def refresh(self) -> None:
+        """모든 서버를 동시에 조회. 전체 대기는 timeout_sec(+여유)로 제한, 늦은 서버는 캐시 사용."""
+        futures = {self._pool.submit(self._fetch_one, name, url): name for name, url in self.servers.items()}
+        done, not_done = wait(futures, timeout=self.timeout_sec + 0.5)
+        for fut in done:
+            try:
+                fut.result()
+            except Exception as e:
+                self.stats["failed"] += 1
+                self.on_error(f"[ERROR] {futures[fut]} 서버 연결 실패: {e}{self._fallback_note(futures[fut])}")
+        for fut in not_done:
+            self.stats["timeouts"] += 1
+            self.on_error(f"[ERROR] {futures[fut]} 서버 응답 시간 초과{self._fallback_note(futures[fut])}")
+
+    def _fallback_note(self, name: str) -> str:
+        with self._lock:
+            return " (캐시된 툴 목록 사용)" if name in self._entries else ""
+
+    def tools(self) -> List[dict]:
+        """프롬프트용 툴 목록 [{mcp, tool}] (MCP_SERVERS 순서 유지)"""
+        with self._lock:
+            return [
+                {"mcp": name, "tool": tool}
+                for name in self.servers
+                for tool in self._entries.get(name, {}).get("tools", [])
+            ]
+
+    # -- 백그라운드 갱신 --
+    def start(self) -> "ToolDiscovery":
+        """최초 조회 후 refresh_sec마다 백그라운드 재검증 (ETag가 같으면 본문 전송 없음)"""
+        self.refresh()
+        if self.refresh_sec > 0 and self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="tool-refresh", daemon=True)
+            self._refresher.start()
+        return self
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_sec):
+            try:
+                self.refresh()
+            except Exception as e:   # 갱신 스레드는 죽지 않게
+                self.on_error(f"[WARN] 툴 목록 갱신 실패: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)